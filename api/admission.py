@@ -0,0 +1,219 @@
+import math
+import os
+import secrets
+import threading
+import time
+from collections import deque
+
+
+class AdmissionRejected(Exception):
+    def __init__(self, status, reason, message, retry_after):
+        super().__init__(message)
+        self.status = status
+        self.reason = reason
+        self.message = message
+        self.retry_after = retry_after
+
+
+# Limite global de requisições de escrita, compartilhado por todos os
+# processos e instâncias via Redis. Cada vaga é um membro de um sorted set
+# com o horário (do servidor Redis) em que foi tomada; vagas mais velhas que
+# `lease` segundos, de processos que morreram sem devolver, são descartadas.
+class RedisAdmissionLimit:
+    ACQUIRE_SCRIPT = '''
+        redis.replicate_commands()
+        local clock = redis.call('TIME')
+        local now = tonumber(clock[1]) + tonumber(clock[2]) / 1000000
+        redis.call('ZREMRANGEBYSCORE', KEYS[1], '-inf', now - tonumber(ARGV[1]))
+        if redis.call('ZCARD', KEYS[1]) < tonumber(ARGV[2]) then
+            redis.call('ZADD', KEYS[1], now, ARGV[3])
+            redis.call('EXPIRE', KEYS[1], math.ceil(tonumber(ARGV[1])) * 2)
+            return 1
+        end
+        return 0
+    '''
+
+    def __init__(self, url, limit, lease=60, key='ecotrace:admission'):
+        import redis
+        self._client = redis.Redis.from_url(url)
+        self._acquire = self._client.register_script(self.ACQUIRE_SCRIPT)
+        self.limit = max(1, int(limit))
+        self.lease = lease
+        self.key = key
+
+    # Token da vaga, ou None com o limite atingido
+    def try_acquire(self):
+        token = secrets.token_hex(8)
+        if self._acquire(keys=[self.key], args=[self.lease, self.limit, token]):
+            return token
+        return None
+
+    def release(self, token):
+        self._client.zrem(self.key, token)
+
+    def active(self):
+        return self._client.zcard(self.key)
+
+
+# Controle de admissão das rotas que gravam no banco.
+#
+# No máximo `limit` requisições por processo trabalham ao mesmo tempo; as
+# seguintes esperam numa fila FIFO de até `queue_size` lugares por no máximo
+# `queue_timeout` segundos. Cada chave (usuário ou IP) tem no máximo
+# `per_key` requisições entre ativas e na fila. Acima disso a resposta é
+# imediata: 429 para a chave acima do limite, 503 para fila cheia ou espera
+# esgotada, ambas com Retry-After. Assim um pico vira fila curta e recusas
+# baratas em vez de conexões esperando até o limite do MySQL.
+#
+# O limite local vale só para o processo. Com vários workers ou instâncias
+# (Vercel: uma requisição por instância, então o limite local nunca recusa
+# nada) o total de conexões só fica sob controle com `shared`
+# (RedisAdmissionLimit): depois da vaga local a requisição ainda espera uma
+# vaga global, até o mesmo `queue_timeout`.
+class AdmissionController:
+    def __init__(self, limit=5, per_key=2, queue_size=10, queue_timeout=2.0, retry_after=1, enabled=True,
+                 shared=None, shared_poll=0.05):
+        self.limit = max(1, int(limit))
+        self.per_key = max(1, int(per_key))
+        self.queue_size = max(0, int(queue_size))
+        self.queue_timeout = queue_timeout
+        self.retry_after = retry_after
+        self.enabled = enabled
+        self.shared = shared
+        self.shared_poll = shared_poll
+
+        self._lock = threading.Lock()
+        self._active = 0
+        self._waiters = deque()
+        self._by_key = {}
+        self._pid = os.getpid()
+
+        self.admitted = 0
+        self.queued = 0
+        self.shed = {'key_limit': 0, 'queue_full': 0, 'queue_timeout': 0}
+        if shared is not None:
+            self.shed['global_limit'] = 0
+
+    def _reset_after_fork(self):
+        if self._pid != os.getpid():
+            self._pid = os.getpid()
+            self._active = 0
+            self._waiters = deque()
+            self._by_key = {}
+
+    def _reject(self, reason):
+        self.shed[reason] += 1
+        if reason == 'key_limit':
+            return AdmissionRejected(
+                429, reason, 'Muitas requisições simultâneas; tente novamente em instantes', self.retry_after)
+        return AdmissionRejected(
+            503, reason, 'Servidor ocupado; tente novamente em instantes',
+            max(self.retry_after, math.ceil(self.queue_timeout)))
+
+    def _leave_key(self, key):
+        if key is None:
+            return
+        count = self._by_key.get(key, 0) - 1
+        if count > 0:
+            self._by_key[key] = count
+        else:
+            self._by_key.pop(key, None)
+
+    # Entrada sem bloquear: None = admitida; um Event = na fila (esperar com
+    # wait()); AdmissionRejected se recusada. Separado para o modo ASGI
+    # esperar fora do event loop.
+    def enter(self, key=None):
+        if not self.enabled:
+            return None
+        with self._lock:
+            self._reset_after_fork()
+            if key is not None and self._by_key.get(key, 0) >= self.per_key:
+                raise self._reject('key_limit')
+
+            if self._active < self.limit and not self._waiters:
+                self._active += 1
+                ticket = None
+                self.admitted += 1
+            elif len(self._waiters) >= self.queue_size:
+                raise self._reject('queue_full')
+            else:
+                ticket = threading.Event()
+                self._waiters.append(ticket)
+                self.queued += 1
+
+            if key is not None:
+                self._by_key[key] = self._by_key.get(key, 0) + 1
+            return ticket
+
+    def wait(self, ticket, key=None):
+        ticket.wait(self.queue_timeout)
+        with self._lock:
+            # release() pode ter passado a vaga entre o timeout e o lock
+            if ticket.is_set():
+                self.admitted += 1
+                return
+            self._waiters.remove(ticket)
+            self._leave_key(key)
+            raise self._reject('queue_timeout')
+
+    # Vaga global, depois da local; devolve o token para release(). Sem
+    # vaga até o prazo, a local é devolvida e a requisição recebe 503. Com
+    # o Redis fora do ar a requisição passa (só o limite local vale).
+    def acquire_shared(self, key=None):
+        if not self.enabled or self.shared is None:
+            return None
+        deadline = time.monotonic() + self.queue_timeout
+        while True:
+            try:
+                token = self.shared.try_acquire()
+            except Exception as e:
+                print(f"⚠️ Limite global de admissão indisponível: {e}")
+                return None
+            if token is not None:
+                return token
+            if time.monotonic() >= deadline:
+                self._release_local(key)
+                with self._lock:
+                    raise self._reject('global_limit')
+            time.sleep(self.shared_poll)
+
+    def acquire(self, key=None):
+        ticket = self.enter(key)
+        if ticket is not None:
+            self.wait(ticket, key)
+        return self.acquire_shared(key)
+
+    # A vaga passa direto para o primeiro da fila
+    def _release_local(self, key):
+        with self._lock:
+            if self._pid != os.getpid():
+                return
+            self._leave_key(key)
+            if self._waiters:
+                self._waiters.popleft().set()
+            else:
+                self._active = max(0, self._active - 1)
+
+    def release(self, key=None, token=None):
+        if not self.enabled:
+            return
+        self._release_local(key)
+        if token is not None:
+            try:
+                self.shared.release(token)
+            except Exception as e:
+                print(f"⚠️ Não foi possível devolver a vaga global de admissão: {e}")
+
+    def stats(self):
+        with self._lock:
+            return {
+                'enabled': self.enabled,
+                'limit': self.limit,
+                'active': self._active,
+                'queue_depth': len(self._waiters),
+                'queue_size': self.queue_size,
+                'admitted': self.admitted,
+                'queued': self.queued,
+                'shed': dict(self.shed),
+                'global_limit': self.shared.limit if self.shared is not None else None,
+            }
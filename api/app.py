@@ -1,12 +1,42 @@
-from flask import Flask, request, jsonify, render_template, redirect, url_for, session
+from flask import Flask, Response, request, jsonify, render_template, redirect, url_for, session, g, has_request_context, send_from_directory
+from flask.json.provider import DefaultJSONProvider
 from flask_cors import CORS
-import mysql.connector
 import json
+import math
+import mimetypes
 from datetime import datetime
 import os
 from typing import Dict, List, Optional
 import hashlib
 import secrets
+import base64
+import binascii
+import csv
+import io
+from decimal import Decimal
+import click
+import sys
+import atexit
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from urllib.parse import urlencode
+
+# Permite importar os módulos irmãos em api/ (Vercel, gunicorn api.app:app)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from storage import MySQLStorage, SQLiteStorage, StorageUnavailableError
+from cache import MemoryCacheBackend, RedisCacheBackend, UserResponseCache
+from ingest import WriteBehindQueue
+from metrics import MetricsRegistry, RequestTimer
+from health import ReadinessProbe
+from jobs import JobRunner
+from admission import AdmissionController, AdmissionRejected, RedisAdmissionLimit
+from factors import FactorRegistry, FactorSet
+from importer import ImportFormatError, read_records, estimate_records, parse_quantity, parse_date, chunked
+from scenarios import ScenarioError, parse_scenarios, apply_rules
+from assets import AssetManifest, build_assets
 
 # Atualizar o caminho para os templates e arquivos estáticos
 app = Flask(
@@ -17,57 +47,135 @@ app = Flask(
 app.secret_key = os.environ.get('SECRET_KEY', 'sua_chave_secreta_muito_segura_aqui_ecotrace_2025')
 CORS(app)
 
+# Instrumentação: latência por rota em todas as requisições e, nas amostradas
+# (METRICS_SAMPLE_RATE), tempo por fase no cabeçalho Server-Timing
+metrics = MetricsRegistry(
+    sample_rate=float(os.environ.get('METRICS_SAMPLE_RATE', '0.1')),
+    enabled=os.environ.get('METRICS_ENABLED', '1') != '0'
+)
+
+def observe_phase(phase, seconds):
+    if has_request_context():
+        timer = g.get('request_timer')
+        if timer is not None:
+            timer.add(phase, seconds)
+
+@contextmanager
+def timed(phase):
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe_phase(phase, time.perf_counter() - started)
+
+# jsonify passa por app.json.dumps; medir aqui cobre todas as rotas
+class TimedJSONProvider(DefaultJSONProvider):
+    def dumps(self, obj, **kwargs):
+        with timed('serialize'):
+            return super().dumps(obj, **kwargs)
+
+app.json = TimedJSONProvider(app)
+
+@app.before_request
+def start_request_timer():
+    g.request_started = time.perf_counter()
+    if metrics.should_sample():
+        g.request_timer = RequestTimer()
+
+@app.after_request
+def record_request_metrics(response):
+    started = g.get('request_started')
+    if started is None or not metrics.enabled:
+        return response
+
+    total = time.perf_counter() - started
+    route = request.url_rule.rule if request.url_rule else 'unmatched'
+    metrics.observe_request(route, request.method, response.status_code, total)
+
+    timer = g.get('request_timer')
+    if timer is not None:
+        metrics.observe_phases(route, timer.phases)
+        response.headers['Server-Timing'] = timer.server_timing(total)
+    return response
+
 # Configuração do Aiven MySQL
 MYSQL_CONFIG = {
     'host': os.environ.get('AIVEN_HOST'),
     'user': os.environ.get('AIVEN_USER'),
     'password': os.environ.get('AIVEN_PASSWORD'),
     'database': os.environ.get('AIVEN_DB'),
-    'port': int(os.environ.get('AIVEN_PORT')),
+    'port': int(os.environ.get('AIVEN_PORT', '3306')),
     'connect_timeout': int(os.environ.get('AIVEN_TIMEOUT', '10')),
 }
 
-# Caminho temporário para o certificado CA
-_SSL_CA_PATH = None
 _DB_INITIALIZED = False
 
-# Função para conectar ao MySQL
-def get_db_connection(use_database=True):
-    global _SSL_CA_PATH
-    try:
-        conn_params = dict(MYSQL_CONFIG)
-        
-        # Remover database se não for usar
-        if not use_database:
-            conn_params.pop('database', None)
-
-        # Suporte a certificado CA
-        ssl_ca_env = os.environ.get('AIVEN_SSL_CA') or os.environ.get('MYSQL_SSL_CA')
-        if ssl_ca_env:
-            if _SSL_CA_PATH is None:
-                import tempfile, base64
-                pem_data = ssl_ca_env
-                if '-----BEGIN CERTIFICATE-----' not in pem_data:
-                    try:
-                        pem_data = base64.b64decode(ssl_ca_env).decode('utf-8')
-                    except Exception:
-                        pem_data = ssl_ca_env
-                tmp = tempfile.NamedTemporaryFile(delete=False, suffix='.pem')
-                tmp.write(pem_data.encode('utf-8'))
-                tmp.flush()
-                tmp.close()
-                _SSL_CA_PATH = tmp.name
-            conn_params['ssl_ca'] = _SSL_CA_PATH
-            conn_params['ssl_verify_cert'] = True
-        else:
-            conn_params.pop('ssl_ca', None)
-            conn_params.pop('ssl_verify_cert', None)
+# Motor de armazenamento: 'mysql' (padrão, Aiven) ou 'sqlite' (arquivo local
+# em modo WAL, para desenvolvimento, testes de carga e instalações de um nó)
+STORAGE_BACKEND = os.environ.get('STORAGE_BACKEND', 'mysql').lower()
+SQLITE_PATH = os.environ.get(
+    'SQLITE_PATH',
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'ecotrace.sqlite3')
+)
 
-        conn = mysql.connector.connect(**conn_params)
-        return conn
-    except mysql.connector.Error as e:
-        print(f"❌ Erro ao conectar com MySQL: {e}")
-        return None
+# Réplicas de leitura (opcional): "host[:porta],host[:porta]" com as mesmas
+# credenciais do primário. Listagens, relatórios e resumos leem delas; escritas,
+# jobs e o DDL de init_db ficam no primário.
+REPLICA_HOSTS = [host.strip() for host in os.environ.get('AIVEN_REPLICA_HOSTS', '').split(',') if host.strip()]
+REPLICA_MAX_LAG = float(os.environ.get('REPLICA_MAX_LAG', '5'))
+REPLICA_CHECK_INTERVAL = float(os.environ.get('REPLICA_CHECK_INTERVAL', '5'))
+REPLICA_CONNECT_TIMEOUT = int(os.environ.get('REPLICA_CONNECT_TIMEOUT', '2'))
+# Depois de gravar, o usuário lê do primário por este tempo (ler o que
+# acabou de escrever); deve ser maior que REPLICA_MAX_LAG
+REPLICA_PIN_SECONDS = float(os.environ.get('REPLICA_PIN_SECONDS', '15'))
+
+def _replica_configs():
+    configs = []
+    for host in REPLICA_HOSTS:
+        name, _, port = host.partition(':')
+        configs.append({
+            'host': name,
+            'port': int(port or MYSQL_CONFIG['port']),
+            'connect_timeout': REPLICA_CONNECT_TIMEOUT
+        })
+    return configs
+
+def _create_storage():
+    # Pool compartilhado pelas rotas. Na Vercel cada instância atende uma
+    # requisição por vez, então uma conexão reaproveitada já basta.
+    pool_options = {
+        'size': int(os.environ.get('DB_POOL_SIZE', '1' if os.environ.get('VERCEL') else '5')),
+        'max_idle': int(os.environ.get('DB_POOL_MAX_IDLE', '300')),
+        'max_lifetime': int(os.environ.get('DB_POOL_MAX_LIFETIME', '3600')),
+        'checkout_timeout': int(os.environ.get('DB_POOL_TIMEOUT', '10')),
+        'ping_interval': int(os.environ.get('DB_POOL_PING_INTERVAL', '30')),
+    }
+    insert_chunk = int(os.environ.get('BATCH_INSERT_CHUNK', '500'))
+
+    if STORAGE_BACKEND == 'sqlite':
+        return SQLiteStorage(SQLITE_PATH, pool_options, insert_chunk=insert_chunk)
+    if STORAGE_BACKEND != 'mysql':
+        raise RuntimeError(f"STORAGE_BACKEND inválido: {STORAGE_BACKEND} (use mysql ou sqlite)")
+    return MySQLStorage(
+        MYSQL_CONFIG,
+        pool_options,
+        insert_chunk=insert_chunk,
+        backfill_chunk=int(os.environ.get('MIGRATION_BACKFILL_CHUNK', '1000')),
+        replica_configs=_replica_configs(),
+        replica_options={'max_lag': REPLICA_MAX_LAG, 'check_interval': REPLICA_CHECK_INTERVAL},
+        schema_lock_timeout=int(os.environ.get('DB_SCHEMA_LOCK_TIMEOUT', '10'))
+    )
+
+storage = _create_storage()
+storage.observer = observe_phase
+
+# A marca fica na sessão (cookie), então vale em qualquer instância
+def pin_to_primary():
+    if storage.replicas:
+        session['primary_until'] = time.time() + REPLICA_PIN_SECONDS
+
+def read_from_replica():
+    return bool(storage.replicas) and time.time() >= session.get('primary_until', 0)
 
 # Sistema de hash de senha
 def hash_password(password):
@@ -77,156 +185,96 @@ def hash_password(password):
 def verify_password(password, hashed):
     return hash_password(password) == hashed
 
+# Verificação do esquema no primeiro acesso de cada processo:
+#   DB_AUTO_MIGRATE=1 (padrão): uma consulta ao marcador de versão; o DDL
+#     completo só roda se o marcador não existir
+#   DB_AUTO_MIGRATE=0: nenhuma consulta; o esquema é aplicado no deploy com
+#     `flask --app api/app.py migrate`
+DB_AUTO_MIGRATE = os.environ.get('DB_AUTO_MIGRATE', '1') != '0'
+
 # Função para inicializar banco de dados (com tratamento de erros melhorado)
-def init_db():
+def init_db(force=False):
     global _DB_INITIALIZED
     
-    if _DB_INITIALIZED:
+    if _DB_INITIALIZED and not force:
         return True
+
+    if not force:
+        if not DB_AUTO_MIGRATE:
+            _DB_INITIALIZED = True
+            return True
+        with timed('db_schema_check'):
+            if storage.schema_current():
+                _DB_INITIALIZED = True
+                return True
     
     try:
         print("🔄 Verificando/criando banco de dados...")
-        
-        # Conectar sem especificar database
-        conn = get_db_connection(use_database=False)
-        if not conn:
-            print("❌ Não foi possível conectar ao MySQL")
-            return False
-            
-        cursor = conn.cursor()
-
-        # Criar banco de dados se não existir
-        database_name = MYSQL_CONFIG['database']
-        cursor.execute(f"CREATE DATABASE IF NOT EXISTS `{database_name}`")
-        print(f"✅ Banco de dados '{database_name}' verificado/criado")
-
-        # Usar o banco de dados
-        cursor.execute(f"USE `{database_name}`")
-
-        # Criar tabela de usuários
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS usuarios (
-                id INT AUTO_INCREMENT PRIMARY KEY,
-                nome VARCHAR(100) NOT NULL,
-                email VARCHAR(100) UNIQUE NOT NULL,
-                senha VARCHAR(255) NOT NULL,
-                data_cadastro TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                INDEX idx_email (email)
-            )
-        ''')
-        print("✅ Tabela 'usuarios' verificada/criada")
-
-        # Criar tabela de emissões
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS emissions (
-                id INT AUTO_INCREMENT PRIMARY KEY,
-                user_id INT NOT NULL,
-                category TEXT NOT NULL,
-                subcategory TEXT,
-                quantity DECIMAL(15,2) NOT NULL,
-                unit VARCHAR(50) NOT NULL,
-                scope VARCHAR(50) NOT NULL,
-                emissions_kg DECIMAL(15,2) NOT NULL,
-                emissions_tons DECIMAL(15,4) NOT NULL,
-                timestamp VARCHAR(50) NOT NULL,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                FOREIGN KEY (user_id) REFERENCES usuarios(id) ON DELETE CASCADE,
-                INDEX idx_user_id (user_id)
-            )
-        ''')
-        print("✅ Tabela 'emissions' verificada/criada")
-
-        conn.commit()
-        conn.close()
+        with timed('db_init'):
+            storage.init_schema()
         
         _DB_INITIALIZED = True
         print("✅ Banco de dados inicializado com sucesso!")
         return True
         
-    except mysql.connector.Error as e:
-        print(f"❌ Erro ao inicializar banco de dados: {e}")
-        if conn:
-            conn.close()
-        return False
     except Exception as e:
-        print(f"❌ Erro inesperado ao inicializar banco: {e}")
-        if conn:
-            conn.close()
+        print(f"❌ Erro ao inicializar banco de dados: {e}")
         return False
 
+@app.cli.command('migrate')
+def migrate_command():
+    if not init_db(force=True):
+        raise click.ClickException('Não foi possível aplicar o esquema')
+
+# Rotas que não tocam o banco: não disparam a inicialização
+DB_FREE_ENDPOINTS = {'liveness', 'readiness', 'health_check', 'metrics_endpoint', 'static', 'hashed_static'}
+
 # Middleware para garantir que o DB está inicializado
 @app.before_request
 def ensure_db_initialized():
     global _DB_INITIALIZED
+    if request.endpoint in DB_FREE_ENDPOINTS:
+        return
     if not _DB_INITIALIZED:
-        init_db()
+        if init_db() and WRITE_BEHIND_ENABLED:
+            # Inicia o gravador já no primeiro request para reprocessar diários órfãos
+            get_write_behind()
 
-# Fatores de emissão
+# Fatores de emissão: tabelas versionadas em emission_factors.json
+# (ou EMISSION_FACTORS_PATH), recarregadas quando a versão do arquivo muda
 class CarbonCalculator:
-    def __init__(self):
-        self.emission_factors = {
-            'energy': {
-                'grid_brazil': 0.082,
-                'grid_world': 0.475,
-                'coal': 0.950,
-                'natural_gas': 0.469,
-                'solar': 0.045,
-                'wind': 0.011,
-                'hydro': 0.024
-            },
-            'transport': {
-                'gasoline_car': 0.192,
-                'diesel_car': 0.171,
-                'electric_car': 0.053,
-                'bus': 0.089,
-                'truck': 0.215,
-                'airplane': 0.285
-            },
-            'materials': {
-                'steel': 2.30,
-                'aluminum': 8.10,
-                'cement': 0.93,
-                'plastic': 2.53,
-                'paper': 1.07,
-                'wood': 0.45
-            },
-            'waste': {
-                'landfill': 0.350,
-                'incineration': 0.850,
-                'recycling': -0.500,
-                'composting': 0.120
-            },
-            'water': {
-                'treatment': 0.320,
-                'distribution': 0.180,
-                'wastewater': 0.450
-            }
-        }
+    def __init__(self, registry: FactorRegistry):
+        self.registry = registry
+
+    @property
+    def factors(self) -> FactorSet:
+        return self.registry.current()
+
+    @property
+    def factor_version(self) -> str:
+        return self.factors.version
+
+    @property
+    def emission_factors(self):
+        return self.factors.emission_factors
+
+    @property
+    def unit_conversions(self):
+        return self.factors.unit_conversions
+
+    @property
+    def scope_multipliers(self):
+        return self.factors.scope_multipliers
     
     def calculate_emissions(self, category: str, quantity: float, unit: str, 
-                          subcategory: str = None, scope: str = 'direct') -> Dict:
-        converted_quantity = self._convert_units(quantity, unit, category)
-        
-        if category == 'energy':
-            emissions = self._calculate_energy_emissions(converted_quantity, subcategory)
-        elif category == 'transport':
-            emissions = self._calculate_transport_emissions(converted_quantity, subcategory)
-        elif category == 'materials':
-            emissions = self._calculate_materials_emissions(converted_quantity, subcategory)
-        elif category == 'waste':
-            emissions = self._calculate_waste_emissions(converted_quantity, subcategory)
-        elif category == 'water':
-            emissions = self._calculate_water_emissions(converted_quantity, subcategory)
-        else:
-            emissions = converted_quantity * 1.0
-        
-        scope_multipliers = {
-            'direct': 1.0,
-            'indirect': 0.85,  
-            'other': 0.75
-        }
-        
-        adjusted_emissions = emissions * scope_multipliers.get(scope, 1.0)
+                          subcategory: str = None, scope: str = 'direct',
+                          factors: Optional[FactorSet] = None) -> Dict:
+        factors = factors or self.factors
+        conversion, factor, scope_multiplier = factors.lookup(category, subcategory, unit, scope)
+
+        converted_quantity = quantity * conversion
+        emissions = converted_quantity * factor
+        adjusted_emissions = emissions * scope_multiplier
         
         return {
             'category': category,
@@ -236,59 +284,100 @@ class CarbonCalculator:
             'scope': scope,
             'emissions_kg': round(adjusted_emissions, 2),
             'emissions_tons': round(adjusted_emissions / 1000, 4),
+            'factor_version': factors.version,
             'timestamp': datetime.now().isoformat()
         }
-    
-    def _convert_units(self, quantity: float, unit: str, category: str) -> float:
-        conversions = {
-            'energy': {'kwh': 1.0},
-            'transport': {'km': 1.0},
-            'materials': {'kg': 1.0, 'ton': 1000.0},
-            'waste': {'kg': 1.0, 'ton': 1000.0},
-            'water': {'m3': 1.0, 'liter': 0.001}
-        }
-        
-        category_conversions = conversions.get(category, {})
-        conversion_factor = category_conversions.get(unit, 1.0)
-        return quantity * conversion_factor
-    
-    def _calculate_energy_emissions(self, kwh: float, subcategory: str) -> float:
-        if subcategory in self.emission_factors['energy']:
-            factor = self.emission_factors['energy'][subcategory]
-        else:
-            factor = self.emission_factors['energy']['grid_brazil']
-        return kwh * factor
-    
-    def _calculate_transport_emissions(self, km: float, subcategory: str) -> float:
-        if subcategory in self.emission_factors['transport']:
-            factor = self.emission_factors['transport'][subcategory]
-        else:
-            factor = self.emission_factors['transport']['gasoline_car']
-        return km * factor
-    
-    def _calculate_materials_emissions(self, kg: float, subcategory: str) -> float:
-        if subcategory in self.emission_factors['materials']:
-            factor = self.emission_factors['materials'][subcategory]
-        else:
-            factor = 2.0
-        return kg * factor
-    
-    def _calculate_waste_emissions(self, kg: float, subcategory: str) -> float:
-        if subcategory in self.emission_factors['waste']:
-            factor = self.emission_factors['waste'][subcategory]
-        else:
-            factor = self.emission_factors['waste']['landfill']
-        return kg * factor
-    
-    def _calculate_water_emissions(self, m3: float, subcategory: str) -> float:
-        if subcategory in self.emission_factors['water']:
-            factor = self.emission_factors['water'][subcategory]
+
+    # Cálculo em lote sobre colunas. Usa NumPy quando disponível e devolve
+    # exatamente os mesmos valores de calculate_emissions, linha a linha.
+    # Todas as linhas usam o mesmo conjunto de fatores (factor_version).
+    def calculate_emissions_bulk(self, categories: List, subcategories: List, units: List,
+                                 scopes: List, quantities: List,
+                                 factors: Optional[FactorSet] = None) -> Dict:
+        size = len(quantities)
+        if not (len(categories) == len(subcategories) == len(units) == len(scopes) == size):
+            raise ValueError('Todas as colunas devem ter o mesmo tamanho')
+
+        factors = factors or self.factors
+        try:
+            import numpy as np
+        except ImportError:
+            np = None
+
+        if np is None or size == 0:
+            columns = self._calculate_bulk_python(factors, categories, subcategories, units, scopes, quantities)
         else:
-            factor = self.emission_factors['water']['treatment']
-        return m3 * factor
+            columns = self._calculate_bulk_numpy(np, factors, categories, subcategories, units, scopes, quantities)
+        columns['factor_version'] = factors.version
+        return columns
+
+    def _calculate_bulk_python(self, factors, categories, subcategories, units, scopes, quantities) -> Dict:
+        lookup = {}
+        emissions_kg = []
+        emissions_tons = []
+        for category, subcategory, unit, scope, quantity in zip(
+                categories, subcategories, units, scopes, quantities):
+            key = (category, subcategory, unit, scope)
+            entry = lookup.get(key)
+            if entry is None:
+                entry = lookup[key] = factors.lookup(category, subcategory, unit, scope)
+            conversion, factor, scope_multiplier = entry
+
+            adjusted = float(quantity) * conversion * factor * scope_multiplier
+            emissions_kg.append(round(adjusted, 2))
+            emissions_tons.append(round(adjusted / 1000, 4))
+
+        return {'emissions_kg': emissions_kg, 'emissions_tons': emissions_tons}
+
+    def _calculate_bulk_numpy(self, np, factors, categories, subcategories, units, scopes, quantities) -> Dict:
+        # Nenhuma chave das tabelas é 'None', então converter tudo para str
+        # preserva as regras de fallback para valores ausentes.
+        quantity = np.asarray(quantities, dtype=np.float64)
+        category_values, category_index = np.unique(np.asarray(categories, dtype=str), return_inverse=True)
+        subcategory_values, subcategory_index = np.unique(np.asarray(subcategories, dtype=str), return_inverse=True)
+        unit_values, unit_index = np.unique(np.asarray(units, dtype=str), return_inverse=True)
+        scope_values, scope_index = np.unique(np.asarray(scopes, dtype=str), return_inverse=True)
+
+        conversion_table = np.array([
+            [factors.conversion(category, unit) for unit in unit_values.tolist()]
+            for category in category_values.tolist()
+        ], dtype=np.float64)
+        factor_table = np.array([
+            [factors.factor(category, subcategory) for subcategory in subcategory_values.tolist()]
+            for category in category_values.tolist()
+        ], dtype=np.float64)
+        scope_table = np.array(
+            [factors.scope_multiplier(scope) for scope in scope_values.tolist()],
+            dtype=np.float64
+        )
+
+        # Mesma ordem de operações do caminho escalar
+        adjusted = quantity * conversion_table[category_index, unit_index]
+        adjusted = adjusted * factor_table[category_index, subcategory_index]
+        adjusted = adjusted * scope_table[scope_index]
+
+        return {
+            'emissions_kg': _round_like_python(np, adjusted, 2).tolist(),
+            'emissions_tons': _round_like_python(np, adjusted / 1000, 4).tolist()
+        }
+
+# np.round pode divergir de round() em valores muito próximos de .5;
+# esses poucos casos são refeitos com o round() do Python.
+def _round_like_python(np, values, ndigits):
+    rounded = np.round(values, ndigits)
+    scaled = values * (10 ** ndigits)
+    distance = np.abs(np.abs(scaled - np.trunc(scaled)) - 0.5)
+    ties = np.nonzero(distance <= 1e-9 * np.maximum(1.0, np.abs(scaled)))[0]
+    for i in ties.tolist():
+        rounded[i] = round(float(values[i]), ndigits)
+    return rounded
 
 # Inicializar calculadora
-calculator = CarbonCalculator()
+factor_registry = FactorRegistry(
+    os.environ.get('EMISSION_FACTORS_PATH', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'emission_factors.json')),
+    reload_interval=float(os.environ.get('FACTORS_RELOAD_INTERVAL', '30'))
+)
+calculator = CarbonCalculator(factor_registry)
 
 # Middleware para verificar login
 def login_required(f):
@@ -300,6 +389,191 @@ def login_required(f):
         return f(*args, **kwargs)
     return decorated_function
 
+# Cache de respostas de leitura por usuário. Em memória é local a cada
+# processo: uma gravação atendida por um worker não invalida o cache dos
+# outros, que podem servir dados anteriores (200 ou 304) por até CACHE_TTL.
+# Com mais de um worker ou instância use CACHE_REDIS_URL, que compartilha a
+# invalidação; sem ele, o cache em memória só é seguro com um processo.
+def _create_response_cache():
+    redis_url = os.environ.get('CACHE_REDIS_URL')
+    if redis_url:
+        backend = RedisCacheBackend(redis_url)
+    else:
+        if int(os.environ.get('WEB_CONCURRENCY', '1')) > 1:
+            print("⚠️ Cache de respostas em memória com vários workers: a invalidação não é "
+                  "compartilhada (configure CACHE_REDIS_URL)")
+        backend = MemoryCacheBackend(max_entries=int(os.environ.get('CACHE_MAX_ENTRIES', '1024')))
+    return UserResponseCache(
+        backend,
+        ttl=int(os.environ.get('CACHE_TTL', '30')),
+        enabled=os.environ.get('CACHE_ENABLED', '1') != '0'
+    )
+
+response_cache = _create_response_cache()
+
+def response_cache_entry(body, mimetype):
+    return {
+        'body': body,
+        'mimetype': mimetype,
+        'etag': hashlib.sha256(body.encode('utf-8')).hexdigest()[:32]
+    }
+
+# Chave do cache: parâmetros em ordem fixa e from/to já interpretados,
+# então "...00.000Z" e "...00Z" caem na mesma entrada
+def cache_query_key(path, args):
+    items = []
+    for name, value in sorted(args.items(multi=True)):
+        if name in ('from', 'to'):
+            try:
+                parsed = parse_datetime_arg(value)
+            except ValueError:
+                parsed = None
+            if parsed is not None:
+                value = parsed.isoformat()
+        items.append((name, value))
+    return f'{path}?{urlencode(items)}'
+
+# Serve GETs do cache com ETag forte; If-None-Match igual devolve 304
+# sem consultar o banco
+def cached_user_response(f):
+    from functools import wraps
+    @wraps(f)
+    def decorated_function(*args, **kwargs):
+        cache_key = response_cache.key_for(session['user_id'], cache_query_key(request.path, request.args))
+        entry = response_cache.get(cache_key)
+
+        if entry is None:
+            response = app.make_response(f(*args, **kwargs))
+            if response.status_code != 200:
+                return response
+            body = response.get_data(as_text=True)
+            entry = response_cache_entry(body, response.mimetype)
+            response_cache.set(cache_key, entry)
+
+        if request.if_none_match.contains(entry['etag']):
+            response = Response(status=304)
+        else:
+            response = Response(entry['body'], mimetype=entry['mimetype'])
+        response.set_etag(entry['etag'])
+        response.headers['Cache-Control'] = 'private, no-cache'
+        return response
+    return decorated_function
+
+# Controle de admissão das rotas que gravam (cadastro, cálculo, lote,
+# importação e reset): limite de requisições simultâneas por usuário e por
+# processo, fila curta e recusa rápida com Retry-After quando lotado.
+#
+# ADMISSION_LIMIT é por processo (padrão: o tamanho do pool). O total no
+# banco é ADMISSION_LIMIT x workers x instâncias, então com vários workers
+# dimensione-o por max_connections do MySQL / (workers x instâncias). Na
+# Vercel cada instância atende uma requisição por vez e o limite local não
+# protege o banco: defina ADMISSION_GLOBAL_LIMIT (abaixo de max_connections,
+# com folga para as leituras) com ADMISSION_REDIS_URL (ou CACHE_REDIS_URL)
+# para um limite compartilhado por todas as instâncias.
+def _create_admission():
+    limit = int(os.environ.get('ADMISSION_LIMIT', storage.pool.size))
+    shared = None
+    global_limit = os.environ.get('ADMISSION_GLOBAL_LIMIT')
+    redis_url = os.environ.get('ADMISSION_REDIS_URL') or os.environ.get('CACHE_REDIS_URL')
+    if global_limit and redis_url:
+        shared = RedisAdmissionLimit(
+            redis_url,
+            int(global_limit),
+            lease=float(os.environ.get('ADMISSION_GLOBAL_LEASE', '60'))
+        )
+    elif global_limit:
+        print("⚠️ ADMISSION_GLOBAL_LIMIT requer ADMISSION_REDIS_URL ou CACHE_REDIS_URL; usando só o limite por processo")
+    return AdmissionController(
+        limit=limit,
+        per_key=int(os.environ.get('ADMISSION_PER_USER', '4')),
+        queue_size=int(os.environ.get('ADMISSION_QUEUE', str(limit * 2))),
+        queue_timeout=float(os.environ.get('ADMISSION_QUEUE_TIMEOUT', '2')),
+        retry_after=int(os.environ.get('ADMISSION_RETRY_AFTER', '1')),
+        enabled=os.environ.get('ADMISSION_ENABLED', '1') != '0',
+        shared=shared
+    )
+
+admission = _create_admission()
+
+# Usuário logado ou, no cadastro, o IP do cliente
+def admission_key():
+    if 'user_id' in session:
+        return f"user:{session['user_id']}"
+    forwarded = request.headers.get('X-Forwarded-For')
+    return f"ip:{forwarded.split(',')[0].strip() if forwarded else request.remote_addr}"
+
+# Corpo no formato de erro de cada grupo de rotas (auth usa success/message)
+def admission_rejection(rejection, auth=False):
+    if auth:
+        payload = {'success': False, 'message': rejection.message}
+    else:
+        payload = {'error': rejection.message}
+    return payload, rejection.status, {'Retry-After': str(rejection.retry_after)}
+
+def admission_controlled(auth=False):
+    from functools import wraps
+    def decorator(f):
+        @wraps(f)
+        def decorated_function(*args, **kwargs):
+            key = admission_key()
+            try:
+                token = admission.acquire(key)
+            except AdmissionRejected as rejection:
+                payload, status, headers = admission_rejection(rejection, auth)
+                return jsonify(payload), status, headers
+            try:
+                return f(*args, **kwargs)
+            finally:
+                admission.release(key, token)
+        return decorated_function
+    return decorator
+
+# Arquivos estáticos com hash no nome (gerados por `flask build-assets` em
+# static/dist). url_for('static', ...) aponta para a versão gerada quando ela
+# existe; na Vercel static/ sai direto da CDN e esta rota só atende os
+# demais ambientes, com a versão pré-comprimida aceita pelo navegador.
+asset_manifest = AssetManifest(app.static_folder)
+ASSET_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+
+@app.url_defaults
+def fingerprint_static_urls(endpoint, values):
+    if endpoint == 'static' and 'filename' in values:
+        values['filename'] = asset_manifest.resolve(values['filename'])
+
+app.jinja_env.globals['asset_variant'] = asset_manifest.variant
+
+@app.route('/static/dist/<path:filename>')
+def hashed_static(filename):
+    directory = os.path.join(app.static_folder, 'dist')
+    encodings = asset_manifest.encodings(filename)
+    mimetype = mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+
+    response = None
+    for encoding, suffix in (('br', '.br'), ('gzip', '.gz')):
+        if encoding in encodings and request.accept_encodings[encoding]:
+            response = send_from_directory(directory, filename + suffix, mimetype=mimetype)
+            response.headers['Content-Encoding'] = encoding
+            break
+    if response is None:
+        response = send_from_directory(directory, filename, mimetype=mimetype)
+
+    response.headers['Cache-Control'] = ASSET_CACHE_CONTROL
+    response.headers['Vary'] = 'Accept-Encoding'
+    return response
+
+@app.cli.command('build-assets')
+@click.option('--check', is_flag=True, help='Só verifica se static/dist está em dia com static/')
+@click.option('--max-width', type=int, default=1920, help='Largura máxima das variantes WebP')
+def build_assets_command(check, max_width):
+    if check:
+        if not asset_manifest.is_current():
+            raise click.ClickException('static/dist desatualizado; rode flask build-assets')
+        print("✅ static/dist em dia")
+        return
+    manifest = build_assets(app.static_folder, max_width)
+    asset_manifest.reload()
+    print(f"✅ {len(manifest['files'])} arquivo(s) gerado(s) em static/dist")
+
 # Rotas da aplicação
 @app.route('/')
 def index():
@@ -323,6 +597,7 @@ def relatorios():
 
 # API de Autenticação
 @app.route('/api/register', methods=['POST'])
+@admission_controlled(auth=True)
 def register():
     try:
         data = request.get_json()
@@ -346,17 +621,13 @@ def register():
                 return jsonify({'success': False, 'message': 'Erro ao inicializar banco de dados'}), 500
         
         # Verificar se email já existe
-        conn = get_db_connection()
-        if not conn:
+        try:
+            if storage.get_user_by_email(email):
+                print("⚠️ Email já cadastrado:", email)
+                return jsonify({'success': False, 'message': 'Email já cadastrado'}), 400
+        except StorageUnavailableError:
             print("❌ Erro ao conectar com o banco de dados")
             return jsonify({'success': False, 'message': 'Erro de conexão com o banco'}), 500
-            
-        cursor = conn.cursor()
-        cursor.execute('SELECT id FROM usuarios WHERE email = %s', (email,))
-        if cursor.fetchone():
-            conn.close()
-            print("⚠️ Email já cadastrado:", email)
-            return jsonify({'success': False, 'message': 'Email já cadastrado'}), 400
         
         # Hash da senha
         senha_hash = hash_password(senha)
@@ -364,19 +635,13 @@ def register():
         
         # Inserir usuário
         try:
-            cursor.execute(
-                'INSERT INTO usuarios (nome, email, senha) VALUES (%s, %s, %s)',
-                (nome, email, senha_hash)
-            )
-            conn.commit()
-            user_id = cursor.lastrowid
+            user_id = storage.create_user(nome, email, senha_hash)
             print("✅ Usuário cadastrado com sucesso, ID:", user_id)
+        except StorageUnavailableError:
+            return jsonify({'success': False, 'message': 'Erro de conexão com o banco'}), 500
         except Exception as e:
-            conn.rollback()
             print(f"❌ Erro ao inserir usuário no banco: {e}")
             return jsonify({'success': False, 'message': 'Erro ao salvar usuário'}), 500
-        finally:
-            conn.close()
         
         # Logar usuário automaticamente
         session['user_id'] = user_id
@@ -410,14 +675,10 @@ def login_api():
         senha = data['senha'].strip()
         
         # Buscar usuário
-        conn = get_db_connection()
-        if not conn:
+        try:
+            usuario = storage.get_user_by_email(email)
+        except StorageUnavailableError:
             return jsonify({'success': False, 'message': 'Erro de conexão com o banco'}), 500
-            
-        cursor = conn.cursor(dictionary=True)
-        cursor.execute('SELECT * FROM usuarios WHERE email = %s', (email,))
-        usuario = cursor.fetchone()
-        conn.close()
         
         if not usuario:
             return jsonify({'success': False, 'message': 'Email não cadastrado'}), 400
@@ -446,8 +707,142 @@ def logout():
     return redirect('/login')
 
 # API de Emissões
+BATCH_MAX_ITEMS = int(os.environ.get('BATCH_MAX_ITEMS', '5000'))
+
+@app.cli.command('rebuild-rollups')
+@click.option('--user-id', type=int, default=None, help='Reconstruir apenas este usuário')
+def rebuild_rollups_command(user_id):
+    init_db()
+    try:
+        total = storage.rebuild_rollups(user_id)
+    except StorageUnavailableError:
+        raise click.ClickException('Erro de conexão com o banco')
+    print(f"✅ Rollup reconstruído para {total} usuário(s) e suas organizações")
+
+# Gravação adiada (opcional, para workers de longa duração): o resultado vai
+# para um diário local e é gravado em lote por uma thread. Não usar na Vercel,
+# onde o processo é congelado entre requisições e /tmp é descartável.
+WRITE_BEHIND_ENABLED = os.environ.get('WRITE_BEHIND') == '1'
+_write_behind = None
+_write_behind_pid = None
+_write_behind_lock = threading.Lock()
+
+# Grava um lote do diário; a deduplicação por id fica no armazenamento
+def persist_ingested(records):
+    for user_id in storage.persist_ingested(records):
+        response_cache.invalidate_user(user_id)
+    prune_ingest_log()
+
+INGEST_LOG_RETENTION_DAYS = int(os.environ.get('INGEST_LOG_RETENTION_DAYS', '7'))
+_last_ingest_prune = None
+
+# Remove ids antigos de ingest_log no máximo uma vez por hora
+def prune_ingest_log():
+    global _last_ingest_prune
+    if _last_ingest_prune is not None and time.monotonic() - _last_ingest_prune < 3600:
+        return
+    _last_ingest_prune = time.monotonic()
+    try:
+        storage.prune_ingest_log(INGEST_LOG_RETENTION_DAYS)
+    except StorageUnavailableError:
+        pass
+
+# Cria a fila no processo atual (depois do fork do gunicorn, nunca antes)
+def get_write_behind():
+    global _write_behind, _write_behind_pid
+    with _write_behind_lock:
+        if _write_behind is None or _write_behind_pid != os.getpid():
+            _write_behind = WriteBehindQueue(
+                persist_ingested,
+                os.environ.get('INGEST_JOURNAL_DIR', os.path.join(tempfile.gettempdir(), 'ecotrace-journal')),
+                batch_size=int(os.environ.get('INGEST_BATCH_SIZE', '500')),
+                flush_interval=float(os.environ.get('INGEST_FLUSH_INTERVAL', '1')),
+                fsync=os.environ.get('INGEST_FSYNC', '1') != '0'
+            )
+            _write_behind_pid = os.getpid()
+            _write_behind.start()
+            atexit.register(_write_behind.stop)
+        return _write_behind
+
+# Jobs de longa duração (importação etc.). O estado fica na tabela jobs para
+# que o progresso possa ser consultado de qualquer worker. Na Vercel a
+# função congela depois da resposta, então lá o job roda dentro da requisição.
+JOBS_IN_BACKGROUND = os.environ.get('JOBS_BACKGROUND', '0' if os.environ.get('VERCEL') else '1') != '0'
+job_runner = JobRunner(
+    storage.save_job,
+    storage.load_job,
+    max_errors=int(os.environ.get('JOB_MAX_ERRORS', '1000'))
+)
+
+def public_job(job):
+    return {key: value for key, value in job.items() if key not in ('user_id', 'cursor')}
+
+# Valida uma atividade e devolve (parâmetros, erro)
+def validate_activity(data):
+    if not isinstance(data, dict):
+        return None, 'Atividade inválida'
+
+    for field in ['category', 'quantity', 'unit', 'scope']:
+        if field not in data:
+            return None, f'Campo obrigatório faltando: {field}'
+
+    try:
+        quantity = float(data['quantity'])
+    except (TypeError, ValueError):
+        return None, 'Quantidade inválida'
+    # NaN e infinito, como na importação (importer._finite)
+    if not math.isfinite(quantity):
+        return None, 'Quantidade inválida'
+
+    for field, max_length in (('category', 100), ('unit', 50), ('scope', 50)):
+        if not isinstance(data[field], str) or len(data[field]) > max_length:
+            return None, f'Campo inválido: {field}'
+
+    subcategory = data.get('subcategory')
+    if subcategory is not None and (not isinstance(subcategory, str) or len(subcategory) > 100):
+        return None, 'Campo inválido: subcategory'
+
+    return {
+        'category': data['category'],
+        'quantity': quantity,
+        'unit': data['unit'],
+        'subcategory': data.get('subcategory'),
+        'scope': data['scope']
+    }, None
+
+# Calcula várias atividades validadas de uma vez pelo caminho em lote
+def calculate_activities(activities):
+    if not activities:
+        return []
+
+    columns = calculator.calculate_emissions_bulk(
+        [activity['category'] for activity in activities],
+        [activity['subcategory'] for activity in activities],
+        [activity['unit'] for activity in activities],
+        [activity['scope'] for activity in activities],
+        [activity['quantity'] for activity in activities]
+    )
+    timestamp = datetime.now().isoformat()
+
+    return [
+        {
+            'category': activity['category'],
+            'subcategory': activity['subcategory'],
+            'quantity': activity['quantity'],
+            'unit': activity['unit'],
+            'scope': activity['scope'],
+            'emissions_kg': emissions_kg,
+            'emissions_tons': emissions_tons,
+            'factor_version': columns['factor_version'],
+            'timestamp': timestamp
+        }
+        for activity, emissions_kg, emissions_tons in zip(
+            activities, columns['emissions_kg'], columns['emissions_tons'])
+    ]
+
 @app.route('/api/calculate', methods=['POST'])
 @login_required
+@admission_controlled()
 def calculate_emissions():
     try:
         data = request.get_json()
@@ -455,40 +850,28 @@ def calculate_emissions():
         if not data:
             return jsonify({'error': 'Dados JSON inválidos'}), 400
         
-        required_fields = ['category', 'quantity', 'unit', 'scope']
-        for field in required_fields:
-            if field not in data:
-                return jsonify({'error': f'Campo obrigatório faltando: {field}'}), 400
-        
-        result = calculator.calculate_emissions(
-            category=data['category'],
-            quantity=float(data['quantity']),
-            unit=data['unit'],
-            subcategory=data.get('subcategory'),
-            scope=data['scope']
-        )
+        params, error = validate_activity(data)
+        if error:
+            return jsonify({'error': error}), 400
         
+        with timed('compute'):
+            result = calculator.calculate_emissions(**params)
+
+        pin_to_primary()
+        if WRITE_BEHIND_ENABLED:
+            get_write_behind().enqueue(session['user_id'], [result])
+            return jsonify({
+                'success': True,
+                'queued': True,
+                'data': result
+            }), 202
+
         # Salvar no banco
-        conn = get_db_connection()
-        if conn:
-            cursor = conn.cursor()
-            cursor.execute('''
-                INSERT INTO emissions 
-                (user_id, category, subcategory, quantity, unit, scope, emissions_kg, emissions_tons, timestamp)
-                VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)
-            ''', (
-                session['user_id'],
-                result['category'],
-                result['subcategory'],
-                result['quantity'],
-                result['unit'],
-                result['scope'],
-                result['emissions_kg'],
-                result['emissions_tons'],
-                result['timestamp']
-            ))
-            conn.commit()
-            conn.close()
+        try:
+            storage.insert_emissions(session['user_id'], [result])
+        except StorageUnavailableError:
+            return jsonify({'error': 'Erro de conexão com o banco'}), 500
+        response_cache.invalidate_user(session['user_id'])
         
         return jsonify({
             'success': True,
@@ -498,37 +881,520 @@ def calculate_emissions():
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@app.route('/api/calculate/batch', methods=['POST'])
+@login_required
+@admission_controlled()
+def calculate_emissions_batch():
+    try:
+        data = request.get_json()
+        activities = data.get('activities') if isinstance(data, dict) else data
+
+        if not isinstance(activities, list) or not activities:
+            return jsonify({'error': 'Envie uma lista de atividades'}), 400
+
+        if len(activities) > BATCH_MAX_ITEMS:
+            return jsonify({'error': f'Máximo de {BATCH_MAX_ITEMS} atividades por lote'}), 413
+
+        # Validar tudo antes de calcular ou gravar
+        valid = []
+        errors = []
+        for index, activity in enumerate(activities):
+            params, error = validate_activity(activity)
+            if error:
+                errors.append({'index': index, 'error': error})
+            else:
+                valid.append((index, params))
+
+        with timed('compute'):
+            results = list(zip(
+                [index for index, _ in valid],
+                calculate_activities([params for _, params in valid])
+            ))
+
+        if results:
+            pin_to_primary()
+
+        # Gravação adiada: nada foi salvo ainda, como no 202 de /api/calculate
+        queued = bool(results) and WRITE_BEHIND_ENABLED
+        if queued:
+            get_write_behind().enqueue(session['user_id'], [result for _, result in results])
+
+        # Uma única transação para o lote inteiro
+        elif results:
+            try:
+                storage.insert_emissions(session['user_id'], [result for _, result in results])
+            except StorageUnavailableError:
+                return jsonify({'error': 'Erro de conexão com o banco'}), 500
+            except Exception as e:
+                print(f"❌ Erro ao gravar lote de emissões: {e}")
+                return jsonify({'error': 'Erro ao salvar emissões'}), 500
+            response_cache.invalidate_user(session['user_id'])
+
+        return jsonify({
+            'success': not errors,
+            'queued': queued,
+            'data': [{'index': index, **result} for index, result in results],
+            'errors': errors,
+            'saved': 0 if queued else len(results),
+            'failed': len(errors),
+            'total_emissions_kg': round(sum(result['emissions_kg'] for _, result in results), 2)
+        }), 202 if queued else 200 if results or not errors else 400
+
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+IMPORT_CHUNK_ROWS = int(os.environ.get('IMPORT_CHUNK_ROWS', '1000'))
+IMPORT_MAX_BYTES = int(os.environ.get('IMPORT_MAX_BYTES', str(50 * 1024 * 1024)))
+IMPORT_UPLOAD_DIR = os.environ.get('IMPORT_UPLOAD_DIR', os.path.join(tempfile.gettempdir(), 'ecotrace-imports'))
+
+# Validação de uma linha de planilha contra as tabelas da calculadora:
+# categoria, subcategoria e unidade precisam existir. Devolve
+# (parâmetros, data da atividade, erro).
+def validate_import_row(record):
+    category = str(record.get('category') or '').strip().lower()
+    subcategory = str(record.get('subcategory') or '').strip() or None
+    unit = str(record.get('unit') or '').strip().lower()
+    scope = str(record.get('scope') or '').strip().lower()
+
+    if category not in calculator.emission_factors:
+        return None, None, f'Categoria desconhecida: {category or "(vazia)"}'
+    if subcategory is not None and subcategory not in calculator.emission_factors[category]:
+        return None, None, f'Subcategoria desconhecida para {category}: {subcategory}'
+    if unit not in calculator.unit_conversions.get(category, {}):
+        return None, None, f'Unidade inválida para {category}: {unit or "(vazia)"}'
+    if scope not in calculator.scope_multipliers:
+        return None, None, f'Escopo inválido: {scope or "(vazio)"}'
+
+    try:
+        quantity = parse_quantity(record.get('quantity'))
+    except (TypeError, ValueError):
+        return None, None, 'Quantidade inválida'
+    if quantity < 0:
+        return None, None, 'Quantidade negativa'
+
+    try:
+        activity_at = parse_date(record.get('date'))
+    except ValueError:
+        return None, None, 'Data inválida (use AAAA-MM-DD ou DD/MM/AAAA)'
+
+    return {
+        'category': category,
+        'subcategory': subcategory,
+        'quantity': quantity,
+        'unit': unit,
+        'scope': scope
+    }, activity_at, None
+
+# Lê o arquivo em blocos de IMPORT_CHUNK_ROWS linhas; cada bloco é validado,
+# calculado em lote e gravado na sua própria transação
+def run_import(job, path, filename, user_id):
+    try:
+        job.total = estimate_records(path, filename)
+        for chunk in chunked(read_records(path, filename), IMPORT_CHUNK_ROWS):
+            if job.cancelled:
+                break
+
+            valid = []
+            for number, record in chunk:
+                params, activity_at, error = validate_import_row(record)
+                if error:
+                    job.add_error(number, error)
+                else:
+                    valid.append((params, activity_at))
+
+            results = calculate_activities([params for params, _ in valid])
+            for result, (_, activity_at) in zip(results, valid):
+                if activity_at is not None:
+                    result['timestamp'] = activity_at.isoformat()
+
+            if results:
+                storage.insert_emissions(user_id, results)
+                response_cache.invalidate_user(user_id)
+
+            job.processed += len(chunk)
+            job.succeeded += len(results)
+            job_runner.checkpoint(job)
+
+        if job.total is not None:
+            job.total = max(job.total, job.processed)
+    except ImportFormatError as e:
+        raise RuntimeError(str(e))
+    finally:
+        if os.path.exists(path):
+            os.remove(path)
+
+# Copia o upload para um arquivo temporário em blocos, respeitando o limite
+def _save_upload(source):
+    os.makedirs(IMPORT_UPLOAD_DIR, exist_ok=True)
+    path = os.path.join(IMPORT_UPLOAD_DIR, f'{secrets.token_hex(16)}.upload')
+    size = 0
+    try:
+        with open(path, 'wb') as f:
+            for block in iter(lambda: source.read(1024 * 1024), b''):
+                size += len(block)
+                if size > IMPORT_MAX_BYTES:
+                    raise ValueError('Arquivo muito grande')
+                f.write(block)
+    except Exception:
+        os.remove(path)
+        raise
+    return path
+
+# Importação de planilhas (CSV, CSV com ';' ou .xlsx). Aceita multipart com o
+# campo "file" ou o arquivo direto no corpo (?filename=... indica o formato).
+@app.route('/api/import', methods=['POST'])
+@login_required
+@admission_controlled()
+def import_activities():
+    if request.content_length and request.content_length > IMPORT_MAX_BYTES:
+        return jsonify({'error': f'Arquivo maior que {IMPORT_MAX_BYTES // (1024 * 1024)} MB'}), 413
+
+    upload = request.files.get('file')
+    if upload is not None:
+        source, filename = upload.stream, upload.filename or 'upload.csv'
+    elif request.mimetype in ('text/csv', 'text/plain', 'application/octet-stream',
+                              'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'):
+        source, filename = request.stream, request.args.get('filename', 'upload.csv')
+    else:
+        return jsonify({'error': 'Envie o arquivo no campo "file" ou no corpo como text/csv'}), 400
+
+    try:
+        path = _save_upload(source)
+    except ValueError:
+        return jsonify({'error': f'Arquivo maior que {IMPORT_MAX_BYTES // (1024 * 1024)} MB'}), 413
+
+    user_id = session['user_id']
+    try:
+        job = job_runner.create('import', user_id, {'filename': filename})
+        pin_to_primary()
+    except StorageUnavailableError:
+        os.remove(path)
+        return jsonify({'error': 'Erro de conexão com o banco'}), 500
+
+    job_runner.run(job, lambda job: run_import(job, path, filename, user_id), background=JOBS_IN_BACKGROUND)
+    return jsonify({
+        'success': True,
+        'job_id': job.id,
+        'status_url': f'/api/jobs/{job.id}',
+        'job': public_job(job.to_dict())
+    }), 202 if JOBS_IN_BACKGROUND else 200
+
+@app.route('/api/jobs/<job_id>', methods=['GET'])
+@login_required
+def get_job(job_id):
+    try:
+        job = job_runner.get(job_id)
+    except StorageUnavailableError:
+        return jsonify({'error': 'Erro de conexão com o banco'}), 500
+    if not job or job.get('user_id') != session['user_id']:
+        return jsonify({'error': 'Job não encontrado'}), 404
+    return jsonify({'success': True, 'job': public_job(job)})
+
+# Cancela um job que está rodando neste processo; ele para no próximo lote
+# e termina com status "cancelled" (o trabalho já gravado fica)
+@app.route('/api/jobs/<job_id>', methods=['DELETE'])
+@login_required
+def cancel_job(job_id):
+    try:
+        job = job_runner.get(job_id)
+    except StorageUnavailableError:
+        return jsonify({'error': 'Erro de conexão com o banco'}), 500
+    if not job or job.get('user_id') != session['user_id']:
+        return jsonify({'error': 'Job não encontrado'}), 404
+    if not job_runner.cancel(job_id):
+        return jsonify({'error': 'Job não está em execução'}), 409
+    return jsonify({'success': True, 'job': public_job(job_runner.get(job_id))}), 202
+
+# Recálculo das emissões gravadas quando os fatores mudam. Percorre a tabela
+# em blocos pela chave primária até o maior id do início; cada bloco é uma
+# transação curta (linhas e rollup juntos) seguida de uma pausa, para dividir
+# o banco com o tráfego normal. O cursor do job guarda o último id gravado.
+RECALC_CHUNK_ROWS = int(os.environ.get('RECALC_CHUNK_ROWS', '1000'))
+RECALC_PAUSE = float(os.environ.get('RECALC_PAUSE', '0.05'))
+
+def _recalculate_rows(rows, factors):
+    columns = calculator.calculate_emissions_bulk(
+        [row['category'] for row in rows],
+        [row['subcategory'] for row in rows],
+        [row['unit'] for row in rows],
+        [row['scope'] for row in rows],
+        [row['quantity'] for row in rows],
+        factors=factors
+    )
+    return [
+        {
+            'category': row['category'],
+            'scope': row['scope'],
+            'emissions_kg': emissions_kg,
+            'emissions_tons': emissions_tons
+        }
+        for row, emissions_kg, emissions_tons in zip(rows, columns['emissions_kg'], columns['emissions_tons'])
+    ]
+
+def run_recalculation(job, chunk_rows=RECALC_CHUNK_ROWS, pause=RECALC_PAUSE):
+    factors = calculator.factors
+
+    # Job novo, ou retomado depois de outra troca de fatores: recomeça do início
+    if job.params.get('factor_version') != factors.version or job.cursor is None:
+        total, max_id = storage.emission_bounds()
+        job.params = {'factor_version': factors.version, 'max_id': max_id}
+        job.total = total
+        job.cursor = 0
+        job.processed = job.succeeded = 0
+        job_runner.checkpoint(job, force=True)
+
+    max_id = job.params['max_id']
+    while not job.cancelled:
+        last_id, scanned, updated, user_ids = storage.recalculate_emissions(
+            job.cursor, max_id, chunk_rows, factors.version,
+            lambda rows: _recalculate_rows(rows, factors)
+        )
+        if last_id is None:
+            break
+
+        for user_id in user_ids:
+            response_cache.invalidate_user(user_id)
+        job.cursor = last_id
+        job.processed += scanned
+        job.succeeded += updated
+        job_runner.checkpoint(job)
+
+        if pause:
+            time.sleep(pause)
+
+    if job.total is not None:
+        job.total = max(job.total, job.processed)
+
+@app.cli.command('recalculate-emissions')
+@click.option('--resume', 'job_id', default=None, help='Retomar o job de recálculo com este id')
+@click.option('--chunk-rows', type=int, default=RECALC_CHUNK_ROWS, help='Linhas por transação')
+@click.option('--pause', type=float, default=RECALC_PAUSE, help='Pausa entre blocos, em segundos')
+def recalculate_emissions_command(job_id, chunk_rows, pause):
+    init_db()
+    try:
+        if job_id:
+            data = storage.load_job(job_id)
+            if not data or data.get('kind') != 'recalculate':
+                raise click.ClickException('Job de recálculo não encontrado')
+            if data.get('status') == 'done':
+                print(f"✅ Job {job_id} já concluído")
+                return
+            job = job_runner.resume(data)
+        else:
+            job = job_runner.create('recalculate')
+    except StorageUnavailableError:
+        raise click.ClickException('Erro de conexão com o banco')
+
+    print(f"🔄 Recalculando emissões com os fatores {calculator.factor_version} (job {job.id})")
+    job_runner.run(job, lambda job: run_recalculation(job, chunk_rows, pause), background=False)
+    if job.status != 'done':
+        raise click.ClickException(
+            f"Recálculo {job.status}: {job.message or ''} "
+            f"(retome com: flask recalculate-emissions --resume {job.id})"
+        )
+    print(f"✅ {job.succeeded} de {job.processed} registro(s) recalculado(s)")
+
+# Prontidão do banco verificada em segundo plano; as rotas de saúde só leem
+# o último resultado, sem abrir conexão a cada chamada
+def _readiness_check():
+    return init_db() and storage.ping()
+
+readiness_probe = ReadinessProbe(
+    _readiness_check,
+    interval=float(os.environ.get('READINESS_INTERVAL', '10')),
+    stale_after=float(os.environ.get('READINESS_STALE_AFTER', '30'))
+)
+
+def readiness_status():
+    # Na Vercel o processo fica congelado entre requisições; lá a
+    # verificação é refeita na leitura quando o resultado envelhece
+    if os.environ.get('VERCEL') is None:
+        readiness_probe.start()
+    return readiness_probe.status()
+
+# Liveness: o processo responde (sem I/O)
+@app.route('/api/health/live', methods=['GET'])
+def liveness():
+    return jsonify({'status': 'OK'})
+
+# Readiness: último resultado da verificação do banco e estado do pool
+@app.route('/api/health/ready', methods=['GET'])
+def readiness():
+    probe = readiness_status()
+    return jsonify({
+        'status': 'OK' if probe['ready'] else 'ERROR',
+        'storage': storage.name,
+        'db_initialized': _DB_INITIALIZED,
+        'probe': probe,
+        'pool': storage.stats()['pool']
+    }), 200 if probe['ready'] else 503
+
 @app.route('/api/health', methods=['GET'])
 def health_check():
-    db_status = "OK" if _DB_INITIALIZED else "NOT_INITIALIZED"
-    conn = get_db_connection()
-    if conn:
-        conn.close()
+    if readiness_status()['ready']:
         return jsonify({
             'status': 'OK', 
-            'message': 'API e MySQL funcionando',
+            'message': f'API e {storage.label} funcionando',
+            'storage': storage.name,
             'db_initialized': _DB_INITIALIZED
         })
     else:
         return jsonify({
             'status': 'ERROR', 
-            'message': 'Erro na conexão MySQL',
+            'message': f'Erro na conexão {storage.label}',
+            'storage': storage.name,
             'db_initialized': _DB_INITIALIZED
         }), 500
 
+# Métricas no formato Prometheus. Com METRICS_TOKEN definido, exige
+# "Authorization: Bearer <token>".
+@app.route('/api/metrics', methods=['GET'])
+def metrics_endpoint():
+    token = os.environ.get('METRICS_TOKEN')
+    if token and request.headers.get('Authorization') != f'Bearer {token}':
+        return jsonify({'error': 'Não autorizado'}), 401
+
+    stats = storage.stats()
+    pool = stats['pool']
+    gauges = [
+        ('db_pool_connections', 'Conexões do pool por estado', pool['idle'], [('state', 'idle')]),
+        ('db_pool_connections', 'Conexões do pool por estado', pool['in_use'], [('state', 'in_use')]),
+        ('db_pool_size', 'Tamanho máximo do pool', pool['size'], []),
+        ('metrics_sample_rate', 'Fração das requisições com tempo por fase', metrics.sample_rate, []),
+    ]
+    counters = [
+        ('db_pool_events', 'Eventos acumulados do pool', pool['created'], [('event', 'created')]),
+        ('db_pool_events', 'Eventos acumulados do pool', pool['reused'], [('event', 'reused')]),
+        ('db_pool_events', 'Eventos acumulados do pool', pool['discarded'], [('event', 'discarded')]),
+        ('response_cache_lookups', 'Consultas ao cache de respostas', response_cache.hits, [('result', 'hit')]),
+        ('response_cache_lookups', 'Consultas ao cache de respostas', response_cache.misses, [('result', 'miss')]),
+    ]
+    for replica in stats['replicas']:
+        labels = [('replica', replica['name'])]
+        gauges.append(('db_replica_healthy', 'Réplica de leitura em uso (1) ou fora (0)', int(replica['healthy']), labels))
+        if replica['lag'] is not None:
+            gauges.append(('db_replica_lag_seconds', 'Atraso medido da réplica', replica['lag'], labels))
+        counters.append(('db_replica_failures', 'Falhas acumuladas da réplica', replica['failures'], labels))
+    control = admission.stats()
+    gauges.extend([
+        ('admission_active', 'Requisições de escrita em andamento', control['active'], []),
+        ('admission_limit', 'Limite de requisições de escrita simultâneas', control['limit'], []),
+        ('admission_queue_depth', 'Requisições de escrita na fila', control['queue_depth'], []),
+    ])
+    if control['global_limit'] is not None:
+        gauges.append(('admission_global_limit', 'Limite de escritas simultâneas entre instâncias', control['global_limit'], []))
+    counters.extend([
+        ('admission_requests', 'Requisições de escrita admitidas e enfileiradas', control['admitted'], [('result', 'admitted')]),
+        ('admission_requests', 'Requisições de escrita admitidas e enfileiradas', control['queued'], [('result', 'queued')]),
+    ])
+    for reason, count in control['shed'].items():
+        counters.append(('admission_shed', 'Requisições de escrita recusadas por motivo', count, [('reason', reason)]))
+    if _write_behind is not None and _write_behind_pid == os.getpid():
+        queue = _write_behind.stats()
+        gauges.append(('write_behind_pending', 'Registros no diário ainda não gravados', queue['pending'], []))
+        counters.append(('write_behind_failures', 'Falhas de gravação do diário', queue['failures'], []))
+
+    return Response(metrics.render(gauges, counters), mimetype='text/plain; version=0.0.4')
+
+# Reset em lotes: as emissões do usuário até o último id são apagadas em
+# transações curtas (RESET_CHUNK_ROWS linhas), sem travar as gravações novas.
+# No modo "soft" as linhas são ocultadas na hora e apagadas depois. Quando o
+# job roda na própria requisição (Vercel) ele para em RESET_TIME_BUDGET
+# segundos com status "partial"; chamar /api/reset de novo continua.
+RESET_MODES = ('chunked', 'soft')
+RESET_MODE = os.environ.get('RESET_MODE', 'chunked')
+RESET_CHUNK_ROWS = int(os.environ.get('RESET_CHUNK_ROWS', '1000'))
+RESET_PAUSE = float(os.environ.get('RESET_PAUSE', '0.01'))
+RESET_TIME_BUDGET = float(os.environ.get('RESET_TIME_BUDGET', '5'))
+RESET_SOFT_TIME_BUDGET = float(os.environ.get('RESET_SOFT_TIME_BUDGET', '0.5'))
+
+def run_reset(job, user_id, upto_id, time_budget=None, pause=RESET_PAUSE):
+    deadline = time.monotonic() + time_budget if time_budget else None
+    visible = job.params.get('mode') != 'soft'
+    while not job.cancelled:
+        if deadline is not None and time.monotonic() >= deadline:
+            job.partial = True
+            job.message = 'Tempo esgotado; chame /api/reset novamente para continuar'
+            break
+
+        deleted = storage.delete_emissions(user_id, upto_id, RESET_CHUNK_ROWS)
+        if not deleted:
+            break
+        if visible:
+            response_cache.invalidate_user(user_id)
+        job.processed += deleted
+        job.succeeded += deleted
+        job_runner.checkpoint(job)
+
+        if pause:
+            time.sleep(pause)
+
+    if job.total is not None:
+        job.total = max(job.total, job.processed)
+
 @app.route('/api/reset', methods=['POST'])
 @login_required
+@admission_controlled()
 def reset_data():
+    data = request.get_json(silent=True) or {}
+    mode = data.get('mode') or request.args.get('mode') or RESET_MODE
+    if mode not in RESET_MODES:
+        return jsonify({'error': f"Modo inválido; use {' ou '.join(RESET_MODES)}"}), 400
+
+    user_id = session['user_id']
+    running = [job for job in job_runner.running('reset') if job.user_id == user_id]
+    if running:
+        job = running[0]
+        return jsonify({
+            'message': 'Reset em andamento',
+            'job_id': job.id,
+            'status_url': f'/api/jobs/{job.id}',
+            'job': public_job(job.to_dict())
+        }), 202
+
+    pin_to_primary()
     try:
-        conn = get_db_connection()
-        if conn:
-            cursor = conn.cursor()
-            cursor.execute('DELETE FROM emissions WHERE user_id = %s', (session['user_id'],))
-            conn.commit()
-            conn.close()
-        return jsonify({'message': 'Dados resetados com sucesso'})
-    except Exception as e:
-        return jsonify({'error': str(e)}), 500
+        if mode == 'soft':
+            upto_id = storage.hide_emissions(user_id)
+            response_cache.invalidate_user(user_id)
+            total = None
+        else:
+            total, upto_id = storage.emission_bounds(user_id)
+        job = job_runner.create('reset', user_id, {'mode': mode, 'upto_id': upto_id})
+    except StorageUnavailableError:
+        return jsonify({'error': 'Erro de conexão com o banco'}), 500
+    job.total = total
+
+    time_budget = None
+    if not JOBS_IN_BACKGROUND:
+        time_budget = RESET_SOFT_TIME_BUDGET if mode == 'soft' else RESET_TIME_BUDGET
+    job_runner.run(job, lambda job: run_reset(job, user_id, upto_id, time_budget), background=JOBS_IN_BACKGROUND)
+
+    # No modo soft os dados já somem das consultas, mesmo com a limpeza pendente
+    done = job.status == 'done' or mode == 'soft'
+    return jsonify({
+        'message': 'Dados resetados com sucesso' if done else 'Reset em andamento',
+        'job_id': job.id,
+        'status_url': f'/api/jobs/{job.id}',
+        'job': public_job(job.to_dict())
+    }), 200 if done else 202
+
+# Apaga as linhas ocultas por resets "soft" que ainda não foram limpas
+@app.cli.command('purge-resets')
+def purge_resets_command():
+    init_db()
+    try:
+        purged = 0
+        for user_id, watermark in storage.reset_watermarks():
+            while True:
+                deleted = storage.delete_emissions(user_id, watermark, RESET_CHUNK_ROWS)
+                if not deleted:
+                    break
+                purged += deleted
+                time.sleep(RESET_PAUSE)
+    except StorageUnavailableError:
+        raise click.ClickException('Erro de conexão com o banco')
+    print(f"✅ {purged} registro(s) oculto(s) apagado(s)")
 
 @app.route('/api/user')
 @login_required
@@ -539,102 +1405,564 @@ def get_user():
         'email': session['user_email']
     })
 
+# Fatores em uso (versão e tabelas), para conferência e auditoria
+@app.route('/api/factors')
+@login_required
+def get_factors():
+    factors = calculator.factors
+    response = jsonify(factors.to_dict())
+    response.headers['ETag'] = f'"factors-{factors.version}"'
+    return response
+
+EMISSIONS_PAGE_DEFAULT = int(os.environ.get('EMISSIONS_PAGE_DEFAULT', '500'))
+EMISSIONS_PAGE_MAX = int(os.environ.get('EMISSIONS_PAGE_MAX', '1000'))
+
+def parse_datetime_arg(value):
+    if not value:
+        return None
+    if not isinstance(value, str):
+        raise ValueError(value)
+    return datetime.fromisoformat(value.replace('Z', '+00:00')).replace(tzinfo=None)
+
+# Cursor opaco com a última posição (created_at, id) entregue
+def encode_cursor(created_at, emission_id):
+    raw = f"{created_at.isoformat()}|{emission_id}".encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii')
+
+def decode_cursor(cursor_value):
+    raw = base64.urlsafe_b64decode(cursor_value.encode('ascii')).decode('utf-8')
+    created_at, emission_id = raw.split('|', 1)
+    return datetime.fromisoformat(created_at), int(emission_id)
+
+# Filtros comuns às consultas de emissões a partir da URL
+def emission_filters(args):
+    # Filtros também chegam em corpos JSON (simulação), com qualquer tipo
+    for field in ('category', 'scope'):
+        if args.get(field) and not isinstance(args.get(field), str):
+            raise ValueError(field)
+    return {
+        'from': parse_datetime_arg(args.get('from')),
+        'to': parse_datetime_arg(args.get('to')),
+        'category': args.get('category') or None,
+        'scope': args.get('scope') or None
+    }
+
+# Parâmetros da listagem paginada; ValueError/TypeError/binascii.Error
+# quando inválidos. Compartilhado com o modo ASGI (asgi.py).
+def emissions_page_args(args):
+    limit = min(max(int(args.get('limit', EMISSIONS_PAGE_DEFAULT)), 1), EMISSIONS_PAGE_MAX)
+    filters = emission_filters(args)
+    after = decode_cursor(args['cursor']) if args.get('cursor') else None
+    return limit, filters, after
+
+# Resposta da listagem a partir de limit + 1 linhas lidas
+def emissions_page(emissions, limit):
+    has_more = len(emissions) > limit
+    emissions = emissions[:limit]
+    next_cursor = None
+    if has_more:
+        last = emissions[-1]
+        next_cursor = encode_cursor(last['created_at'], last['id'])
+    
+    # Converter datetime para string se necessário
+    for emission in emissions:
+        if emission.get('created_at'):
+            emission['created_at'] = emission['created_at'].isoformat()
+    
+    return {
+        'success': True,
+        'emissions': emissions,
+        'count': len(emissions),
+        'has_more': has_more,
+        'next_cursor': next_cursor
+    }
+
 @app.route('/api/emissions/user', methods=['GET'])
 @login_required
+@cached_user_response
 def get_user_emissions():
     try:
-        conn = get_db_connection()
-        if not conn:
+        try:
+            limit, filters, after = emissions_page_args(request.args)
+        except (ValueError, TypeError, binascii.Error):
+            return jsonify({'error': 'Parâmetros de consulta inválidos'}), 400
+
+        # Uma linha extra indica se existe próxima página
+        try:
+            emissions = storage.list_emissions(
+                session['user_id'], filters, limit + 1, after, replica=read_from_replica()
+            )
+        except StorageUnavailableError:
             return jsonify({'error': 'Erro de conexão com o banco'}), 500
-        
-        cursor = conn.cursor(dictionary=True)
-        cursor.execute('''
-            SELECT id, category, subcategory, quantity, unit, scope, 
-                   emissions_kg, emissions_tons, timestamp, created_at
-            FROM emissions 
-            WHERE user_id = %s 
-            ORDER BY created_at DESC
-        ''', (session['user_id'],))
-        
-        emissions = cursor.fetchall()
-        conn.close()
-        
-        # Converter datetime para string se necessário
-        for emission in emissions:
-            if emission.get('created_at'):
-                emission['created_at'] = emission['created_at'].isoformat()
-        
-        return jsonify({
-            'success': True,
-            'emissions': emissions,
-            'total': len(emissions)
-        })
+
+        return jsonify(emissions_page(emissions, limit))
         
     except Exception as e:
         print(f"Erro ao buscar emissões: {e}")
         return jsonify({'error': 'Erro ao buscar emissões'}), 500
 
+EXPORT_COLUMNS = [
+    'id', 'activity_at', 'created_at', 'timestamp', 'category', 'subcategory', 'quantity',
+    'unit', 'scope', 'emissions_kg', 'emissions_tons', 'factor_version'
+]
+EXPORT_FETCH_SIZE = int(os.environ.get('EXPORT_FETCH_SIZE', '1000'))
+
+def _export_value(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if value is None or isinstance(value, (str, int, float)):
+        return value
+    return str(value)
+
+# Cabeçalho e linhas passam pelo mesmo writer: mesma citação e mesmo
+# terminador (\r\n) no arquivo inteiro
+def _csv_chunk(rows):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerows(rows)
+    return buffer.getvalue()
+
+# Gera o arquivo a partir do cursor de streaming, um lote por vez
+def _export_rows(stream, export_format):
+    for rows in stream.batches():
+        if export_format == 'csv':
+            yield _csv_chunk([_export_value(value) for value in row] for row in rows)
+        else:
+            yield ''.join(
+                json.dumps(dict(zip(EXPORT_COLUMNS, map(_export_value, row))), ensure_ascii=False) + '\n'
+                for row in rows
+            )
+
+@app.route('/api/emissions/export', methods=['GET'])
+@login_required
+def export_emissions():
+    export_format = request.args.get('format', 'csv').lower()
+    if export_format not in ('csv', 'ndjson'):
+        return jsonify({'error': 'Formato inválido (use csv ou ndjson)'}), 400
+
+    try:
+        filters = emission_filters(request.args)
+    except ValueError:
+        return jsonify({'error': 'Parâmetros de consulta inválidos'}), 400
+
+    # A conexão pertence ao stream até o fim da resposta. Se o cliente
+    # desistir no meio, sobram linhas não lidas e ela é descartada.
+    try:
+        stream = storage.stream_emissions(
+            session['user_id'], filters, EXPORT_COLUMNS, EXPORT_FETCH_SIZE, replica=read_from_replica()
+        )
+    except StorageUnavailableError:
+        return jsonify({'error': 'Erro de conexão com o banco'}), 500
+
+    def generate():
+        try:
+            if export_format == 'csv':
+                yield _csv_chunk([EXPORT_COLUMNS])
+            yield from _export_rows(stream, export_format)
+        except Exception as e:
+            # Sem o raise o servidor terminaria a resposta normalmente e o
+            # arquivo truncado pareceria um download completo; propagando, a
+            # resposta em partes é interrompida e o cliente vê a falha
+            print(f"❌ Erro ao exportar emissões: {e}")
+            raise
+        finally:
+            stream.close()
+
+    if export_format == 'csv':
+        mimetype = 'text/csv'
+        filename = 'emissoes.csv'
+    else:
+        mimetype = 'application/x-ndjson'
+        filename = 'emissoes.ndjson'
+
+    response = Response(generate(), mimetype=mimetype)
+    response.headers['Content-Disposition'] = f'attachment; filename="{filename}"'
+    response.headers['X-Accel-Buffering'] = 'no'
+    response.call_on_close(stream.close)
+    return response
+
+TIMESERIES_BUCKETS = ('day', 'week', 'month')
+
+def timeseries_payload(rows, bucket):
+    series = [
+        {
+            'bucket': str(row['bucket'])[:10],
+            'category': row['category'],
+            'scope': row['scope'],
+            'emissions_kg': round(float(row['emissions_kg'] or 0), 2),
+            'emissions_tons': round(float(row['emissions_tons'] or 0), 4),
+            'entries': int(row['entries'])
+        }
+        for row in rows
+    ]
+
+    return {
+        'success': True,
+        'bucket': bucket,
+        'series': series,
+        'totals': {
+            'emissions_kg': round(sum(item['emissions_kg'] for item in series), 2),
+            'emissions_tons': round(sum(item['emissions_tons'] for item in series), 4),
+            'entries': sum(item['entries'] for item in series)
+        }
+    }
+
+@app.route('/api/emissions/timeseries', methods=['GET'])
+@login_required
+@cached_user_response
+def get_emissions_timeseries():
+    bucket = request.args.get('bucket', 'day')
+    if bucket not in TIMESERIES_BUCKETS:
+        return jsonify({'error': 'Período inválido (use day, week ou month)'}), 400
+
+    try:
+        filters = emission_filters(request.args)
+    except ValueError:
+        return jsonify({'error': 'Parâmetros de consulta inválidos'}), 400
+
+    try:
+        try:
+            rows = storage.timeseries(session['user_id'], filters, bucket, replica=read_from_replica())
+        except StorageUnavailableError:
+            return jsonify({'error': 'Erro de conexão com o banco'}), 500
+
+        return jsonify(timeseries_payload(rows, bucket))
+
+    except Exception as e:
+        print(f"Erro ao buscar série temporal: {e}")
+        return jsonify({'error': 'Erro ao buscar série temporal'}), 500
+
+# Resumo a partir das linhas do rollup (uma por categoria e escopo).
+# SQLite devolve float; str() antes do Decimal mantém a soma exata para os
+# valores de 4 casas gravados.
+def summary_payload(rollups):
+    by_category = {}
+    by_scope = {}
+    for item in rollups:
+        total_tons = Decimal(str(item['total_tons'])).quantize(Decimal('0.0001'))
+        by_category[item['category']] = by_category.get(item['category'], Decimal(0)) + total_tons
+        by_scope[item['scope']] = by_scope.get(item['scope'], Decimal(0)) + total_tons
+    
+    return {
+        'success': True,
+        'totals': {
+            'total': float(sum(by_scope.values(), Decimal(0))),
+            'direct': float(by_scope.get('direct', 0)),
+            'indirect': float(by_scope.get('indirect', 0)),
+            'other': float(by_scope.get('other', 0))
+        },
+        'by_category': {category: float(total) for category, total in by_category.items()},
+        'by_scope': {scope: float(total) for scope, total in by_scope.items()}
+    }
+
 @app.route('/api/emissions/summary', methods=['GET'])
 @login_required
+@cached_user_response
 def get_emissions_summary():
     try:
-        conn = get_db_connection()
-        if not conn:
+        # Leitura do rollup: uma linha por (categoria, escopo) do usuário
+        try:
+            rollups = storage.rollup_summary(session['user_id'], replica=read_from_replica())
+        except StorageUnavailableError:
             return jsonify({'error': 'Erro de conexão com o banco'}), 500
+
+        return jsonify(summary_payload(rollups))
         
-        cursor = conn.cursor(dictionary=True)
-        
-        # Total de emissões
-        cursor.execute('''
-            SELECT 
-                SUM(emissions_tons) as total_emissions,
-                SUM(CASE WHEN scope = 'direct' THEN emissions_tons ELSE 0 END) as direct_emissions,
-                SUM(CASE WHEN scope = 'indirect' THEN emissions_tons ELSE 0 END) as indirect_emissions,
-                SUM(CASE WHEN scope = 'other' THEN emissions_tons ELSE 0 END) as other_emissions
-            FROM emissions 
-            WHERE user_id = %s
-        ''', (session['user_id'],))
-        
-        totals = cursor.fetchone()
-        
-        # Emissões por categoria
-        cursor.execute('''
-            SELECT category, SUM(emissions_tons) as total
-            FROM emissions 
-            WHERE user_id = %s
-            GROUP BY category
-        ''', (session['user_id'],))
-        
-        by_category = cursor.fetchall()
-        
-        # Emissões por escopo
-        cursor.execute('''
-            SELECT scope, SUM(emissions_tons) as total
-            FROM emissions 
-            WHERE user_id = %s
-            GROUP BY scope
-        ''', (session['user_id'],))
-        
-        by_scope = cursor.fetchall()
-        
-        conn.close()
-        
+    except Exception as e:
+        print(f"Erro ao buscar resumo: {e}")
+        return jsonify({'error': 'Erro ao buscar resumo'}), 500
+
+SIMULATION_MAX_SCENARIOS = int(os.environ.get('SIMULATION_MAX_SCENARIOS', '50'))
+SIMULATION_MAX_RULES = int(os.environ.get('SIMULATION_MAX_RULES', '50'))
+
+def _simulation_totals(emissions):
+    by_category = {}
+    by_scope = {}
+    for (category, _, _, scope), emissions_kg in emissions.items():
+        by_category[category] = by_category.get(category, 0.0) + emissions_kg
+        by_scope[scope] = by_scope.get(scope, 0.0) + emissions_kg
+    total_kg = sum(by_scope.values())
+    return {
+        'total_kg': round(total_kg, 2),
+        'total_tons': round(total_kg / 1000, 4),
+        'by_category': {category: round(value, 2) for category, value in sorted(by_category.items())},
+        'by_scope': {scope: round(value, 2) for scope, value in sorted(by_scope.items())}
+    }
+
+# Simulação "e se": aplica regras de substituição ao histórico do usuário
+# sem gravar nada. O histórico é agregado uma vez por (categoria,
+# subcategoria, unidade, escopo) e todos os cenários partem dessa base; a
+# base e os cenários passam juntos por um único cálculo em lote.
+@app.route('/api/emissions/simulate', methods=['POST'])
+@login_required
+def simulate_emissions():
+    data = request.get_json(silent=True)
+    if not isinstance(data, dict):
+        return jsonify({'error': 'Corpo JSON inválido'}), 400
+
+    if data.get('filters') is not None and not isinstance(data['filters'], dict):
+        return jsonify({'error': '"filters" deve ser um objeto'}), 400
+
+    factors = calculator.factors
+    try:
+        filters = emission_filters(data.get('filters') or request.args)
+        scenarios = parse_scenarios(data.get('scenarios'), factors, SIMULATION_MAX_SCENARIOS, SIMULATION_MAX_RULES)
+    except ValueError:
+        return jsonify({'error': 'Parâmetros de consulta inválidos'}), 400
+    except ScenarioError as e:
+        return jsonify({'error': str(e)}), 400
+
+    try:
+        stream = storage.activity_base(session['user_id'], filters, replica=read_from_replica())
+    except StorageUnavailableError:
+        return jsonify({'error': 'Erro de conexão com o banco'}), 500
+
+    try:
+        base = {}
+        entries = 0
+        for rows in stream.batches():
+            for category, subcategory, unit, scope, quantity, count in rows:
+                key = (category, subcategory, unit, scope)
+                base[key] = base.get(key, 0.0) + float(quantity or 0)
+                entries += int(count)
+    except Exception as e:
+        print(f"Erro ao carregar histórico para simulação: {e}")
+        return jsonify({'error': 'Erro ao carregar histórico'}), 500
+    finally:
+        stream.close()
+
+    with timed('compute'):
+        variants = [base] + [apply_rules(base, rules) for _, rules in scenarios]
+        keys = [(index, key) for index, variant in enumerate(variants) for key in variant]
+        columns = calculator.calculate_emissions_bulk(
+            [key[0] for _, key in keys],
+            [key[1] for _, key in keys],
+            [key[2] for _, key in keys],
+            [key[3] for _, key in keys],
+            [variants[index][key] for index, key in keys],
+            factors=factors
+        )
+
+        emissions = [{} for _ in variants]
+        for (index, key), emissions_kg in zip(keys, columns['emissions_kg']):
+            emissions[index][key] = emissions_kg
+
+        baseline = _simulation_totals(emissions[0])
+        results = []
+        for (name, _), scenario_emissions in zip(scenarios, emissions[1:]):
+            totals = _simulation_totals(scenario_emissions)
+            delta_kg = round(totals['total_kg'] - baseline['total_kg'], 2)
+            totals.update({
+                'name': name,
+                'delta_kg': delta_kg,
+                'delta_pct': round(delta_kg / baseline['total_kg'] * 100, 2) if baseline['total_kg'] else None
+            })
+            results.append(totals)
+
+    return jsonify({
+        'success': True,
+        'factor_version': factors.version,
+        'entries': entries,
+        'baseline': baseline,
+        'scenarios': results
+    })
+
+# Organizações: contas de empresa com vários usuários, que só entram por
+# convite aceito por eles mesmos. O resumo lê o rollup da organização
+# (mantido junto com as gravações de cada membro) e a série temporal agrega
+# os membros numa única consulta.
+ORG_MANAGERS = ('owner', 'admin')
+
+def _organization_access(org_id, roles=None):
+    name, role = storage.organization_role(org_id, session['user_id'])
+    if role is None:
+        return None, None, (jsonify({'error': 'Organização não encontrada'}), 404)
+    if roles and role not in roles:
+        return None, None, (jsonify({'error': 'Permissão insuficiente'}), 403)
+    return name, role, None
+
+@app.route('/api/organizations', methods=['GET', 'POST'])
+@login_required
+def organizations():
+    try:
+        if request.method == 'GET':
+            return jsonify({'success': True, 'organizations': storage.user_organizations(session['user_id'])})
+
+        data = request.get_json(silent=True) or {}
+        name = data.get('name')
+        if not isinstance(name, str) or not name.strip() or len(name.strip()) > 100:
+            return jsonify({'error': 'Nome da organização inválido'}), 400
+
+        org_id = storage.create_organization(name.strip(), session['user_id'])
+        pin_to_primary()
+        return jsonify({'success': True, 'organization': {'id': org_id, 'name': name.strip(), 'role': 'owner'}}), 201
+
+    except StorageUnavailableError:
+        return jsonify({'error': 'Erro de conexão com o banco'}), 500
+    except Exception as e:
+        print(f"Erro em organizações: {e}")
+        return jsonify({'error': 'Erro ao processar organização'}), 500
+
+@app.route('/api/organizations/<int:org_id>/members', methods=['GET', 'POST'])
+@login_required
+def organization_members(org_id):
+    try:
+        if request.method == 'GET':
+            _, _, error = _organization_access(org_id)
+            if error:
+                return error
+            members = storage.organization_members(org_id)
+            for member in members:
+                if isinstance(member.get('joined_at'), datetime):
+                    member['joined_at'] = member['joined_at'].isoformat()
+            return jsonify({'success': True, 'members': members})
+
+        _, _, error = _organization_access(org_id, ORG_MANAGERS)
+        if error:
+            return error
+
+        data = request.get_json(silent=True) or {}
+        role = data.get('role', 'member')
+        if role not in ('admin', 'member'):
+            return jsonify({'error': 'Papel inválido (use admin ou member)'}), 400
+        email = data.get('email')
+        if not isinstance(email, str) or not email.strip():
+            return jsonify({'error': 'E-mail inválido'}), 400
+
+        # Só um convite: o histórico do usuário entra na organização quando
+        # ele aceita. A resposta é a mesma para e-mails cadastrados ou não
+        # (e para quem já é membro), para não revelar quem tem conta.
+        user = storage.get_user_by_email(email.strip())
+        if user and storage.invite_member(org_id, user['id'], role, session['user_id']):
+            pin_to_primary()
         return jsonify({
             'success': True,
-            'totals': {
-                'total': float(totals['total_emissions'] or 0),
-                'direct': float(totals['direct_emissions'] or 0),
-                'indirect': float(totals['indirect_emissions'] or 0),
-                'other': float(totals['other_emissions'] or 0)
-            },
-            'by_category': {item['category']: float(item['total']) for item in by_category},
-            'by_scope': {item['scope']: float(item['total']) for item in by_scope}
-        })
-        
+            'message': 'Se o e-mail estiver cadastrado, o usuário receberá o convite'
+        }), 202
+
+    except StorageUnavailableError:
+        return jsonify({'error': 'Erro de conexão com o banco'}), 500
     except Exception as e:
-        print(f"Erro ao buscar resumo: {e}")
+        print(f"Erro em membros da organização: {e}")
+        return jsonify({'error': 'Erro ao processar membros'}), 500
+
+# Gestores removem qualquer membro; membros podem sair. O dono fica.
+@app.route('/api/organizations/<int:org_id>/members/<int:user_id>', methods=['DELETE'])
+@login_required
+def remove_organization_member(org_id, user_id):
+    try:
+        _, role, error = _organization_access(org_id)
+        if error:
+            return error
+        if user_id != session['user_id'] and role not in ORG_MANAGERS:
+            return jsonify({'error': 'Permissão insuficiente'}), 403
+        _, member_role = storage.organization_role(org_id, user_id)
+        if member_role == 'owner':
+            return jsonify({'error': 'O dono não pode sair da organização'}), 400
+
+        if not storage.remove_member(org_id, user_id):
+            return jsonify({'error': 'Membro não encontrado'}), 404
+        pin_to_primary()
+        return jsonify({'success': True})
+
+    except StorageUnavailableError:
+        return jsonify({'error': 'Erro de conexão com o banco'}), 500
+    except Exception as e:
+        print(f"Erro ao remover membro: {e}")
+        return jsonify({'error': 'Erro ao processar membros'}), 500
+
+# Convites recebidos pelo usuário logado
+@app.route('/api/invitations', methods=['GET'])
+@login_required
+def invitations():
+    try:
+        pending = storage.user_invitations(session['user_id'])
+        for invitation in pending:
+            if isinstance(invitation.get('invited_at'), datetime):
+                invitation['invited_at'] = invitation['invited_at'].isoformat()
+        return jsonify({'success': True, 'invitations': pending})
+
+    except StorageUnavailableError:
+        return jsonify({'error': 'Erro de conexão com o banco'}), 500
+    except Exception as e:
+        print(f"Erro ao buscar convites: {e}")
+        return jsonify({'error': 'Erro ao buscar convites'}), 500
+
+@app.route('/api/invitations/<int:org_id>/accept', methods=['POST'])
+@login_required
+def accept_invitation(org_id):
+    try:
+        role = storage.accept_invitation(org_id, session['user_id'])
+        if role is None:
+            return jsonify({'error': 'Convite não encontrado'}), 404
+        pin_to_primary()
+        return jsonify({'success': True, 'organization': {'id': org_id, 'role': role}})
+
+    except StorageUnavailableError:
+        return jsonify({'error': 'Erro de conexão com o banco'}), 500
+    except Exception as e:
+        print(f"Erro ao aceitar convite: {e}")
+        return jsonify({'error': 'Erro ao processar convite'}), 500
+
+@app.route('/api/invitations/<int:org_id>', methods=['DELETE'])
+@login_required
+def decline_invitation(org_id):
+    try:
+        if not storage.decline_invitation(org_id, session['user_id']):
+            return jsonify({'error': 'Convite não encontrado'}), 404
+        return jsonify({'success': True})
+
+    except StorageUnavailableError:
+        return jsonify({'error': 'Erro de conexão com o banco'}), 500
+    except Exception as e:
+        print(f"Erro ao recusar convite: {e}")
+        return jsonify({'error': 'Erro ao processar convite'}), 500
+
+@app.route('/api/organizations/<int:org_id>/summary', methods=['GET'])
+@login_required
+def get_organization_summary(org_id):
+    try:
+        name, _, error = _organization_access(org_id)
+        if error:
+            return error
+        rollups = storage.org_rollup_summary(org_id, replica=read_from_replica())
+        payload = summary_payload(rollups)
+        payload['organization'] = {'id': org_id, 'name': name}
+        return jsonify(payload)
+
+    except StorageUnavailableError:
+        return jsonify({'error': 'Erro de conexão com o banco'}), 500
+    except Exception as e:
+        print(f"Erro ao buscar resumo da organização: {e}")
         return jsonify({'error': 'Erro ao buscar resumo'}), 500
 
+@app.route('/api/organizations/<int:org_id>/timeseries', methods=['GET'])
+@login_required
+def get_organization_timeseries(org_id):
+    bucket = request.args.get('bucket', 'day')
+    if bucket not in TIMESERIES_BUCKETS:
+        return jsonify({'error': 'Período inválido (use day, week ou month)'}), 400
+
+    try:
+        filters = emission_filters(request.args)
+    except ValueError:
+        return jsonify({'error': 'Parâmetros de consulta inválidos'}), 400
+
+    try:
+        name, _, error = _organization_access(org_id)
+        if error:
+            return error
+        rows = storage.org_timeseries(org_id, filters, bucket, replica=read_from_replica())
+        payload = timeseries_payload(rows, bucket)
+        payload['organization'] = {'id': org_id, 'name': name}
+        return jsonify(payload)
+
+    except StorageUnavailableError:
+        return jsonify({'error': 'Erro de conexão com o banco'}), 500
+    except Exception as e:
+        print(f"Erro ao buscar série temporal da organização: {e}")
+        return jsonify({'error': 'Erro ao buscar série temporal'}), 500
+
 if __name__ == "__main__":
     print("🔄 Inicializando banco de dados...")
     init_db()
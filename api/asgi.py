@@ -0,0 +1,416 @@
+import asyncio
+import binascii
+import contextvars
+import io
+import json
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from urllib.parse import parse_qsl
+
+from itsdangerous import BadSignature
+from werkzeug.datastructures import MultiDict
+from werkzeug.http import dump_cookie, parse_cookie, parse_etags, quote_etag
+
+# Modo ASGI: as rotas mais quentes (cálculo, listagem e resumo) rodam em
+# corrotinas com o driver assíncrono (aiomysql), então um worker atende
+# outras requisições enquanto espera o MySQL. Todas as demais rotas, e
+# qualquer caso fora do caminho comum (sem login, JSON malformado,
+# gravação adiada), passam para o app Flask sem mudança de contrato.
+#
+#   uvicorn api.asgi:app --workers 4
+#
+# Sessão, cache de respostas, métricas, leituras nas réplicas e fixação no
+# primário depois de gravar são os mesmos do modo WSGI. ASGI_NATIVE=0
+# desliga as rotas nativas.
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import app as flask_module
+from admission import AdmissionRejected
+from async_storage import AsyncMySQLStorage
+from metrics import RequestTimer
+from storage import StorageUnavailableError
+
+flask_app = flask_module.app
+
+ASGI_NATIVE = os.environ.get('ASGI_NATIVE', '1') != '0'
+# Threads para as rotas que continuam no Flask (o driver síncrono bloqueia)
+ASGI_WSGI_THREADS = int(os.environ.get('ASGI_WSGI_THREADS', '8'))
+
+db = None
+if ASGI_NATIVE and flask_module.storage.name == 'mysql':
+    db = AsyncMySQLStorage(
+        flask_module.storage,
+        size=int(os.environ.get('ASYNC_DB_POOL_SIZE', '10')),
+        max_lifetime=int(os.environ.get('DB_POOL_MAX_LIFETIME', '3600'))
+    )
+elif ASGI_NATIVE:
+    print(f"⚠️ Modo ASGI sem driver assíncrono para {flask_module.storage.label}; todas as rotas usam o app Flask")
+
+# Tempo por fase da requisição atual (cada requisição roda na sua task)
+_request_timer = contextvars.ContextVar('request_timer', default=None)
+
+def _observe_phase(phase, seconds):
+    timer = _request_timer.get()
+    if timer is not None:
+        timer.add(phase, seconds)
+
+if db is not None:
+    db.observer = _observe_phase
+
+
+class Request:
+    def __init__(self, scope, body=b''):
+        self.method = scope['method']
+        self.path = scope['path']
+        query_string = scope.get('query_string', b'').decode('latin-1')
+        self.args = MultiDict(parse_qsl(query_string, keep_blank_values=True))
+        self.headers = {}
+        for name, value in scope.get('headers', []):
+            name = name.decode('latin-1').lower()
+            value = value.decode('latin-1')
+            self.headers[name] = _join_header(name, self.headers[name], value) if name in self.headers else value
+        self.body = body
+
+
+# Cabeçalhos repetidos viram um só; Cookie usa '; ' (RFC 6265), os demais ','
+def _join_header(name, current, value):
+    separator = '; ' if name.lower() == 'cookie' else ','
+    return f'{current}{separator}{value}'
+
+
+# Sessão assinada no mesmo cookie do Flask
+def load_session(request):
+    interface = flask_app.session_interface
+    value = parse_cookie(request.headers.get('cookie', '')).get(interface.get_cookie_name(flask_app))
+    if not value:
+        return {}
+    max_age = int(flask_app.permanent_session_lifetime.total_seconds())
+    try:
+        return dict(interface.get_signing_serializer(flask_app).loads(value, max_age=max_age))
+    except BadSignature:
+        return {}
+
+def session_cookie(session):
+    interface = flask_app.session_interface
+    expires = None
+    if session.get('_permanent'):
+        expires = datetime.now(timezone.utc) + flask_app.permanent_session_lifetime
+    return dump_cookie(
+        interface.get_cookie_name(flask_app),
+        interface.get_signing_serializer(flask_app).dumps(session),
+        expires=expires,
+        path=interface.get_cookie_path(flask_app),
+        domain=interface.get_cookie_domain(flask_app),
+        secure=interface.get_cookie_secure(flask_app),
+        httponly=interface.get_cookie_httponly(flask_app),
+        samesite=interface.get_cookie_samesite(flask_app)
+    )
+
+# Mesmo efeito de pin_to_primary() no app Flask
+def pin_to_primary(session):
+    if flask_module.storage.replicas:
+        session['primary_until'] = time.time() + flask_module.REPLICA_PIN_SECONDS
+        return True
+    return False
+
+# Mesmo efeito de read_from_replica() no app Flask
+def read_from_replica(session):
+    return bool(flask_module.storage.replicas) and time.time() >= session.get('primary_until', 0)
+
+
+def json_response(payload, status=200):
+    # Corpo idêntico ao jsonify (mesmo provider, mesmas opções)
+    response = flask_app.json.response(payload)
+    return status, response.get_data(), [('content-type', response.mimetype)]
+
+# Mesmo cache e ETag de cached_user_response
+async def cached(request, session, produce):
+    cache = flask_module.response_cache
+    cache_key = cache.key_for(session['user_id'], flask_module.cache_query_key(request.path, request.args))
+    entry = cache.get(cache_key)
+
+    if entry is None:
+        status, body, headers = await produce()
+        if status != 200:
+            return status, body, headers
+        entry = flask_module.response_cache_entry(body.decode('utf-8'), 'application/json')
+        cache.set(cache_key, entry)
+
+    headers = [('etag', quote_etag(entry['etag'])), ('cache-control', 'private, no-cache')]
+    if parse_etags(request.headers.get('if-none-match')).contains(entry['etag']):
+        return 304, b'', headers
+    return 200, entry['body'].encode('utf-8'), [('content-type', entry['mimetype']), *headers]
+
+
+# Rotas nativas. Devolver None passa a requisição para o app Flask.
+
+async def calculate_emissions(request, session):
+    if flask_module.WRITE_BEHIND_ENABLED:
+        return None
+    if request.headers.get('content-type', '').split(';')[0].strip() != 'application/json':
+        return None
+    try:
+        data = json.loads(request.body)
+    except ValueError:
+        return None
+
+    # Mesmo controle de admissão da rota Flask; a espera na fila fica numa
+    # thread para não parar o event loop
+    admission = flask_module.admission
+    key = f"user:{session['user_id']}"
+    token = None
+    try:
+        ticket = admission.enter(key)
+        if ticket is not None:
+            await asyncio.to_thread(admission.wait, ticket, key)
+        if admission.shared is not None:
+            token = await asyncio.to_thread(admission.acquire_shared, key)
+    except AdmissionRejected as rejection:
+        payload, status, headers = flask_module.admission_rejection(rejection)
+        status, body, response_headers = json_response(payload, status)
+        return status, body, [*response_headers, *((name.lower(), value) for name, value in headers.items())]
+    try:
+        return await _calculate(request, session, data)
+    finally:
+        admission.release(key, token)
+
+async def _calculate(request, session, data):
+    try:
+        if not data:
+            return json_response({'error': 'Dados JSON inválidos'}, 400)
+
+        params, error = flask_module.validate_activity(data)
+        if error:
+            return json_response({'error': error}, 400)
+
+        started = time.perf_counter()
+        result = flask_module.calculator.calculate_emissions(**params)
+        _observe_phase('compute', time.perf_counter() - started)
+
+        pinned = pin_to_primary(session)
+        try:
+            await db.insert_emissions(session['user_id'], [result])
+        except StorageUnavailableError:
+            return json_response({'error': 'Erro de conexão com o banco'}, 500)
+        flask_module.response_cache.invalidate_user(session['user_id'])
+
+        status, body, headers = json_response({'success': True, 'data': result})
+        if pinned:
+            headers.append(('set-cookie', session_cookie(session)))
+        return status, body, headers
+
+    except Exception as e:
+        return json_response({'error': str(e)}, 500)
+
+async def get_user_emissions(request, session):
+    async def produce():
+        try:
+            limit, filters, after = flask_module.emissions_page_args(request.args)
+        except (ValueError, TypeError, binascii.Error):
+            return json_response({'error': 'Parâmetros de consulta inválidos'}, 400)
+        try:
+            emissions = await db.list_emissions(
+                session['user_id'], filters, limit + 1, after, replica=read_from_replica(session))
+        except StorageUnavailableError:
+            return json_response({'error': 'Erro de conexão com o banco'}, 500)
+        return json_response(flask_module.emissions_page(emissions, limit))
+
+    try:
+        return await cached(request, session, produce)
+    except Exception as e:
+        print(f"Erro ao buscar emissões: {e}")
+        return json_response({'error': 'Erro ao buscar emissões'}, 500)
+
+async def get_emissions_summary(request, session):
+    async def produce():
+        try:
+            rollups = await db.rollup_summary(session['user_id'], replica=read_from_replica(session))
+        except StorageUnavailableError:
+            return json_response({'error': 'Erro de conexão com o banco'}, 500)
+        return json_response(flask_module.summary_payload(rollups))
+
+    try:
+        return await cached(request, session, produce)
+    except Exception as e:
+        print(f"Erro ao buscar resumo: {e}")
+        return json_response({'error': 'Erro ao buscar resumo'}, 500)
+
+NATIVE_ROUTES = {
+    ('POST', '/api/calculate'): calculate_emissions,
+    ('GET', '/api/emissions/user'): get_user_emissions,
+    ('GET', '/api/emissions/summary'): get_emissions_summary,
+}
+
+
+async def _read_body(receive):
+    chunks = []
+    while True:
+        message = await receive()
+        if message['type'] != 'http.request':
+            break
+        chunks.append(message.get('body', b''))
+        if not message.get('more_body'):
+            break
+    return b''.join(chunks)
+
+# Corpo das rotas do Flask: lido do receive em partes, pela thread do WSGI,
+# conforme o Flask consome (um upload de 50MB na importação não vira um
+# BytesIO inteiro antes de rotear)
+class ReceiveStream(io.RawIOBase):
+    def __init__(self, receive, loop):
+        self.receive = receive
+        self.loop = loop
+        self.pending = memoryview(b'')
+        self.done = False
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        while not self.pending and not self.done:
+            message = asyncio.run_coroutine_threadsafe(self.receive(), self.loop).result()
+            if message['type'] != 'http.request':
+                self.done = True
+                break
+            self.pending = memoryview(message.get('body', b''))
+            self.done = not message.get('more_body')
+        size = min(len(buffer), len(self.pending))
+        buffer[:size] = self.pending[:size]
+        self.pending = self.pending[size:]
+        return size
+
+def _environ(scope, body):
+    server_name, server_port = scope.get('server') or ('localhost', 80)
+    environ = {
+        'REQUEST_METHOD': scope['method'],
+        'SCRIPT_NAME': scope.get('root_path', '').encode('utf-8').decode('latin-1'),
+        'PATH_INFO': scope['path'].encode('utf-8').decode('latin-1'),
+        'QUERY_STRING': scope.get('query_string', b'').decode('latin-1'),
+        'SERVER_NAME': server_name,
+        'SERVER_PORT': str(server_port),
+        'SERVER_PROTOCOL': f"HTTP/{scope.get('http_version', '1.1')}",
+        'REMOTE_ADDR': (scope.get('client') or ('', 0))[0],
+        'wsgi.version': (1, 0),
+        'wsgi.url_scheme': scope.get('scheme', 'http'),
+        'wsgi.input': io.BytesIO(body) if isinstance(body, bytes) else body,
+        'wsgi.input_terminated': True,
+        'wsgi.errors': sys.stderr,
+        'wsgi.multithread': True,
+        'wsgi.multiprocess': True,
+        'wsgi.run_once': False,
+    }
+    for header, value in scope.get('headers', []):
+        header = header.decode('latin-1')
+        value = value.decode('latin-1')
+        name = header.upper().replace('-', '_')
+        if name not in ('CONTENT_TYPE', 'CONTENT_LENGTH'):
+            name = f'HTTP_{name}'
+        environ[name] = _join_header(header, environ[name], value) if name in environ else value
+    return environ
+
+# Rotas do Flask rodam num pool de threads (não numa thread só, como no
+# WsgiToAsgi do asgiref); o corpo é repassado em partes, então a exportação
+# continua em streaming
+_wsgi_executor = ThreadPoolExecutor(max_workers=ASGI_WSGI_THREADS, thread_name_prefix='wsgi')
+
+async def wsgi(scope, body, send):
+    # body: bytes já lidos (rota nativa que devolveu ao Flask) ou o receive
+    loop = asyncio.get_running_loop()
+    if not isinstance(body, bytes):
+        body = io.BufferedReader(ReceiveStream(body, loop))
+
+    def emit(message):
+        asyncio.run_coroutine_threadsafe(send(message), loop).result()
+
+    def run():
+        response = {}
+
+        def start_response(status, headers, exc_info=None):
+            response['status'] = int(status.split(' ', 1)[0])
+            response['headers'] = [(name.lower().encode('latin-1'), value.encode('latin-1')) for name, value in headers]
+
+        def start():
+            emit({'type': 'http.response.start', 'status': response['status'], 'headers': response['headers']})
+
+        result = flask_app(_environ(scope, body), start_response)
+        try:
+            started = False
+            for chunk in result:
+                if not started:
+                    start()
+                    started = True
+                if chunk:
+                    emit({'type': 'http.response.body', 'body': chunk, 'more_body': True})
+            if not started:
+                start()
+            emit({'type': 'http.response.body', 'body': b''})
+        finally:
+            if hasattr(result, 'close'):
+                result.close()
+
+    await loop.run_in_executor(_wsgi_executor, run)
+
+def _cors_headers(request):
+    # Como o flask-cors com as opções padrão: ecoa a origem
+    origin = request.headers.get('origin')
+    if not origin:
+        return []
+    return [('access-control-allow-origin', origin), ('vary', 'Origin')]
+
+async def _lifespan(receive, send):
+    while True:
+        message = await receive()
+        if message['type'] == 'lifespan.startup':
+            await send({'type': 'lifespan.startup.complete'})
+        elif message['type'] == 'lifespan.shutdown':
+            if db is not None:
+                await db.close()
+            _wsgi_executor.shutdown(wait=False)
+            await send({'type': 'lifespan.shutdown.complete'})
+            return
+
+async def app(scope, receive, send):
+    if scope['type'] == 'lifespan':
+        return await _lifespan(receive, send)
+
+    handler = NATIVE_ROUTES.get((scope.get('method'), scope.get('path'))) if db is not None else None
+    if handler is None:
+        return await wsgi(scope, receive, send)
+
+    body = await _read_body(receive)
+
+    started = time.perf_counter()
+    timer = RequestTimer() if flask_module.metrics.should_sample() else None
+    _request_timer.set(timer)
+
+    request = Request(scope, body)
+    session = load_session(request)
+
+    response = None
+    if 'user_id' in session:
+        if not flask_module._DB_INITIALIZED:
+            await asyncio.to_thread(flask_module.init_db)
+        response = await handler(request, session)
+    if response is None:
+        return await wsgi(scope, body, send)
+
+    status, content, headers = response
+    headers = [*headers, *_cors_headers(request), ('content-length', str(len(content)))]
+
+    total = time.perf_counter() - started
+    if flask_module.metrics.enabled:
+        flask_module.metrics.observe_request(request.path, request.method, status, total)
+        if timer is not None:
+            flask_module.metrics.observe_phases(request.path, timer.phases)
+            headers.append(('server-timing', timer.server_timing(total)))
+
+    await send({
+        'type': 'http.response.start',
+        'status': status,
+        'headers': [(name.encode('latin-1'), value.encode('latin-1')) for name, value in headers]
+    })
+    await send({'type': 'http.response.body', 'body': content})
@@ -0,0 +1,182 @@
+import gzip
+import hashlib
+import json
+import os
+import posixpath
+import re
+import shutil
+
+# Pipeline dos arquivos estáticos: cada arquivo de static/ é copiado para
+# static/dist/ com o hash do conteúdo no nome (cache imutável), os textos
+# ganham versões .gz/.br pré-comprimidas e as imagens uma variante WebP
+# (limitada a max_width). O manifest.json liga o caminho original ao gerado.
+#
+# brotli e Pillow são opcionais: sem eles o build só pula .br e WebP.
+
+DIST_DIR = 'dist'
+MANIFEST_NAME = 'manifest.json'
+
+COMPRESSIBLE = {'.css', '.js', '.svg', '.json', '.txt', '.html', '.map'}
+RASTER_IMAGES = {'.png', '.jpg', '.jpeg'}
+
+CSS_URL = re.compile(r'''url\(\s*(['"]?)([^'")]+)\1\s*\)''')
+
+
+def _hashed_name(relative_path, content):
+    directory, filename = posixpath.split(relative_path)
+    stem, extension = posixpath.splitext(filename)
+    stem = re.sub(r'\s+', '-', stem)
+    digest = hashlib.sha256(content).hexdigest()[:10]
+    return posixpath.join(directory, f'{stem}.{digest}{extension}')
+
+
+def _write(output_dir, relative_path, content):
+    path = os.path.join(output_dir, *relative_path.split('/'))
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'wb') as f:
+        f.write(content)
+    return path
+
+
+# Reescreve url(...) relativos do CSS para os nomes gerados
+def _rewrite_css(relative_path, content, files):
+    source_dir = posixpath.dirname(relative_path)
+
+    def replace(match):
+        quote, url = match.groups()
+        if url.startswith(('data:', 'http:', 'https:', '//', '/', '#')):
+            return match.group(0)
+        path = url.partition('?')[0]
+        target = posixpath.normpath(posixpath.join(source_dir, path))
+        if target not in files:
+            return match.group(0)
+        # O nome gerado fica no mesmo diretório do original
+        hashed = posixpath.relpath(files[target]['file'], source_dir or '.')
+        return f'url({quote}{hashed}{quote})'
+
+    return CSS_URL.sub(replace, content.decode('utf-8')).encode('utf-8')
+
+
+def _compress(output_dir, hashed_path, content, entry):
+    if posixpath.splitext(hashed_path)[1].lower() not in COMPRESSIBLE:
+        return
+
+    # mtime=0 deixa o .gz idêntico entre builds do mesmo conteúdo
+    _write(output_dir, hashed_path + '.gz', gzip.compress(content, compresslevel=9, mtime=0))
+    entry['encodings'] = ['gzip']
+    try:
+        import brotli
+    except ImportError:
+        return
+    _write(output_dir, hashed_path + '.br', brotli.compress(content, quality=11))
+    entry['encodings'].append('br')
+
+
+def _webp(output_dir, hashed_path, source_path, entry, max_width):
+    try:
+        from PIL import Image
+    except ImportError:
+        return
+
+    with Image.open(source_path) as image:
+        if image.width > max_width:
+            height = round(image.height * max_width / image.width)
+            image = image.resize((max_width, height), Image.LANCZOS)
+        webp_path = posixpath.splitext(hashed_path)[0] + '.webp'
+        path = os.path.join(output_dir, *webp_path.split('/'))
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        image.save(path, 'WEBP', quality=80, method=6)
+        entry['webp'] = webp_path
+        entry['width'] = image.width
+
+
+def _sources(static_dir):
+    for root, dirs, filenames in os.walk(static_dir):
+        dirs[:] = sorted(d for d in dirs if not (root == static_dir and d == DIST_DIR))
+        for filename in sorted(filenames):
+            if filename.startswith('.'):
+                continue
+            path = os.path.join(root, filename)
+            yield os.path.relpath(path, static_dir).replace(os.sep, '/'), path
+
+
+# Gera static/dist do zero e devolve o manifesto. O CSS fica por último
+# para já encontrar os nomes finais das imagens que referencia.
+def build_assets(static_dir, max_width=1920):
+    output_dir = os.path.join(static_dir, DIST_DIR)
+    if os.path.isdir(output_dir):
+        shutil.rmtree(output_dir)
+    os.makedirs(output_dir)
+
+    sources = sorted(_sources(static_dir), key=lambda item: (item[0].endswith('.css'), item[0]))
+    files = {}
+    for relative_path, source_path in sources:
+        with open(source_path, 'rb') as f:
+            content = f.read()
+        extension = posixpath.splitext(relative_path)[1].lower()
+        if extension == '.css':
+            content = _rewrite_css(relative_path, content, files)
+
+        hashed_path = _hashed_name(relative_path, content)
+        _write(output_dir, hashed_path, content)
+        entry = {'file': hashed_path, 'size': len(content)}
+        _compress(output_dir, hashed_path, content, entry)
+        if extension in RASTER_IMAGES:
+            _webp(output_dir, hashed_path, source_path, entry, max_width)
+        files[relative_path] = entry
+
+    manifest = {'files': files, 'fingerprint': source_fingerprint(static_dir)}
+    with open(os.path.join(output_dir, MANIFEST_NAME), 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2, sort_keys=True)
+    return manifest
+
+
+# Hash de todos os arquivos de origem, para saber se o build está em dia
+def source_fingerprint(static_dir):
+    digest = hashlib.sha256()
+    for relative_path, path in _sources(static_dir):
+        digest.update(relative_path.encode('utf-8'))
+        with open(path, 'rb') as f:
+            digest.update(hashlib.sha256(f.read()).digest())
+    return digest.hexdigest()
+
+
+# Leitura do manifesto em tempo de execução. Sem build (desenvolvimento),
+# tudo continua apontando para os arquivos originais.
+class AssetManifest:
+    def __init__(self, static_dir):
+        self.static_dir = static_dir
+        self.path = os.path.join(static_dir, DIST_DIR, MANIFEST_NAME)
+        self.files = {}
+        self._by_hashed = {}
+        self.reload()
+
+    def reload(self):
+        try:
+            with open(self.path, encoding='utf-8') as f:
+                self.files = json.load(f).get('files', {})
+        except (OSError, ValueError):
+            self.files = {}
+        self._by_hashed = {entry['file']: entry for entry in self.files.values()}
+
+    def resolve(self, filename):
+        entry = self.files.get(filename)
+        return f'{DIST_DIR}/{entry["file"]}' if entry else filename
+
+    def variant(self, filename, kind):
+        entry = self.files.get(filename)
+        if entry and entry.get(kind):
+            return f'{DIST_DIR}/{entry[kind]}'
+        return None
+
+    def encodings(self, hashed_path):
+        entry = self._by_hashed.get(hashed_path)
+        return entry.get('encodings', []) if entry else []
+
+    def is_current(self):
+        try:
+            with open(self.path, encoding='utf-8') as f:
+                fingerprint = json.load(f).get('fingerprint')
+        except (OSError, ValueError):
+            return False
+        return fingerprint == source_fingerprint(self.static_dir)
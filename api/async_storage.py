@@ -0,0 +1,179 @@
+import asyncio
+import ssl
+import time
+
+from storage import (
+    EMISSION_INSERT_SQL, MEMBER_ORGS_SQL, ROLLUP_SUMMARY_SQL, StorageError, StorageUnavailableError,
+    _emission_row, org_rollup_rows, rollup_rows
+)
+
+
+# Acesso assíncrono ao MySQL para o modo ASGI (asgi.py), com aiomysql. As
+# consultas, o cálculo do rollup e a configuração (credenciais, certificado
+# CA) vêm do MySQLStorage síncrono, então os dois modos gravam e leem
+# exatamente as mesmas linhas. Os pools (primário e um por réplica) são
+# criados no primeiro uso, dentro do event loop do worker. As réplicas são
+# as mesmas de storage.replicas, com a mesma verificação de saúde e atraso.
+class AsyncMySQLStorage:
+    def __init__(self, storage, size=10, max_lifetime=3600):
+        self.storage = storage
+        self.size = size
+        self.max_lifetime = max_lifetime
+        # observer(fase, segundos), como em SQLStorage
+        self.observer = None
+        self._pools = {}
+        self._pool_lock = asyncio.Lock()
+        self._next_replica = 0
+
+    def _connect_params(self, config=None):
+        params = self.storage.connection_params(config=config)
+        options = {
+            'host': params.get('host'),
+            'port': params.get('port', 3306),
+            'user': params.get('user'),
+            'password': params.get('password') or '',
+            'db': params.get('database'),
+            'connect_timeout': params.get('connect_timeout', 10),
+            'autocommit': False
+        }
+        if params.get('ssl_ca'):
+            options['ssl'] = ssl.create_default_context(cafile=params['ssl_ca'])
+        return options
+
+    # replica=None é o primário
+    async def _get_pool(self, replica=None):
+        key = replica.name if replica is not None else None
+        if key not in self._pools:
+            async with self._pool_lock:
+                if key not in self._pools:
+                    try:
+                        import aiomysql
+                    except ImportError as e:
+                        raise StorageError('Modo ASGI requer o pacote aiomysql') from e
+                    self._pools[key] = await aiomysql.create_pool(
+                        minsize=0,
+                        maxsize=self.size,
+                        pool_recycle=self.max_lifetime,
+                        **self._connect_params(replica.config if replica is not None else None)
+                    )
+        return self._pools[key]
+
+    def _observe(self, phase, started):
+        if self.observer is not None:
+            self.observer(phase, time.perf_counter() - started)
+
+    async def _acquire(self):
+        started = time.perf_counter()
+        try:
+            pool = await self._get_pool()
+            conn = await pool.acquire()
+        except StorageError:
+            raise
+        except Exception as e:
+            print(f"❌ Erro ao conectar com o banco (mysql async): {e}")
+            raise StorageUnavailableError(str(e)) from e
+        self._observe('db_connect', started)
+        return pool, conn
+
+    # Como SQLStorage._acquire_for: réplicas em rodízio, pulando as fora do
+    # ar ou atrasadas, e o primário quando nenhuma serve. A verificação de
+    # atraso usa o driver síncrono, então roda numa thread
+    async def _acquire_for(self, replica=False):
+        replicas = self.storage.replicas
+        if replica and replicas:
+            start = self._next_replica
+            self._next_replica = (start + 1) % len(replicas)
+            for offset in range(len(replicas)):
+                candidate = replicas[(start + offset) % len(replicas)]
+                usable = await asyncio.to_thread(candidate.check) if candidate.check_due() else candidate.healthy
+                if not usable:
+                    continue
+                started = time.perf_counter()
+                try:
+                    pool = await self._get_pool(candidate)
+                    conn = await pool.acquire()
+                except StorageError:
+                    raise
+                except Exception as e:
+                    print(f"⚠️ Réplica {candidate.name} indisponível, usando o primário: {e}")
+                    candidate.mark_failed(e)
+                    continue
+                self._observe('db_connect', started)
+                return pool, conn
+        return await self._acquire()
+
+    # Conexão devolvida ao pool no fim; com erro ela é fechada (e o pool a
+    # descarta), como o checked_out do pool síncrono
+    async def _run(self, work, replica=False):
+        pool, conn = await self._acquire_for(replica)
+        try:
+            result = await work(conn)
+        except BaseException:
+            conn.close()
+            raise
+        finally:
+            pool.release(conn)
+        return result
+
+    async def _execute(self, cursor, query, params=()):
+        started = time.perf_counter()
+        await cursor.execute(query, tuple(params))
+        self._observe('db_query', started)
+
+    async def _executemany(self, cursor, query, rows):
+        if rows:
+            started = time.perf_counter()
+            await cursor.executemany(query, rows)
+            self._observe('db_query', started)
+
+    @staticmethod
+    def _dicts(cursor, rows):
+        columns = [description[0] for description in cursor.description]
+        return [dict(zip(columns, row)) for row in rows]
+
+    async def _fetch(self, query, params, replica=False):
+        async def work(conn):
+            async with conn.cursor() as cursor:
+                await self._execute(cursor, query, params)
+                rows = await cursor.fetchall()
+                await conn.commit()
+                return self._dicts(cursor, rows)
+        return await self._run(work, replica)
+
+    async def insert_emissions(self, user_id, results):
+        chunk_size = self.storage.insert_chunk
+
+        async def work(conn):
+            async with conn.cursor() as cursor:
+                for start in range(0, len(results), chunk_size):
+                    chunk = results[start:start + chunk_size]
+                    await self._executemany(cursor, EMISSION_INSERT_SQL, [_emission_row(user_id, result) for result in chunk])
+                rows = rollup_rows(user_id, results)
+                await self._executemany(cursor, self.storage.rollup_upsert_sql, rows)
+                # Organizações lidas depois do upsert, como em SQLStorage._update_org_rollups
+                await self._execute(cursor, MEMBER_ORGS_SQL, (user_id,))
+                org_ids = [row[0] for row in await cursor.fetchall()]
+                await self._executemany(
+                    cursor, self.storage.org_rollup_upsert_sql, org_rollup_rows(org_ids, [row[1:] for row in rows]))
+            await conn.commit()
+        await self._run(work)
+
+    async def list_emissions(self, user_id, filters, limit, after=None, replica=False):
+        query, params = self.storage.list_query(user_id, filters, limit, after)
+        return await self._fetch(query, params, replica)
+
+    async def rollup_summary(self, user_id, replica=False):
+        return await self._fetch(ROLLUP_SUMMARY_SQL, (user_id,), replica)
+
+    async def close(self):
+        pools = list(self._pools.values())
+        self._pools = {}
+        for pool in pools:
+            pool.close()
+            await pool.wait_closed()
+
+    def stats(self):
+        pool = self._pools.get(None)
+        if pool is None:
+            return {'size': self.size, 'open': 0, 'idle': 0}
+        return {'size': self.size, 'open': pool.size, 'idle': pool.freesize}
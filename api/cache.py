@@ -0,0 +1,135 @@
+import json
+import threading
+import time
+from collections import OrderedDict
+
+
+# Backend em memória: LRU limitado com expiração por entrada
+#
+# Vale só para o processo atual: num deploy com vários workers ou instâncias
+# a invalidação feita por um não chega aos outros, que podem servir a versão
+# anterior (200 ou 304) até o TTL. Para mais de um processo use o Redis.
+class MemoryCacheBackend:
+    def __init__(self, max_entries=1024, max_counters=None):
+        self.max_entries = max(1, int(max_entries))
+        self.max_counters = max(1, int(max_counters or 4 * self.max_entries))
+        self._data = OrderedDict()
+        # Gerações num LRU próprio. Cada incr recebe um valor novo de uma
+        # sequência global e uma chave despejada passa a valer `_floor` (o
+        # maior valor já despejado), então a geração de um usuário nunca
+        # volta a um valor antigo com entradas desatualizadas
+        self._counters = OrderedDict()
+        self._sequence = 0
+        self._floor = 0
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return None
+            value, expires_at = item
+            if expires_at is not None and expires_at <= time.monotonic():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value, ttl=None):
+        expires_at = time.monotonic() + ttl if ttl else None
+        with self._lock:
+            self._data[key] = (value, expires_at)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def counter(self, key):
+        with self._lock:
+            value = self._counters.get(key)
+            if value is None:
+                return self._floor
+            self._counters.move_to_end(key)
+            return value
+
+    def incr(self, key):
+        with self._lock:
+            self._sequence += 1
+            self._counters[key] = self._sequence
+            self._counters.move_to_end(key)
+            while len(self._counters) > self.max_counters:
+                _, evicted = self._counters.popitem(last=False)
+                self._floor = max(self._floor, evicted)
+            return self._sequence
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+
+# Backend Redis opcional, compartilhado entre workers e instâncias
+class RedisCacheBackend:
+    def __init__(self, url, prefix='ecotrace:'):
+        import redis
+        self._client = redis.Redis.from_url(url)
+        self.prefix = prefix
+
+    def get(self, key):
+        raw = self._client.get(self.prefix + key)
+        return json.loads(raw) if raw is not None else None
+
+    def set(self, key, value, ttl=None):
+        self._client.set(self.prefix + key, json.dumps(value), ex=ttl or None)
+
+    def counter(self, key):
+        return int(self._client.get(self.prefix + key) or 0)
+
+    def incr(self, key):
+        return self._client.incr(self.prefix + key)
+
+    def clear(self):
+        for key in self._client.scan_iter(self.prefix + '*'):
+            self._client.delete(key)
+
+
+# Cache de respostas por usuário. Cada usuário tem uma geração que entra na
+# chave; as rotas de escrita incrementam a geração e as entradas antigas
+# deixam de ser encontradas (e saem pelo LRU/TTL).
+class UserResponseCache:
+    def __init__(self, backend, ttl=30, enabled=True):
+        self.backend = backend
+        self.ttl = ttl
+        self.enabled = enabled
+        self.hits = 0
+        self.misses = 0
+
+    def _generation(self, user_id):
+        return self.backend.counter(f'gen:{user_id}')
+
+    def key_for(self, user_id, query_key):
+        return f'resp:{user_id}:{self._generation(user_id)}:{query_key}'
+
+    # A chave é calculada uma vez antes de executar a consulta e reutilizada
+    # no set: se uma escrita acontecer no meio, o resultado fica gravado na
+    # geração antiga e nunca é servido.
+    def get(self, key):
+        if not self.enabled:
+            return None
+        entry = self.backend.get(key)
+        if entry is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return entry
+
+    def set(self, key, entry):
+        if self.enabled:
+            self.backend.set(key, entry, self.ttl)
+
+    def invalidate_user(self, user_id):
+        self.backend.incr(f'gen:{user_id}')
+
+    def stats(self):
+        return {'enabled': self.enabled, 'hits': self.hits, 'misses': self.misses, 'ttl': self.ttl}
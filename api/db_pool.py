@@ -0,0 +1,217 @@
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+
+class PoolError(Exception):
+    pass
+
+
+class PoolExhaustedError(PoolError):
+    pass
+
+
+# Pool de conexões reutilizáveis
+#
+# Não usa threads em segundo plano: a limpeza das conexões ociosas acontece
+# no checkout/devolução, o que funciona tanto num worker gunicorn de longa
+# duração quanto no modelo de funções da Vercel (processo congelado entre
+# invocações).
+class ConnectionPool:
+    def __init__(self, factory, size=5, max_idle=300, max_lifetime=3600,
+                 checkout_timeout=10, ping_interval=30):
+        self._factory = factory
+        self.size = max(1, int(size))
+        self.max_idle = max_idle
+        self.max_lifetime = max_lifetime
+        self.checkout_timeout = checkout_timeout
+        self.ping_interval = ping_interval
+
+        self._lock = threading.Condition()
+        self._idle = []  # [(conn, criada_em, ultimo_uso)]
+        self._created_at = {}
+        self._in_use = 0
+        self._pid = os.getpid()
+
+        self.created = 0
+        self.reused = 0
+        self.discarded = 0
+
+    def _reset_after_fork(self):
+        # Conexões herdadas de um processo pai (gunicorn --preload) não podem
+        # ser compartilhadas; descartamos sem fechar o socket do pai.
+        if self._pid != os.getpid():
+            self._pid = os.getpid()
+            self._idle = []
+            self._created_at = {}
+            self._in_use = 0
+
+    # Tira do pool as conexões expiradas e as devolve para serem fechadas
+    # fora do lock (fechar faz I/O de rede)
+    def _evict_idle(self, now):
+        alive = []
+        expired = []
+        for conn, created, last_used in self._idle:
+            stale = (self.max_idle and now - last_used > self.max_idle) or \
+                (self.max_lifetime and now - created > self.max_lifetime)
+            if stale:
+                self._forget(conn)
+                expired.append(conn)
+            else:
+                alive.append((conn, created, last_used))
+        self._idle = alive
+        return expired
+
+    def _forget(self, conn):
+        self._created_at.pop(id(conn), None)
+        self.discarded += 1
+
+    @staticmethod
+    def _close(conns):
+        for conn in conns:
+            try:
+                conn.close()
+            except Exception:
+                pass
+
+    def _is_healthy(self, conn, last_used, now):
+        if now - last_used < self.ping_interval:
+            return True
+        try:
+            if hasattr(conn, 'ping'):
+                conn.ping(reconnect=False)
+            elif hasattr(conn, 'is_connected'):
+                return conn.is_connected()
+            return True
+        except Exception:
+            return False
+
+    # O lock só protege a contabilidade: ping, rollback, close e a abertura
+    # de conexões acontecem fora dele, para que um round trip lento não
+    # serialize os checkouts e devoluções das outras threads.
+    def acquire(self):
+        deadline = time.monotonic() + self.checkout_timeout
+        while True:
+            candidate = None
+            expired = []
+            try:
+                with self._lock:
+                    self._reset_after_fork()
+                    while True:
+                        now = time.monotonic()
+                        expired.extend(self._evict_idle(now))
+
+                        # A vaga fica reservada enquanto a conexão é testada
+                        if self._idle:
+                            candidate = self._idle.pop()
+                            self._in_use += 1
+                            break
+
+                        if self._in_use + len(self._idle) < self.size:
+                            self._in_use += 1
+                            break
+
+                        remaining = deadline - now
+                        if remaining <= 0:
+                            raise PoolExhaustedError(
+                                f'Nenhuma conexão disponível após {self.checkout_timeout}s')
+                        self._lock.wait(remaining)
+            finally:
+                self._close(expired)
+
+            if candidate is None:
+                break
+
+            conn, created, last_used = candidate
+            if self._is_healthy(conn, last_used, time.monotonic()):
+                with self._lock:
+                    self.reused += 1
+                return conn
+
+            with self._lock:
+                self._forget(conn)
+                self._in_use -= 1
+                self._lock.notify()
+            self._close([conn])
+
+        # A conexão é aberta fora do lock para não serializar handshakes
+        try:
+            conn = self._factory()
+        except Exception:
+            with self._lock:
+                self._in_use -= 1
+                self._lock.notify()
+            raise
+
+        with self._lock:
+            self._created_at[id(conn)] = time.monotonic()
+            self.created += 1
+        return conn
+
+    def release(self, conn, discard=False):
+        if self._pid != os.getpid():
+            return
+
+        if not discard:
+            try:
+                if getattr(conn, 'in_transaction', False):
+                    conn.rollback()
+            except Exception:
+                discard = True
+
+        with self._lock:
+            if self._pid != os.getpid():
+                return
+            self._in_use = max(0, self._in_use - 1)
+            created = self._created_at.get(id(conn), time.monotonic())
+
+            close = discard or len(self._idle) >= self.size
+            if close:
+                self._forget(conn)
+            else:
+                self._idle.append((conn, created, time.monotonic()))
+            self._lock.notify()
+
+        if close:
+            self._close([conn])
+
+    @contextmanager
+    def checked_out(self, conn):
+        try:
+            yield conn
+        except Exception:
+            broken = False
+            try:
+                conn.rollback()
+            except Exception:
+                broken = True
+            self.release(conn, discard=broken)
+            raise
+        else:
+            self.release(conn)
+
+    @contextmanager
+    def connection(self):
+        conn = self.acquire()
+        with self.checked_out(conn):
+            yield conn
+
+    def close_all(self):
+        with self._lock:
+            idle = self._idle
+            self._idle = []
+            for conn, _, _ in idle:
+                self._forget(conn)
+        self._close([conn for conn, _, _ in idle])
+
+    def stats(self):
+        with self._lock:
+            return {
+                'size': self.size,
+                'idle': len(self._idle),
+                'in_use': self._in_use,
+                'created': self.created,
+                'reused': self.reused,
+                'discarded': self.discarded,
+            }
@@ -0,0 +1,162 @@
+import json
+import os
+import threading
+import time
+from types import MappingProxyType
+
+
+class FactorSetError(Exception):
+    pass
+
+
+def _numbers(name, mapping):
+    if not isinstance(mapping, dict):
+        raise FactorSetError(f'{name} deve ser um objeto')
+    for key, value in mapping.items():
+        if not isinstance(value, (int, float)) or isinstance(value, bool):
+            raise FactorSetError(f'{name}.{key} deve ser numérico')
+    return {key: float(value) for key, value in mapping.items()}
+
+
+# Conjunto imutável de fatores de uma versão. Além das tabelas, guarda uma
+# busca pré-compilada (categoria, subcategoria, unidade, escopo) ->
+# (conversão, fator, multiplicador de escopo). Os três valores ficam
+# separados para o cálculo seguir a mesma ordem de multiplicações de
+# sempre e dar resultados idênticos aos já gravados.
+class FactorSet:
+    def __init__(self, version, emission_factors, unit_conversions, scope_multipliers,
+                 default_subcategories=None, category_default_factors=None, unknown_category_factor=1.0):
+        if not version:
+            raise FactorSetError('version é obrigatório')
+        if not isinstance(emission_factors, dict) or not isinstance(unit_conversions, dict):
+            raise FactorSetError('emission_factors e unit_conversions devem ser objetos')
+
+        factors = {category: _numbers(f'emission_factors.{category}', values)
+                   for category, values in emission_factors.items()}
+        conversions = {category: _numbers(f'unit_conversions.{category}', values)
+                       for category, values in unit_conversions.items()}
+        scopes = _numbers('scope_multipliers', scope_multipliers)
+
+        # Fator usado quando a subcategoria não existe
+        defaults = _numbers('category_default_factors', category_default_factors or {})
+        for category, subcategory in (default_subcategories or {}).items():
+            if subcategory not in factors.get(category, {}):
+                raise FactorSetError(f'default_subcategories.{category}: {subcategory} não existe')
+            defaults[category] = factors[category][subcategory]
+
+        self.version = str(version)
+        self.emission_factors = MappingProxyType({k: MappingProxyType(v) for k, v in factors.items()})
+        self.unit_conversions = MappingProxyType({k: MappingProxyType(v) for k, v in conversions.items()})
+        self.scope_multipliers = MappingProxyType(scopes)
+        self.default_subcategories = MappingProxyType(dict(default_subcategories or {}))
+        self.category_default_factors = MappingProxyType(defaults)
+        self.unknown_category_factor = float(unknown_category_factor)
+
+        compiled = {}
+        for category, subcategories in factors.items():
+            for subcategory, factor in subcategories.items():
+                for unit, conversion in conversions.get(category, {}).items():
+                    for scope, multiplier in scopes.items():
+                        compiled[(category, subcategory, unit, scope)] = (conversion, factor, multiplier)
+        self._compiled = compiled
+
+    def conversion(self, category, unit):
+        return self.unit_conversions.get(category, {}).get(unit, 1.0)
+
+    def factor(self, category, subcategory):
+        factor = self.emission_factors.get(category, {}).get(subcategory)
+        if factor is None:
+            factor = self.category_default_factors.get(category, self.unknown_category_factor)
+        return factor
+
+    def scope_multiplier(self, scope):
+        return self.scope_multipliers.get(scope, 1.0)
+
+    def lookup(self, category, subcategory, unit, scope):
+        entry = self._compiled.get((category, subcategory, unit, scope))
+        if entry is None:
+            entry = (self.conversion(category, unit), self.factor(category, subcategory), self.scope_multiplier(scope))
+        return entry
+
+    @classmethod
+    def from_dict(cls, data):
+        if not isinstance(data, dict):
+            raise FactorSetError('Arquivo de fatores inválido')
+        try:
+            return cls(
+                data['version'],
+                data['emission_factors'],
+                data['unit_conversions'],
+                data['scope_multipliers'],
+                data.get('default_subcategories'),
+                data.get('category_default_factors'),
+                data.get('unknown_category_factor', 1.0)
+            )
+        except KeyError as e:
+            raise FactorSetError(f'Campo obrigatório ausente: {e.args[0]}')
+
+    def to_dict(self):
+        return {
+            'version': self.version,
+            'emission_factors': {k: dict(v) for k, v in self.emission_factors.items()},
+            'unit_conversions': {k: dict(v) for k, v in self.unit_conversions.items()},
+            'scope_multipliers': dict(self.scope_multipliers),
+            'default_subcategories': dict(self.default_subcategories),
+            'category_default_factors': dict(self.category_default_factors),
+            'unknown_category_factor': self.unknown_category_factor
+        }
+
+
+# Fatores carregados de um arquivo JSON versionado, com recarga a quente:
+# no máximo a cada reload_interval segundos o mtime do arquivo é conferido e,
+# se a versão mudou, o novo conjunto substitui o atual de uma vez. Um
+# arquivo inválido é ignorado e o conjunto em uso continua valendo.
+class FactorRegistry:
+    def __init__(self, path, reload_interval=30.0):
+        self.path = path
+        self.reload_interval = reload_interval
+        self.reloads = 0
+        self.last_error = None
+        self._lock = threading.Lock()
+        self._mtime = os.stat(path).st_mtime_ns
+        self._current = self._read()
+        self._checked_at = time.monotonic()
+
+    def _read(self):
+        with open(self.path, encoding='utf-8') as f:
+            return FactorSet.from_dict(json.load(f))
+
+    def current(self):
+        if self.reload_interval is not None and time.monotonic() - self._checked_at >= self.reload_interval:
+            self.reload()
+        return self._current
+
+    def reload(self):
+        with self._lock:
+            self._checked_at = time.monotonic()
+            try:
+                mtime = os.stat(self.path).st_mtime_ns
+            except OSError as e:
+                self.last_error = str(e)
+                return False
+            if mtime == self._mtime:
+                return False
+            self._mtime = mtime
+
+            try:
+                factor_set = self._read()
+            except (OSError, ValueError, FactorSetError) as e:
+                self.last_error = str(e)
+                print(f"⚠️ Arquivo de fatores inválido, mantendo a versão {self._current.version}: {e}")
+                return False
+
+            self.last_error = None
+            if factor_set.version == self._current.version:
+                if factor_set.to_dict() != self._current.to_dict():
+                    print(f"⚠️ Fatores alterados sem trocar a versão ({factor_set.version}); alteração ignorada")
+                return False
+
+            self._current = factor_set
+            self.reloads += 1
+            print(f"🔄 Fatores de emissão atualizados para a versão {factor_set.version}")
+            return True
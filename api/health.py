@@ -0,0 +1,95 @@
+import os
+import threading
+import time
+
+
+# Prontidão do banco verificada fora do caminho das requisições.
+#
+# Uma thread repete `check()` a cada `interval` segundos e guarda o último
+# resultado. Onde o processo é congelado entre invocações (Vercel) a thread
+# não roda; aí o resultado envelhece e a primeira leitura depois de
+# `stale_after` segundos refaz a verificação — uma por vez, as leituras
+# concorrentes recebem o valor em cache.
+class ReadinessProbe:
+    def __init__(self, check, interval=10.0, stale_after=30.0):
+        self.check = check
+        self.interval = interval
+        self.stale_after = stale_after
+
+        self._lock = threading.Lock()
+        self._refreshing = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        self._pid = None
+
+        self._ready = None
+        self._error = None
+        self._checked_at = None
+        self._checked_monotonic = None
+        self._latency = None
+        self.checks = 0
+        self.failures = 0
+
+    def refresh(self, wait=False):
+        previous = self._checked_monotonic
+        if not self._refreshing.acquire(blocking=wait):
+            return
+        try:
+            # Quem esperou aproveita a verificação que acabou de terminar
+            if wait and self._checked_monotonic != previous:
+                return
+            started = time.perf_counter()
+            try:
+                ready, error = bool(self.check()), None
+            except Exception as e:
+                ready, error = False, str(e)
+            latency = time.perf_counter() - started
+
+            with self._lock:
+                self._ready = ready
+                self._error = error if error or ready else 'Banco indisponível'
+                self._checked_at = time.time()
+                self._checked_monotonic = time.monotonic()
+                self._latency = latency
+                self.checks += 1
+                if not ready:
+                    self.failures += 1
+        finally:
+            self._refreshing.release()
+
+    def _run(self):
+        while not self._stop.is_set():
+            self.refresh()
+            self._stop.wait(self.interval)
+
+    def start(self):
+        # Uma thread por processo (depois do fork do gunicorn)
+        if self._thread is None or self._pid != os.getpid():
+            self._pid = os.getpid()
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name='readiness-probe', daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def status(self):
+        with self._lock:
+            age = None if self._checked_monotonic is None else time.monotonic() - self._checked_monotonic
+        if age is None:
+            # Primeira leitura: espera uma verificação em andamento
+            self.refresh(wait=True)
+        elif age > self.stale_after:
+            self.refresh()
+
+        with self._lock:
+            age = None if self._checked_monotonic is None else time.monotonic() - self._checked_monotonic
+            return {
+                'ready': bool(self._ready),
+                'error': self._error,
+                'checked_at': self._checked_at,
+                'age_seconds': round(age, 3) if age is not None else None,
+                'latency_ms': round(self._latency * 1000, 2) if self._latency is not None else None,
+                'checks': self.checks,
+                'failures': self.failures
+            }
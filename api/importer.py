@@ -0,0 +1,173 @@
+import csv
+import io
+import math
+import os
+from datetime import datetime
+
+
+class ImportFormatError(Exception):
+    pass
+
+
+# Nomes aceitos no cabeçalho (planilhas chegam em inglês ou português)
+COLUMN_ALIASES = {
+    'category': ('category', 'categoria'),
+    'subcategory': ('subcategory', 'subcategoria'),
+    'quantity': ('quantity', 'quantidade', 'qtd'),
+    'unit': ('unit', 'unidade'),
+    'scope': ('scope', 'escopo'),
+    'date': ('date', 'data', 'timestamp', 'activity_at')
+}
+
+REQUIRED_COLUMNS = ('category', 'quantity', 'unit', 'scope')
+
+DATE_FORMATS = ('%d/%m/%Y', '%d/%m/%Y %H:%M', '%d/%m/%Y %H:%M:%S', '%Y-%m-%d')
+
+
+def _header_map(header):
+    lookup = {alias: field for field, aliases in COLUMN_ALIASES.items() for alias in aliases}
+    mapping = {}
+    for index, name in enumerate(header):
+        field = lookup.get(str(name or '').strip().lower())
+        if field and field not in mapping:
+            mapping[field] = index
+
+    missing = [field for field in REQUIRED_COLUMNS if field not in mapping]
+    if missing:
+        raise ImportFormatError(f"Colunas obrigatórias ausentes: {', '.join(missing)}")
+    return mapping
+
+
+def _records(rows, first_row=2):
+    # Linha 1 é o cabeçalho; os números devolvidos são os da planilha
+    header = next(rows, None)
+    if header is None:
+        raise ImportFormatError('Arquivo vazio')
+    mapping = _header_map(header)
+
+    for number, row in enumerate(rows, start=first_row):
+        if not any(str(value).strip() for value in row if value is not None):
+            continue
+        yield number, {
+            field: row[index] if index < len(row) else None
+            for field, index in mapping.items()
+        }
+
+
+def _sniff_delimiter(sample):
+    first_line = sample.splitlines()[0] if sample else ''
+    counts = {delimiter: first_line.count(delimiter) for delimiter in (';', ',', '\t')}
+    delimiter = max(counts, key=counts.get)
+    return delimiter if counts[delimiter] else ','
+
+
+def _csv_rows(path):
+    with open(path, 'rb') as raw:
+        text = io.TextIOWrapper(raw, encoding='utf-8-sig', errors='replace', newline='')
+        delimiter = _sniff_delimiter(text.read(4096))
+        text.seek(0)
+        yield from csv.reader(text, delimiter=delimiter)
+
+
+def _xlsx_rows(path):
+    try:
+        from openpyxl import load_workbook
+    except ImportError:
+        raise ImportFormatError('Arquivos .xlsx exigem o pacote openpyxl; envie CSV')
+
+    # read_only lê a planilha em streaming, sem carregar tudo na memória
+    workbook = load_workbook(path, read_only=True, data_only=True)
+    try:
+        for row in workbook.worksheets[0].iter_rows(values_only=True):
+            yield ['' if value is None else value for value in row]
+    finally:
+        workbook.close()
+
+
+# Linhas (número, {campo: valor}) do arquivo, lidas sob demanda
+def read_records(path, filename=''):
+    extension = os.path.splitext(filename or path)[1].lower()
+    if extension in ('.xlsx', '.xlsm'):
+        return _records(_xlsx_rows(path))
+    if extension == '.xls':
+        raise ImportFormatError('Formato .xls não suportado; salve como .xlsx ou CSV')
+    return _records(_csv_rows(path))
+
+
+# Estimativa do total de linhas para o progresso (sem o cabeçalho). No CSV
+# conta quebras de linha lendo em blocos; no .xlsx usa a dimensão da planilha.
+def estimate_records(path, filename=''):
+    extension = os.path.splitext(filename or path)[1].lower()
+    if extension in ('.xlsx', '.xlsm'):
+        try:
+            from openpyxl import load_workbook
+            workbook = load_workbook(path, read_only=True)
+            try:
+                max_row = workbook.worksheets[0].max_row
+            finally:
+                workbook.close()
+            return max(0, max_row - 1) if max_row else None
+        except Exception:
+            return None
+
+    lines = 0
+    last = b''
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1024 * 1024), b''):
+            lines += block.count(b'\n')
+            last = block
+    if last and not last.endswith(b'\n'):
+        lines += 1
+    return max(0, lines - 1)
+
+
+# Aceita "1234.5", "1.234,5" e "1234,5" (planilhas em pt-BR). NaN e
+# infinito viram ValueError (erro da linha) em vez de chegar ao rollup
+def parse_quantity(value):
+    if isinstance(value, (int, float)):
+        return _finite(float(value))
+    text = str(value or '').strip().replace(' ', '')
+    if ',' in text and '.' in text:
+        # O separador que aparece por último é o decimal
+        if text.rfind(',') > text.rfind('.'):
+            text = text.replace('.', '').replace(',', '.')
+        else:
+            text = text.replace(',', '')
+    elif ',' in text:
+        text = text.replace(',', '.')
+    return _finite(float(text))
+
+
+def _finite(quantity):
+    if not math.isfinite(quantity):
+        raise ValueError(quantity)
+    return quantity
+
+
+def parse_date(value):
+    if value in (None, ''):
+        return None
+    if isinstance(value, datetime):
+        return value
+    text = str(value).strip()
+    try:
+        return datetime.fromisoformat(text.replace('Z', '+00:00')).replace(tzinfo=None)
+    except ValueError:
+        pass
+    for date_format in DATE_FORMATS:
+        try:
+            return datetime.strptime(text, date_format)
+        except ValueError:
+            continue
+    raise ValueError(text)
+
+
+def chunked(iterable, size):
+    chunk = []
+    for item in iterable:
+        chunk.append(item)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
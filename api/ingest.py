@@ -0,0 +1,203 @@
+import fcntl
+import glob
+import json
+import os
+import secrets
+import threading
+
+
+# Diário local somente-anexação (JSON por linha) para gravações adiadas.
+#
+# Cada processo escreve no seu próprio arquivo, protegido por flock durante
+# toda a vida do processo. Arquivos sem dono (processo que caiu) são
+# reivindicados e reprocessados pelo próximo processo que iniciar. O quanto
+# já foi gravado no banco fica em "<arquivo>.offset".
+class IngestJournal:
+    def __init__(self, directory, fsync=True):
+        self.directory = directory
+        self.fsync = fsync
+        os.makedirs(directory, exist_ok=True)
+
+        name = f'journal-{os.getpid()}-{secrets.token_hex(4)}.jsonl'
+        self.path = os.path.join(directory, name)
+        self._file = open(self.path, 'ab')
+        fcntl.flock(self._file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        self._lock = threading.Lock()
+
+    def append(self, records):
+        data = b''.join(
+            json.dumps(record, ensure_ascii=False).encode('utf-8') + b'\n'
+            for record in records
+        )
+        with self._lock:
+            self._file.write(data)
+            self._file.flush()
+            if self.fsync:
+                os.fsync(self._file.fileno())
+
+    def orphans(self):
+        # Arquivos de outros processos cujo lock está livre
+        claimed = []
+        for path in sorted(glob.glob(os.path.join(self.directory, 'journal-*.jsonl'))):
+            if path == self.path:
+                continue
+            handle = open(path, 'ab')
+            try:
+                fcntl.flock(handle.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except OSError:
+                handle.close()
+                continue
+            claimed.append((path, handle))
+        return claimed
+
+    @staticmethod
+    def read_offset(path):
+        try:
+            with open(path + '.offset') as f:
+                return int(f.read().strip() or 0)
+        except (OSError, ValueError):
+            return 0
+
+    @staticmethod
+    def write_offset(path, offset):
+        tmp = path + '.offset.tmp'
+        with open(tmp, 'w') as f:
+            f.write(str(offset))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, path + '.offset')
+
+    # Lê até `limit` registros completos a partir do offset. Uma última
+    # linha sem '\n' é uma escrita interrompida, nunca confirmada ao cliente.
+    @staticmethod
+    def read_records(path, offset, limit):
+        records = []
+        with open(path, 'rb') as f:
+            f.seek(offset)
+            while len(records) < limit:
+                line = f.readline()
+                if not line or not line.endswith(b'\n'):
+                    break
+                offset += len(line)
+                if line.strip():
+                    records.append(json.loads(line))
+        return records, offset
+
+    def reset_if_drained(self, offset):
+        # Zera o offset antes de truncar: se cair no meio, os registros são
+        # reprocessados e descartados pela deduplicação do banco
+        with self._lock:
+            if offset != os.path.getsize(self.path):
+                return False
+            self.write_offset(self.path, 0)
+            self._file.truncate(0)
+            return True
+
+    def close(self):
+        self._file.close()
+
+
+# Fila de gravação adiada: o registro vai para o diário (durável) e o
+# cliente é respondido; uma thread grava os lotes no banco via `sink`.
+# `sink(records)` deve ser idempotente por record['id'] e levantar exceção
+# em caso de falha, para que o lote seja tentado de novo.
+class WriteBehindQueue:
+    def __init__(self, sink, directory, batch_size=500, flush_interval=1.0,
+                 max_backoff=30.0, fsync=True):
+        self.sink = sink
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_backoff = max_backoff
+        self.journal = IngestJournal(directory, fsync=fsync)
+
+        self._wakeup = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+
+        self.enqueued = 0
+        self.flushed = 0
+        self.failures = 0
+        self.last_error = None
+
+    def enqueue(self, user_id, results):
+        records = [
+            {'id': secrets.token_hex(16), 'user_id': user_id, 'result': result}
+            for result in results
+        ]
+        self.journal.append(records)
+        self.enqueued += len(records)
+        return [record['id'] for record in records]
+
+    def _drain(self, path, offset):
+        while True:
+            records, new_offset = IngestJournal.read_records(path, offset, self.batch_size)
+            if not records:
+                return new_offset
+            self.sink(records)
+            IngestJournal.write_offset(path, new_offset)
+            offset = new_offset
+            self.flushed += len(records)
+
+    def flush_once(self):
+        for path, handle in self.journal.orphans():
+            try:
+                self._drain(path, IngestJournal.read_offset(path))
+                os.remove(path)
+                if os.path.exists(path + '.offset'):
+                    os.remove(path + '.offset')
+                print(f"✅ Diário órfão reprocessado: {os.path.basename(path)}")
+            finally:
+                handle.close()
+
+        path = self.journal.path
+        offset = self._drain(path, IngestJournal.read_offset(path))
+        if offset:
+            self.journal.reset_if_drained(offset)
+
+    # Grava a cada flush_interval, acumulando o que chegou no intervalo
+    def _run(self):
+        backoff = self.flush_interval
+        while not self._stop.is_set():
+            self._wakeup.wait(backoff)
+            self._wakeup.clear()
+            try:
+                self.flush_once()
+                backoff = self.flush_interval
+                self.last_error = None
+            except Exception as e:
+                self.failures += 1
+                self.last_error = str(e)
+                backoff = min(max(backoff, self.flush_interval) * 2, self.max_backoff)
+                print(f"⚠️ Falha ao gravar lote adiado (nova tentativa em {backoff:.0f}s): {e}")
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name='write-behind', daemon=True)
+            self._thread.start()
+
+    def stop(self, flush=True):
+        self._stop.set()
+        self._wakeup.set()
+        if self._thread is not None:
+            self._thread.join(timeout=10)
+            # Com a thread ainda gravando, um flush aqui leria o mesmo trecho
+            # do diário em paralelo e repetiria linhas; o que faltar fica no
+            # diário e é reprocessado na próxima execução
+            if self._thread.is_alive():
+                print("⚠️ Gravação adiada ainda em andamento; registros pendentes ficam no diário")
+                return
+        if flush:
+            try:
+                self.flush_once()
+            except Exception as e:
+                print(f"⚠️ Registros pendentes ficam no diário para a próxima execução: {e}")
+
+    def stats(self):
+        return {
+            'enqueued': self.enqueued,
+            'flushed': self.flushed,
+            'pending': max(0, self.enqueued - self.flushed),
+            'failures': self.failures,
+            'last_error': self.last_error,
+            'journal': os.path.basename(self.journal.path)
+        }
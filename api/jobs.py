@@ -0,0 +1,149 @@
+import secrets
+import threading
+import time
+
+
+# Estado de um job de longa duração (importação, recálculo, reset...).
+# Tudo o que precisa sobreviver ao processo fica em to_dict(), inclusive o
+# `cursor` que jobs retomáveis usam para continuar de onde pararam.
+class Job:
+    def __init__(self, kind, user_id=None, params=None, job_id=None, max_errors=1000):
+        self.id = job_id or secrets.token_hex(16)
+        self.kind = kind
+        self.user_id = user_id
+        self.params = params or {}
+        self.max_errors = max_errors
+
+        self.status = 'queued'
+        self.total = None
+        self.processed = 0
+        self.succeeded = 0
+        self.failed = 0
+        self.errors = []
+        self.cursor = None
+        self.message = None
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self.cancelled = False
+        # O alvo marca `partial` quando para antes do fim (prazo esgotado)
+        # e o trabalho restante pode ser retomado depois
+        self.partial = False
+
+    def add_error(self, row, error):
+        self.failed += 1
+        if len(self.errors) < self.max_errors:
+            self.errors.append({'row': row, 'error': error})
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'kind': self.kind,
+            'user_id': self.user_id,
+            'params': self.params,
+            'status': self.status,
+            'total': self.total,
+            'processed': self.processed,
+            'succeeded': self.succeeded,
+            'failed': self.failed,
+            'errors': self.errors,
+            'errors_truncated': max(0, self.failed - len(self.errors)),
+            'cursor': self.cursor,
+            'message': self.message,
+            'progress': round(self.processed / self.total, 4) if self.total else None,
+            'created_at': self.created_at,
+            'started_at': self.started_at,
+            'finished_at': self.finished_at
+        }
+
+    @classmethod
+    def from_dict(cls, data, max_errors=1000):
+        job = cls(data['kind'], data.get('user_id'), data.get('params'), data['id'], max_errors)
+        for field in ('status', 'total', 'processed', 'succeeded', 'failed', 'cursor',
+                      'message', 'created_at', 'started_at', 'finished_at'):
+            if field in data:
+                setattr(job, field, data[field])
+        job.errors = list(data.get('errors') or [])
+        return job
+
+
+# Executa jobs em threads do próprio processo e grava o estado via `save`
+# (no máximo a cada save_interval segundos durante a execução). `load`
+# devolve o estado gravado de jobs que não estão rodando aqui.
+class JobRunner:
+    def __init__(self, save, load, max_errors=1000, save_interval=1.0):
+        self.save = save
+        self.load = load
+        self.max_errors = max_errors
+        self.save_interval = save_interval
+        self._live = {}
+        self._lock = threading.Lock()
+
+    def create(self, kind, user_id=None, params=None):
+        job = Job(kind, user_id, params, max_errors=self.max_errors)
+        self.save(job.to_dict())
+        return job
+
+    def resume(self, data):
+        return Job.from_dict(data, self.max_errors)
+
+    # Grava o progresso, limitado a uma escrita por save_interval
+    def checkpoint(self, job, force=False):
+        now = time.monotonic()
+        if force or now - getattr(job, '_saved_at', 0) >= self.save_interval:
+            job._saved_at = now
+            self.save(job.to_dict())
+
+    def _execute(self, job, target):
+        job.status = 'running'
+        job.started_at = job.started_at or time.time()
+        self.checkpoint(job, force=True)
+        try:
+            target(job)
+            if job.cancelled:
+                job.status = 'cancelled'
+            else:
+                job.status = 'partial' if job.partial else 'done'
+        except Exception as e:
+            job.status = 'failed'
+            job.message = str(e)
+            print(f"❌ Job {job.kind} {job.id} falhou: {e}")
+        finally:
+            job.finished_at = time.time()
+            with self._lock:
+                self._live.pop(job.id, None)
+            try:
+                self.checkpoint(job, force=True)
+            except Exception as e:
+                print(f"⚠️ Não foi possível gravar o estado final do job {job.id}: {e}")
+
+    # background=False roda na própria requisição (Vercel, onde threads
+    # não continuam depois da resposta)
+    def run(self, job, target, background=True):
+        with self._lock:
+            self._live[job.id] = job
+        if not background:
+            self._execute(job, target)
+            return job
+        thread = threading.Thread(target=self._execute, args=(job, target), name=f'job-{job.kind}', daemon=True)
+        thread.start()
+        return job
+
+    def running(self, kind=None):
+        with self._lock:
+            return [job for job in self._live.values() if kind is None or job.kind == kind]
+
+    def get(self, job_id):
+        with self._lock:
+            job = self._live.get(job_id)
+        if job is not None:
+            return job.to_dict()
+        return self.load(job_id)
+
+    def cancel(self, job_id):
+        with self._lock:
+            job = self._live.get(job_id)
+        if job is None:
+            return False
+        job.cancelled = True
+        return True
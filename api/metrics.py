@@ -0,0 +1,149 @@
+import bisect
+import random
+import threading
+import time
+from contextlib import contextmanager
+
+
+# Limites (em segundos) dos histogramas, no padrão do cliente Prometheus
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class Histogram:
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def cumulative(self):
+        total = 0
+        result = []
+        for bound, count in zip(self.buckets + (float('inf'),), self.counts):
+            total += count
+            result.append((bound, total))
+        return result
+
+
+# Tempos de uma requisição, por fase (conexão, consulta, cálculo, serialização)
+class RequestTimer:
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.phases = {}
+
+    def add(self, phase, seconds):
+        self.phases[phase] = self.phases.get(phase, 0.0) + seconds
+
+    @contextmanager
+    def phase(self, name):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, time.perf_counter() - started)
+
+    def server_timing(self, total):
+        entries = [f'{phase};dur={seconds * 1000:.2f}' for phase, seconds in self.phases.items()]
+        entries.append(f'total;dur={total * 1000:.2f}')
+        return ', '.join(entries)
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _labels(pairs):
+    return ','.join(f'{name}="{_escape(value)}"' for name, value in pairs)
+
+
+def _format_bound(bound):
+    return '+Inf' if bound == float('inf') else repr(bound)
+
+
+# Métricas do processo: latência e contagem por rota sempre; tempos por fase
+# só nas requisições amostradas (sample_rate), que também recebem o
+# cabeçalho Server-Timing.
+class MetricsRegistry:
+    def __init__(self, sample_rate=1.0, enabled=True, prefix='ecotrace'):
+        self.sample_rate = sample_rate
+        self.enabled = enabled
+        self.prefix = prefix
+        self._lock = threading.Lock()
+        self._request_latency = {}
+        self._request_count = {}
+        self._phase_latency = {}
+
+    def should_sample(self):
+        if not self.enabled or self.sample_rate <= 0:
+            return False
+        return self.sample_rate >= 1 or random.random() < self.sample_rate
+
+    def observe_request(self, route, method, status, seconds):
+        if not self.enabled:
+            return
+        with self._lock:
+            histogram = self._request_latency.get((route, method))
+            if histogram is None:
+                histogram = self._request_latency[(route, method)] = Histogram()
+            histogram.observe(seconds)
+            key = (route, method, str(status))
+            self._request_count[key] = self._request_count.get(key, 0) + 1
+
+    def observe_phases(self, route, phases):
+        with self._lock:
+            for phase, seconds in phases.items():
+                histogram = self._phase_latency.get((route, phase))
+                if histogram is None:
+                    histogram = self._phase_latency[(route, phase)] = Histogram()
+                histogram.observe(seconds)
+
+    def _render_histograms(self, lines, name, help_text, histograms, label_names):
+        lines.append(f'# HELP {name} {help_text}')
+        lines.append(f'# TYPE {name} histogram')
+        for key, histogram in sorted(histograms.items()):
+            labels = list(zip(label_names, key))
+            for bound, total in histogram.cumulative():
+                lines.append(f'{name}_bucket{{{_labels(labels + [("le", _format_bound(bound))])}}} {total}')
+            lines.append(f'{name}_sum{{{_labels(labels)}}} {histogram.sum:.6f}')
+            lines.append(f'{name}_count{{{_labels(labels)}}} {histogram.count}')
+
+    def _render_samples(self, lines, samples, metric_type, suffix=''):
+        declared = set()
+        for sample_name, help_text, value, labels in samples:
+            name = f'{self.prefix}_{sample_name}{suffix}'
+            if name not in declared:
+                declared.add(name)
+                lines.append(f'# HELP {name} {help_text}')
+                lines.append(f'# TYPE {name} {metric_type}')
+            label_text = f'{{{_labels(labels)}}}' if labels else ''
+            lines.append(f'{name}{label_text} {value}')
+
+    # Texto no formato de exposição do Prometheus. `gauges` e `counters` são
+    # listas de (nome, ajuda, valor, [(rótulo, valor)]) calculados na hora da
+    # coleta; contadores (valores que só crescem) ganham o sufixo _total.
+    def render(self, gauges=(), counters=()):
+        lines = []
+        with self._lock:
+            self._render_histograms(
+                lines, f'{self.prefix}_http_request_duration_seconds',
+                'Latência das requisições por rota', self._request_latency, ('route', 'method'))
+
+            name = f'{self.prefix}_http_requests_total'
+            lines.append(f'# HELP {name} Requisições atendidas por rota e status')
+            lines.append(f'# TYPE {name} counter')
+            for (route, method, status), count in sorted(self._request_count.items()):
+                lines.append(f'{name}{{{_labels([("route", route), ("method", method), ("status", status)])}}} {count}')
+
+            self._render_histograms(
+                lines, f'{self.prefix}_request_phase_duration_seconds',
+                'Tempo por fase nas requisições amostradas', self._phase_latency, ('route', 'phase'))
+
+        self._render_samples(lines, gauges, 'gauge')
+        self._render_samples(lines, counters, 'counter', '_total')
+
+        return '\n'.join(lines) + '\n'
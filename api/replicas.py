@@ -0,0 +1,72 @@
+import threading
+import time
+
+
+# Réplica de leitura com verificação de saúde e atraso feita sob demanda
+# (no máximo a cada check_interval segundos, sem thread em segundo plano,
+# como o pool). `probe(conn)` devolve o atraso em segundos, None quando não
+# dá para saber, e levanta exceção se a replicação estiver parada. `config`
+# guarda os parâmetros de conexão para outros drivers (modo ASGI).
+class Replica:
+    def __init__(self, name, pool, probe, max_lag=5.0, check_interval=5.0, config=None):
+        self.name = name
+        self.pool = pool
+        self.config = config
+        self.probe = probe
+        self.max_lag = max_lag
+        self.check_interval = check_interval
+
+        self.healthy = False
+        self.lag = None
+        self.last_error = None
+        self.checks = 0
+        self.failures = 0
+        self._checked_at = None
+        self._lock = threading.Lock()
+
+    def check(self):
+        # Só uma thread verifica; as outras usam o último resultado
+        if not self._lock.acquire(blocking=False):
+            return self.healthy
+        try:
+            self._checked_at = time.monotonic()
+            self.checks += 1
+            with self.pool.connection() as conn:
+                lag = self.probe(conn)
+            self.lag = lag
+            self.healthy = lag is None or lag <= self.max_lag
+            self.last_error = None if self.healthy else f'atraso de {lag:.1f}s'
+        except Exception as e:
+            self.healthy = False
+            self.lag = None
+            self.last_error = str(e)
+            self.failures += 1
+        finally:
+            self._lock.release()
+        return self.healthy
+
+    def check_due(self):
+        return self._checked_at is None or time.monotonic() - self._checked_at >= self.check_interval
+
+    def usable(self):
+        if self.check_due():
+            return self.check()
+        return self.healthy
+
+    # Falha ao usar a réplica: fica fora até a próxima verificação
+    def mark_failed(self, error):
+        self.healthy = False
+        self.last_error = str(error)
+        self.failures += 1
+        self._checked_at = time.monotonic()
+
+    def stats(self):
+        return {
+            'name': self.name,
+            'healthy': self.healthy,
+            'lag': self.lag,
+            'last_error': self.last_error,
+            'checks': self.checks,
+            'failures': self.failures,
+            'pool': self.pool.stats()
+        }
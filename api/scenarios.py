@@ -0,0 +1,132 @@
+import math
+
+
+class ScenarioError(Exception):
+    pass
+
+
+MATCH_FIELDS = ('category', 'subcategory', 'unit', 'scope')
+RULE_KEYS = ('match', 'to', 'share', 'scale')
+
+
+# Regra de substituição:
+#   {"match": {"category": "energy", "subcategory": "grid_brazil"},
+#    "to": {"subcategory": "solar"}, "share": 1.0, "scale": 1.0}
+# `share` é a fração da quantidade que casa e é movida para `to`; `scale`
+# multiplica a parte movida (sem `to`, "scale": 0.8 vira uma redução de 20%).
+class Rule:
+    def __init__(self, match, to, share, scale):
+        self.match = match
+        self.to = to
+        self.share = share
+        self.scale = scale
+
+    def matches(self, key):
+        return all(key[MATCH_FIELDS.index(field)] == value for field, value in self.match.items())
+
+    def target(self, key):
+        return tuple(self.to.get(field, value) for field, value in zip(MATCH_FIELDS, key))
+
+
+def _fraction(rule, name, default, maximum=None):
+    value = rule.get(name, default)
+    if not isinstance(value, (int, float)) or isinstance(value, bool) or not math.isfinite(value) or value < 0:
+        raise ScenarioError(f'{name} deve ser um número não negativo')
+    if maximum is not None and value > maximum:
+        raise ScenarioError(f'{name} deve ficar entre 0 e {maximum:g}')
+    return float(value)
+
+
+def _fields(rule, name):
+    fields = rule.get(name) or {}
+    if not isinstance(fields, dict):
+        raise ScenarioError(f'{name} deve ser um objeto')
+    unknown = set(fields) - set(MATCH_FIELDS)
+    if unknown:
+        raise ScenarioError(f"Campo desconhecido em {name}: {', '.join(sorted(unknown))}")
+    for field, value in fields.items():
+        if value is not None and not isinstance(value, str):
+            raise ScenarioError(f'{name}.{field} deve ser texto')
+    return fields
+
+
+def _check_target(rule, factors):
+    category = rule.to.get('category')
+    if category is not None and category not in factors.emission_factors:
+        raise ScenarioError(f'Categoria desconhecida: {category}')
+    subcategory = rule.to.get('subcategory')
+    if subcategory is not None:
+        categories = [category] if category else [rule.match.get('category')]
+        if categories == [None] or subcategory not in factors.emission_factors.get(categories[0], {}):
+            raise ScenarioError(f'Subcategoria desconhecida: {subcategory}')
+    unit = rule.to.get('unit')
+    if unit is not None:
+        target_category = category or rule.match.get('category')
+        if target_category is None or unit not in factors.unit_conversions.get(target_category, {}):
+            raise ScenarioError(f'Unidade inválida: {unit}')
+    scope = rule.to.get('scope')
+    if scope is not None and scope not in factors.scope_multipliers:
+        raise ScenarioError(f'Escopo inválido: {scope}')
+    if category is not None and 'unit' not in rule.to and category != rule.match.get('category'):
+        raise ScenarioError('Ao trocar a categoria informe também a unidade de destino')
+
+
+def parse_scenarios(data, factors, max_scenarios=50, max_rules=50):
+    if not isinstance(data, list) or not data:
+        raise ScenarioError('Informe uma lista "scenarios"')
+    if len(data) > max_scenarios:
+        raise ScenarioError(f'Máximo de {max_scenarios} cenários por requisição')
+
+    scenarios = []
+    for index, scenario in enumerate(data, start=1):
+        if not isinstance(scenario, dict):
+            raise ScenarioError(f'Cenário {index} inválido')
+        name = str(scenario.get('name') or f'cenario_{index}')
+        rules = scenario.get('rules')
+        if not isinstance(rules, list):
+            raise ScenarioError(f'{name}: "rules" deve ser uma lista')
+        if len(rules) > max_rules:
+            raise ScenarioError(f'{name}: máximo de {max_rules} regras')
+
+        parsed = []
+        for rule in rules:
+            try:
+                if not isinstance(rule, dict):
+                    raise ScenarioError('regra inválida')
+                # Uma chave com erro de digitação ("from" no lugar de
+                # "match") viraria uma regra que casa com tudo
+                unknown = set(rule) - set(RULE_KEYS)
+                if unknown:
+                    raise ScenarioError(f"Campo desconhecido na regra: {', '.join(sorted(unknown))}")
+                parsed_rule = Rule(
+                    _fields(rule, 'match'),
+                    _fields(rule, 'to'),
+                    _fraction(rule, 'share', 1.0, maximum=1.0),
+                    _fraction(rule, 'scale', 1.0)
+                )
+                _check_target(parsed_rule, factors)
+            except ScenarioError as e:
+                raise ScenarioError(f'{name}: {e}')
+            parsed.append(parsed_rule)
+        scenarios.append((name, parsed))
+    return scenarios
+
+
+# Aplica as regras, em ordem, sobre a base agregada
+# {(categoria, subcategoria, unidade, escopo): quantidade}. Cada regra vê o
+# resultado das anteriores. Devolve uma nova base; a original não muda.
+def apply_rules(base, rules):
+    current = dict(base)
+    for rule in rules:
+        updated = {}
+        for key, quantity in current.items():
+            if rule.matches(key):
+                moved = quantity * rule.share
+                if quantity - moved:
+                    updated[key] = updated.get(key, 0.0) + quantity - moved
+                target = rule.target(key)
+                updated[target] = updated.get(target, 0.0) + moved * rule.scale
+            else:
+                updated[key] = updated.get(key, 0.0) + quantity
+        current = updated
+    return current
@@ -0,0 +1,1517 @@
+import base64
+import hashlib
+import json
+import os
+import tempfile
+import time
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from datetime import datetime
+from decimal import Decimal
+
+from db_pool import ConnectionPool
+from replicas import Replica
+
+
+class StorageError(Exception):
+    pass
+
+
+class StorageUnavailableError(StorageError):
+    pass
+
+
+# Incrementar sempre que init_schema mudar: processos novos só repetem o DDL
+# quando o marcador desta versão não estiver em schema_migrations
+SCHEMA_VERSION = 6
+SCHEMA_MARKER = f'schema_v{SCHEMA_VERSION}'
+
+
+# Horário da atividade a partir do timestamp ISO gravado pela calculadora
+def parse_activity_time(timestamp, fallback=None):
+    try:
+        return datetime.fromisoformat(timestamp).replace(tzinfo=None)
+    except (TypeError, ValueError):
+        return fallback
+
+
+EMISSION_INSERT_SQL = '''
+    INSERT INTO emissions
+    (user_id, category, subcategory, quantity, unit, scope, emissions_kg, emissions_tons, timestamp, activity_at,
+     factor_version)
+    VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+'''
+
+LIST_COLUMNS = [
+    'id', 'category', 'subcategory', 'quantity', 'unit', 'scope',
+    'emissions_kg', 'emissions_tons', 'factor_version', 'timestamp', 'created_at'
+]
+
+
+def _emission_row(user_id, result):
+    return (
+        user_id,
+        result['category'],
+        result['subcategory'],
+        result['quantity'],
+        result['unit'],
+        result['scope'],
+        result['emissions_kg'],
+        result['emissions_tons'],
+        result['timestamp'],
+        parse_activity_time(result['timestamp']),
+        result.get('factor_version')
+    )
+
+
+# Soma os resultados por (categoria, escopo) em linhas para o upsert do
+# rollup. Os valores passam por Decimal para somar exatamente o que as
+# colunas DECIMAL guardam; a ordem fixa das chaves evita deadlock entre
+# gravações concorrentes. NaN ou infinito inutilizariam o rollup para
+# sempre, então a gravação inteira é recusada.
+def rollup_rows(user_id, results, sign=1):
+    deltas = {}
+    for result in results:
+        key = (result['category'], result['scope'])
+        emissions_kg = Decimal(str(result['emissions_kg']))
+        emissions_tons = Decimal(str(result['emissions_tons']))
+        if not (emissions_kg.is_finite() and emissions_tons.is_finite()):
+            raise StorageError('Emissão com valor não finito')
+        total_kg, total_tons, entries = deltas.get(key, (Decimal(0), Decimal(0), 0))
+        deltas[key] = (
+            total_kg + emissions_kg,
+            total_tons + emissions_tons,
+            entries + 1
+        )
+    return [
+        (user_id, category, scope, sign * total_kg, sign * total_tons, sign * entries)
+        for (category, scope), (total_kg, total_tons, entries) in sorted(deltas.items())
+    ]
+
+
+ROLLUP_SUMMARY_SQL = '''
+    SELECT category, scope, total_tons
+    FROM emission_rollups
+    WHERE user_id = %s AND entries > 0
+'''
+
+MEMBER_ORGS_SQL = 'SELECT org_id FROM organization_members WHERE user_id = %s ORDER BY org_id'
+
+ORG_ROLES = ('owner', 'admin', 'member')
+
+
+# Linhas do upsert do rollup das organizações: cada delta do usuário
+# (categoria, escopo, kg, t, entradas) vale para todas as suas organizações
+def org_rollup_rows(org_ids, deltas):
+    return [(org_id, *delta) for org_id in org_ids for delta in deltas]
+
+
+# Exportação em streaming: a conexão é tomada na criação (para o erro de
+# conexão aparecer antes da resposta começar) e a consulta só roda no
+# primeiro lote. Se a leitura não terminar, a conexão é descartada.
+class EmissionStream:
+    def __init__(self, storage, query, params, fetch_size, replica=False):
+        self._storage = storage
+        self._query = query
+        self._params = params
+        self._fetch_size = fetch_size
+        self._pool, self._conn = storage._acquire_for(replica)
+        self._finished = False
+        self._released = False
+
+    def batches(self):
+        cursor = self._storage._streaming_cursor(self._conn)
+        self._storage._execute(cursor, self._query, self._params)
+        while True:
+            rows = cursor.fetchmany(self._fetch_size)
+            if not rows:
+                self._finished = True
+                return
+            yield rows
+
+    def close(self):
+        if not self._released:
+            self._released = True
+            self._pool.release(self._conn, discard=not self._finished)
+
+
+# Base comum dos motores SQL. As consultas são escritas com '%s' e cada
+# dialeto ajusta placeholders, agrupamentos por período e upserts, e
+# implementa o DDL (init_schema) e a limpeza de ingest_log.
+class SQLStorage(ABC):
+    name = 'sql'
+    label = 'SQL'
+    bucket_expressions = {}
+    rollup_upsert_sql = ''
+    org_rollup_upsert_sql = ''
+    job_upsert_sql = ''
+    insert_ignore = 'INSERT IGNORE'
+    lock_rows = ' FOR UPDATE'
+
+    def __init__(self, pool, insert_chunk=500):
+        self.pool = pool
+        self.insert_chunk = insert_chunk
+        # observer(fase, segundos) recebe o tempo de conexão e de consulta
+        self.observer = None
+        # Réplicas de leitura (replicas.Replica); vazias = tudo no primário
+        self.replicas = []
+        self._next_replica = 0
+
+    # Conexões
+
+    def _sql(self, query):
+        return query
+
+    def _observe(self, phase, started):
+        if self.observer is not None:
+            self.observer(phase, time.perf_counter() - started)
+
+    def _execute(self, cursor, query, params=()):
+        started = time.perf_counter()
+        cursor.execute(self._sql(query), tuple(params))
+        self._observe('db_query', started)
+
+    def _executemany(self, cursor, query, rows):
+        if rows:
+            started = time.perf_counter()
+            cursor.executemany(self._sql(query), rows)
+            self._observe('db_query', started)
+
+    def _streaming_cursor(self, conn):
+        return conn.cursor()
+
+    # Abre a transação de escrita antes das leituras que precisam de trava
+    def _begin_write(self, cursor):
+        pass
+
+    @staticmethod
+    def _dicts(cursor, rows):
+        columns = [description[0] for description in cursor.description]
+        return [dict(zip(columns, row)) for row in rows]
+
+    def _acquire(self):
+        started = time.perf_counter()
+        try:
+            conn = self.pool.acquire()
+            self._observe('db_connect', started)
+            return conn
+        except Exception as e:
+            print(f"❌ Erro ao conectar com o banco ({self.name}): {e}")
+            raise StorageUnavailableError(str(e)) from e
+
+    # Conexão de leitura: a próxima réplica saudável (em rodízio) ou, se
+    # nenhuma estiver disponível, o primário. Devolve (pool, conexão).
+    def _acquire_for(self, replica=False):
+        if replica and self.replicas:
+            start = self._next_replica
+            self._next_replica = (start + 1) % len(self.replicas)
+            for offset in range(len(self.replicas)):
+                candidate = self.replicas[(start + offset) % len(self.replicas)]
+                if not candidate.usable():
+                    continue
+                started = time.perf_counter()
+                try:
+                    conn = candidate.pool.acquire()
+                except Exception as e:
+                    print(f"⚠️ Réplica {candidate.name} indisponível, usando o primário: {e}")
+                    candidate.mark_failed(e)
+                    continue
+                self._observe('db_connect', started)
+                return candidate.pool, conn
+        return self.pool, self._acquire()
+
+    # Empresta uma conexão; transações não confirmadas são desfeitas na devolução.
+    # replica=True serve só para leituras que toleram o atraso da réplica.
+    @contextmanager
+    def connection(self, replica=False):
+        pool, conn = self._acquire_for(replica)
+        with pool.checked_out(conn):
+            yield conn
+
+    def ping(self):
+        try:
+            with self.connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute('SELECT 1')
+                cursor.fetchall()
+            return True
+        except Exception:
+            return False
+
+    def stats(self):
+        return {
+            'engine': self.name,
+            'pool': self.pool.stats(),
+            'replicas': [replica.stats() for replica in self.replicas]
+        }
+
+    # Usuários
+
+    def get_user_by_email(self, email):
+        with self.connection() as conn:
+            cursor = conn.cursor()
+            self._execute(cursor, 'SELECT id, nome, email, senha FROM usuarios WHERE email = %s', (email,))
+            rows = self._dicts(cursor, cursor.fetchall())
+        return rows[0] if rows else None
+
+    def create_user(self, nome, email, senha_hash):
+        with self.connection() as conn:
+            cursor = conn.cursor()
+            self._execute(
+                cursor,
+                'INSERT INTO usuarios (nome, email, senha) VALUES (%s, %s, %s)',
+                (nome, email, senha_hash)
+            )
+            conn.commit()
+            return cursor.lastrowid
+
+    # Emissões
+
+    # Insere resultados em lotes (executemany vira INSERT com várias linhas
+    # no MySQL) e atualiza o rollup na mesma transação. O commit é de quem chama.
+    def _insert_emissions(self, cursor, user_id, results):
+        for start in range(0, len(results), self.insert_chunk):
+            chunk = results[start:start + self.insert_chunk]
+            self._executemany(cursor, EMISSION_INSERT_SQL, [_emission_row(user_id, result) for result in chunk])
+        self._update_rollups(cursor, user_id, results)
+
+    def insert_emissions(self, user_id, results):
+        with self.connection() as conn:
+            cursor = conn.cursor()
+            self._insert_emissions(cursor, user_id, results)
+            conn.commit()
+
+    def _update_rollups(self, cursor, user_id, results, sign=1):
+        rows = rollup_rows(user_id, results, sign)
+        self._executemany(cursor, self.rollup_upsert_sql, rows)
+        self._update_org_rollups(cursor, user_id, [row[1:] for row in rows])
+
+    # Aplica os deltas do usuário no rollup das organizações dele. As
+    # organizações são lidas depois do upsert do usuário: uma entrada de
+    # membro concorrente espera essa transação (leitura com trava do rollup
+    # do usuário) ou já aparece aqui, então nenhum delta fica de fora.
+    def _update_org_rollups(self, cursor, user_id, deltas, org_ids=None):
+        if not deltas:
+            return
+        if org_ids is None:
+            self._execute(cursor, MEMBER_ORGS_SQL, (user_id,))
+            org_ids = [row[0] for row in cursor.fetchall()]
+        self._executemany(cursor, self.org_rollup_upsert_sql, org_rollup_rows(org_ids, deltas))
+
+    # Soma (sign=1) ou tira (sign=-1) o rollup atual do usuário das
+    # organizações: entrada e saída de membros e reset imediato
+    def _apply_member_rollup(self, cursor, user_id, sign, org_ids=None):
+        self._execute(cursor, f'''
+            SELECT category, scope, total_kg, total_tons, entries
+            FROM emission_rollups
+            WHERE user_id = %s
+            ORDER BY category, scope{self.lock_rows}
+        ''', (user_id,))
+        deltas = [
+            (category, scope, sign * Decimal(str(total_kg)), sign * Decimal(str(total_tons)), sign * entries)
+            for category, scope, total_kg, total_tons, entries in cursor.fetchall()
+        ]
+        self._update_org_rollups(cursor, user_id, deltas, org_ids)
+
+    # Recalcula o rollup a partir da tabela emissions, um usuário por transação
+    def rebuild_rollups(self, user_id=None, conn=None):
+        if conn is None:
+            with self.connection() as conn:
+                return self.rebuild_rollups(user_id, conn)
+
+        cursor = conn.cursor()
+        if user_id is None:
+            cursor.execute('SELECT id FROM usuarios ORDER BY id')
+            user_ids = [row[0] for row in cursor.fetchall()]
+        else:
+            user_ids = [user_id]
+
+        for uid in user_ids:
+            self._execute(cursor, 'DELETE FROM emission_rollups WHERE user_id = %s', (uid,))
+            self._execute(cursor, '''
+                INSERT INTO emission_rollups (user_id, category, scope, total_kg, total_tons, entries)
+                SELECT user_id, category, scope, SUM(emissions_kg), SUM(emissions_tons), COUNT(*)
+                FROM emissions
+                WHERE user_id = %s AND id > (SELECT emissions_reset_id FROM usuarios WHERE id = %s)
+                GROUP BY user_id, category, scope
+            ''', (uid, uid))
+            conn.commit()
+
+        if user_id is None:
+            self.rebuild_org_rollups(conn=conn)
+        else:
+            self._execute(cursor, MEMBER_ORGS_SQL, (user_id,))
+            for (org_id,) in cursor.fetchall():
+                self.rebuild_org_rollups(org_id, conn)
+
+        return len(user_ids)
+
+    # Recalcula o rollup das organizações a partir do rollup dos membros
+    def rebuild_org_rollups(self, org_id=None, conn=None):
+        if conn is None:
+            with self.connection() as conn:
+                return self.rebuild_org_rollups(org_id, conn)
+
+        cursor = conn.cursor()
+        if org_id is None:
+            cursor.execute('SELECT id FROM organizations ORDER BY id')
+            org_ids = [row[0] for row in cursor.fetchall()]
+        else:
+            org_ids = [org_id]
+
+        for oid in org_ids:
+            self._execute(cursor, 'DELETE FROM org_rollups WHERE org_id = %s', (oid,))
+            self._execute(cursor, '''
+                INSERT INTO org_rollups (org_id, category, scope, total_kg, total_tons, entries)
+                SELECT m.org_id, r.category, r.scope, SUM(r.total_kg), SUM(r.total_tons), SUM(r.entries)
+                FROM organization_members m
+                JOIN emission_rollups r ON r.user_id = m.user_id
+                WHERE m.org_id = %s
+                GROUP BY m.org_id, r.category, r.scope
+            ''', (oid,))
+            conn.commit()
+
+        return len(org_ids)
+
+    # Reset
+
+    def _reset_watermark(self, cursor, user_id):
+        self._execute(cursor, f'SELECT emissions_reset_id FROM usuarios WHERE id = %s{self.lock_rows}', (user_id,))
+        row = cursor.fetchone()
+        return row[0] if row else 0
+
+    # Reset imediato: move a marca d'água do usuário para o último id e zera o
+    # rollup. As linhas continuam na tabela, ocultas das consultas, até
+    # delete_emissions apagá-las. Devolve a nova marca.
+    def hide_emissions(self, user_id):
+        with self.connection() as conn:
+            cursor = conn.cursor()
+            self._begin_write(cursor)
+            watermark = self._reset_watermark(cursor, user_id)
+            self._execute(cursor, 'SELECT MAX(id) FROM emissions WHERE user_id = %s', (user_id,))
+            watermark = max(watermark, cursor.fetchone()[0] or 0)
+            self._execute(cursor, 'UPDATE usuarios SET emissions_reset_id = %s WHERE id = %s', (watermark, user_id))
+            self._apply_member_rollup(cursor, user_id, sign=-1)
+            self._execute(cursor, 'DELETE FROM emission_rollups WHERE user_id = %s', (user_id,))
+            conn.commit()
+        return watermark
+
+    # Apaga até `limit` emissões do usuário com id <= upto_id numa transação
+    # curta. Linhas ainda visíveis saem também do rollup; as já ocultas por
+    # hide_emissions não estão mais nele. Devolve quantas linhas apagou.
+    def delete_emissions(self, user_id, upto_id, limit):
+        with self.connection() as conn:
+            cursor = conn.cursor()
+            self._begin_write(cursor)
+            self._execute(cursor, f'''
+                SELECT id, category, scope, emissions_kg, emissions_tons
+                FROM emissions
+                WHERE user_id = %s AND id <= %s
+                ORDER BY id
+                LIMIT %s{self.lock_rows}
+            ''', (user_id, upto_id, limit))
+            rows = self._dicts(cursor, cursor.fetchall())
+            if not rows:
+                self._execute(cursor, 'DELETE FROM emission_rollups WHERE user_id = %s AND entries = 0', (user_id,))
+                conn.commit()
+                return 0
+
+            watermark = self._reset_watermark(cursor, user_id)
+            ids = [row['id'] for row in rows]
+            placeholders = ', '.join(['%s'] * len(ids))
+            self._execute(cursor, f'DELETE FROM emissions WHERE id IN ({placeholders})', ids)
+            self._update_rollups(cursor, user_id, [row for row in rows if row['id'] > watermark], sign=-1)
+            conn.commit()
+        return len(rows)
+
+    # Usuários com linhas ocultas por reset, para a limpeza em lote
+    def reset_watermarks(self):
+        with self.connection() as conn:
+            cursor = conn.cursor()
+            self._execute(cursor, 'SELECT id, emissions_reset_id FROM usuarios WHERE emissions_reset_id > 0 ORDER BY id')
+            return cursor.fetchall()
+
+    # Recálculo
+
+    # Total de linhas e maior id (de todos ou de um usuário) no início de um
+    # recálculo ou reset; linhas gravadas depois ficam de fora
+    def emission_bounds(self, user_id=None):
+        with self.connection() as conn:
+            cursor = conn.cursor()
+            if user_id is None:
+                self._execute(cursor, 'SELECT COUNT(*), MAX(id) FROM emissions')
+            else:
+                self._execute(cursor, 'SELECT COUNT(*), MAX(id) FROM emissions WHERE user_id = %s', (user_id,))
+            count, max_id = cursor.fetchone()
+        return count or 0, max_id or 0
+
+    # Recalcula o próximo bloco de até `limit` linhas com id em (after_id, max_id].
+    # As linhas do bloco ficam travadas até o commit, então um reset ou outra
+    # gravação concorrente não deixa o rollup divergente. `recalculate(rows)`
+    # devolve os novos resultados das linhas fora de `factor_version`.
+    # Devolve (último id, linhas lidas, linhas alteradas, usuários afetados).
+    def recalculate_emissions(self, after_id, max_id, limit, factor_version, recalculate):
+        with self.connection() as conn:
+            cursor = conn.cursor()
+            self._begin_write(cursor)
+            self._execute(cursor, f'''
+                SELECT id, user_id, category, subcategory, quantity, unit, scope,
+                       emissions_kg, emissions_tons, factor_version
+                FROM emissions
+                WHERE id > %s AND id <= %s
+                ORDER BY id
+                LIMIT %s{self.lock_rows}
+            ''', (after_id, max_id, limit))
+            rows = self._dicts(cursor, cursor.fetchall())
+            if not rows:
+                conn.rollback()
+                return None, 0, 0, set()
+
+            # Linhas ocultas por um reset não estão no rollup: ficam como estão.
+            # A marca d'água é lida com trava para um reset não passar no meio.
+            user_ids = sorted({row['user_id'] for row in rows})
+            placeholders = ', '.join(['%s'] * len(user_ids))
+            self._execute(
+                cursor,
+                f'SELECT id, emissions_reset_id FROM usuarios WHERE id IN ({placeholders}) ORDER BY id{self.lock_rows}',
+                user_ids
+            )
+            watermarks = dict(cursor.fetchall())
+
+            stale = [
+                row for row in rows
+                if row['factor_version'] != factor_version and row['id'] > watermarks.get(row['user_id'], 0)
+            ]
+            results = recalculate(stale) if stale else []
+
+            updates = []
+            old_by_user = {}
+            new_by_user = {}
+            for row, result in zip(stale, results):
+                updates.append((result['emissions_kg'], result['emissions_tons'], factor_version, row['id']))
+                old_by_user.setdefault(row['user_id'], []).append(row)
+                new_by_user.setdefault(row['user_id'], []).append(result)
+
+            self._executemany(
+                cursor,
+                'UPDATE emissions SET emissions_kg = %s, emissions_tons = %s, factor_version = %s WHERE id = %s',
+                updates
+            )
+            # Tira os valores antigos e soma os novos: a contagem de linhas não muda
+            for user_id in sorted(old_by_user):
+                self._update_rollups(cursor, user_id, old_by_user[user_id], sign=-1)
+                self._update_rollups(cursor, user_id, new_by_user[user_id])
+            conn.commit()
+
+        return rows[-1]['id'], len(rows), len(updates), set(old_by_user)
+
+    # Monta o WHERE comum às consultas de emissões. O período é sempre o
+    # horário da atividade (activity_at), na listagem, na série temporal e
+    # na exportação, para que as telas com o mesmo filtro mostrem as mesmas
+    # linhas.
+    @classmethod
+    def _filters(cls, user_id, filters):
+        # Linhas ocultas por um reset ainda não concluído não aparecem
+        conditions = ['user_id = %s', 'id > (SELECT emissions_reset_id FROM usuarios WHERE id = %s)']
+        params = [user_id, user_id]
+        cls._value_filters(filters, 'activity_at', conditions, params)
+        return conditions, params
+
+    # Filtros de período, categoria e escopo
+    @staticmethod
+    def _value_filters(filters, time_column, conditions, params):
+        if filters.get('from'):
+            conditions.append(f'{time_column} >= %s')
+            params.append(filters['from'])
+        if filters.get('to'):
+            conditions.append(f'{time_column} <= %s')
+            params.append(filters['to'])
+
+        for field in ('category', 'scope'):
+            if filters.get(field):
+                conditions.append(f'{field} = %s')
+                params.append(filters[field])
+
+    # Paginação por chave sobre o índice (user_id, created_at, id), do mais
+    # recente para o mais antigo. `after` é o (created_at, id) da última linha;
+    # o período filtra por activity_at como as demais consultas.
+    @classmethod
+    def list_query(cls, user_id, filters, limit, after=None):
+        conditions, params = cls._filters(user_id, filters)
+        if after:
+            conditions.append('(created_at < %s OR (created_at = %s AND id < %s))')
+            params.extend([after[0], after[0], after[1]])
+
+        query = f'''
+            SELECT {', '.join(LIST_COLUMNS)}
+            FROM emissions
+            WHERE {' AND '.join(conditions)}
+            ORDER BY created_at DESC, id DESC
+            LIMIT %s
+        '''
+        return query, (*params, limit)
+
+    def list_emissions(self, user_id, filters, limit, after=None, replica=False):
+        query, params = self.list_query(user_id, filters, limit, after)
+        with self.connection(replica) as conn:
+            cursor = conn.cursor()
+            self._execute(cursor, query, params)
+            return self._dicts(cursor, cursor.fetchall())
+
+    def rollup_summary(self, user_id, replica=False):
+        with self.connection(replica) as conn:
+            cursor = conn.cursor()
+            self._execute(cursor, ROLLUP_SUMMARY_SQL, (user_id,))
+            return self._dicts(cursor, cursor.fetchall())
+
+    def timeseries(self, user_id, filters, bucket, replica=False):
+        conditions, params = self._filters(user_id, filters)
+        with self.connection(replica) as conn:
+            cursor = conn.cursor()
+            self._execute(cursor, f'''
+                SELECT {self.bucket_expressions[bucket]} AS bucket, category, scope,
+                       SUM(emissions_kg) AS emissions_kg,
+                       SUM(emissions_tons) AS emissions_tons,
+                       COUNT(*) AS entries
+                FROM emissions
+                WHERE {' AND '.join(conditions)}
+                GROUP BY bucket, category, scope
+                ORDER BY bucket, category, scope
+            ''', params)
+            return self._dicts(cursor, cursor.fetchall())
+
+    # Base das simulações: quantidade total por (categoria, subcategoria,
+    # unidade, escopo). O banco agrega, então só os grupos distintos são
+    # lidos, em lotes, qualquer que seja o tamanho do histórico.
+    def activity_base(self, user_id, filters, fetch_size=1000, replica=False):
+        conditions, params = self._filters(user_id, filters)
+        query = f'''
+            SELECT category, subcategory, unit, scope, SUM(quantity) AS quantity, COUNT(*) AS entries
+            FROM emissions
+            WHERE {' AND '.join(conditions)}
+            GROUP BY category, subcategory, unit, scope
+        '''
+        return EmissionStream(self, query, params, fetch_size, replica)
+
+    def stream_emissions(self, user_id, filters, columns, fetch_size=1000, replica=False):
+        conditions, params = self._filters(user_id, filters)
+        query = f'''
+            SELECT {', '.join(columns)}
+            FROM emissions
+            WHERE {' AND '.join(conditions)}
+            ORDER BY activity_at, id
+        '''
+        return EmissionStream(self, query, params, fetch_size, replica)
+
+    # Organizações
+
+    # Cria a organização com o criador como dono; o rollup dela já nasce
+    # com o histórico do dono
+    def create_organization(self, name, owner_id):
+        with self.connection() as conn:
+            cursor = conn.cursor()
+            self._begin_write(cursor)
+            self._execute(cursor, 'INSERT INTO organizations (name) VALUES (%s)', (name,))
+            org_id = cursor.lastrowid
+            self._execute(
+                cursor,
+                'INSERT INTO organization_members (org_id, user_id, role) VALUES (%s, %s, %s)',
+                (org_id, owner_id, 'owner')
+            )
+            self._apply_member_rollup(cursor, owner_id, sign=1, org_ids=[org_id])
+            conn.commit()
+        return org_id
+
+    def user_organizations(self, user_id):
+        with self.connection() as conn:
+            cursor = conn.cursor()
+            self._execute(cursor, '''
+                SELECT o.id, o.name, m.role,
+                       (SELECT COUNT(*) FROM organization_members c WHERE c.org_id = o.id) AS members
+                FROM organization_members m
+                JOIN organizations o ON o.id = m.org_id
+                WHERE m.user_id = %s
+                ORDER BY o.name, o.id
+            ''', (user_id,))
+            return self._dicts(cursor, cursor.fetchall())
+
+    # Papel do usuário na organização (None = não é membro) e o nome dela
+    def organization_role(self, org_id, user_id):
+        with self.connection() as conn:
+            cursor = conn.cursor()
+            self._execute(cursor, '''
+                SELECT o.name, m.role
+                FROM organization_members m
+                JOIN organizations o ON o.id = m.org_id
+                WHERE m.org_id = %s AND m.user_id = %s
+            ''', (org_id, user_id))
+            row = cursor.fetchone()
+        return (row[0], row[1]) if row else (None, None)
+
+    def organization_members(self, org_id):
+        with self.connection() as conn:
+            cursor = conn.cursor()
+            self._execute(cursor, '''
+                SELECT u.id, u.nome, u.email, m.role, m.joined_at
+                FROM organization_members m
+                JOIN usuarios u ON u.id = m.user_id
+                WHERE m.org_id = %s
+                ORDER BY u.nome, u.id
+            ''', (org_id,))
+            return self._dicts(cursor, cursor.fetchall())
+
+    # Gestores só convidam: o usuário vira membro (e o histórico dele entra
+    # no rollup da organização) quando ele mesmo aceita. Convidar de novo
+    # troca o papel do convite. Devolve False se o usuário já é membro.
+    def invite_member(self, org_id, user_id, role, invited_by):
+        with self.connection() as conn:
+            cursor = conn.cursor()
+            self._begin_write(cursor)
+            self._execute(
+                cursor, 'SELECT 1 FROM organization_members WHERE org_id = %s AND user_id = %s', (org_id, user_id))
+            invited = not cursor.fetchall()
+            if invited:
+                self._execute(
+                    cursor, 'DELETE FROM organization_invitations WHERE org_id = %s AND user_id = %s', (org_id, user_id))
+                self._execute(
+                    cursor,
+                    'INSERT INTO organization_invitations (org_id, user_id, role, invited_by) VALUES (%s, %s, %s, %s)',
+                    (org_id, user_id, role, invited_by)
+                )
+            conn.commit()
+        return invited
+
+    def user_invitations(self, user_id):
+        with self.connection() as conn:
+            cursor = conn.cursor()
+            self._execute(cursor, '''
+                SELECT o.id, o.name, i.role, u.nome AS invited_by, i.invited_at
+                FROM organization_invitations i
+                JOIN organizations o ON o.id = i.org_id
+                LEFT JOIN usuarios u ON u.id = i.invited_by
+                WHERE i.user_id = %s
+                ORDER BY i.invited_at, o.id
+            ''', (user_id,))
+            return self._dicts(cursor, cursor.fetchall())
+
+    # Entrada e saída de membros movem o rollup atual do usuário para dentro
+    # ou para fora do rollup da organização na mesma transação. accept
+    # devolve o papel (None sem convite pendente); os demais, False quando
+    # não há o que mudar.
+    def accept_invitation(self, org_id, user_id):
+        with self.connection() as conn:
+            cursor = conn.cursor()
+            self._begin_write(cursor)
+            self._execute(
+                cursor,
+                f'SELECT role FROM organization_invitations WHERE org_id = %s AND user_id = %s{self.lock_rows}',
+                (org_id, user_id)
+            )
+            row = cursor.fetchone()
+            if row is None:
+                conn.commit()
+                return None
+            role = row[0]
+            self._execute(
+                cursor, 'DELETE FROM organization_invitations WHERE org_id = %s AND user_id = %s', (org_id, user_id))
+            self._execute(
+                cursor,
+                f'{self.insert_ignore} INTO organization_members (org_id, user_id, role) VALUES (%s, %s, %s)',
+                (org_id, user_id, role)
+            )
+            if cursor.rowcount > 0:
+                self._apply_member_rollup(cursor, user_id, sign=1, org_ids=[org_id])
+            conn.commit()
+        return role
+
+    def decline_invitation(self, org_id, user_id):
+        with self.connection() as conn:
+            cursor = conn.cursor()
+            self._execute(
+                cursor, 'DELETE FROM organization_invitations WHERE org_id = %s AND user_id = %s', (org_id, user_id))
+            declined = cursor.rowcount > 0
+            conn.commit()
+        return declined
+
+    def remove_member(self, org_id, user_id):
+        with self.connection() as conn:
+            cursor = conn.cursor()
+            self._begin_write(cursor)
+            self._execute(cursor, 'DELETE FROM organization_members WHERE org_id = %s AND user_id = %s', (org_id, user_id))
+            removed = cursor.rowcount > 0
+            if removed:
+                self._apply_member_rollup(cursor, user_id, sign=-1, org_ids=[org_id])
+            conn.commit()
+        return removed
+
+    def org_rollup_summary(self, org_id, replica=False):
+        with self.connection(replica) as conn:
+            cursor = conn.cursor()
+            self._execute(cursor, '''
+                SELECT category, scope, total_tons
+                FROM org_rollups
+                WHERE org_id = %s AND entries > 0
+            ''', (org_id,))
+            return self._dicts(cursor, cursor.fetchall())
+
+    # Série temporal da organização numa consulta só: o banco percorre o
+    # índice (user_id, activity_at) de cada membro e agrega tudo junto
+    def org_timeseries(self, org_id, filters, bucket, replica=False):
+        conditions = ['m.org_id = %s', 'e.id > u.emissions_reset_id']
+        params = [org_id]
+        self._value_filters(filters, 'activity_at', conditions, params)
+        with self.connection(replica) as conn:
+            cursor = conn.cursor()
+            self._execute(cursor, f'''
+                SELECT {self.bucket_expressions[bucket]} AS bucket, category, scope,
+                       SUM(emissions_kg) AS emissions_kg,
+                       SUM(emissions_tons) AS emissions_tons,
+                       COUNT(*) AS entries
+                FROM organization_members m
+                JOIN usuarios u ON u.id = m.user_id
+                JOIN emissions e ON e.user_id = m.user_id
+                WHERE {' AND '.join(conditions)}
+                GROUP BY bucket, category, scope
+                ORDER BY bucket, category, scope
+            ''', params)
+            return self._dicts(cursor, cursor.fetchall())
+
+    # Gravação adiada
+
+    # Grava um lote do diário. Ids já presentes em ingest_log são ignorados,
+    # então reprocessar depois de uma queda não duplica emissões.
+    # Devolve os usuários que receberam linhas novas.
+    def persist_ingested(self, records):
+        with self.connection() as conn:
+            cursor = conn.cursor()
+            ids = [record['id'] for record in records]
+            placeholders = ', '.join(['%s'] * len(ids))
+            self._execute(cursor, f'SELECT ingest_id FROM ingest_log WHERE ingest_id IN ({placeholders})', ids)
+            already_saved = {row[0] for row in cursor.fetchall()}
+
+            by_user = {}
+            for record in records:
+                if record['id'] not in already_saved:
+                    by_user.setdefault(record['user_id'], []).append(record['result'])
+
+            new_ids = [(record['id'],) for record in records if record['id'] not in already_saved]
+            if new_ids:
+                for user_id, results in sorted(by_user.items()):
+                    self._insert_emissions(cursor, user_id, results)
+                self._executemany(cursor, f'{self.insert_ignore} INTO ingest_log (ingest_id) VALUES (%s)', new_ids)
+                conn.commit()
+
+        return set(by_user)
+
+    # Jobs
+
+    def save_job(self, job):
+        with self.connection() as conn:
+            cursor = conn.cursor()
+            self._execute(cursor, self.job_upsert_sql, (
+                job['id'], job.get('user_id'), job['kind'], job['status'],
+                json.dumps(job, ensure_ascii=False, default=str)
+            ))
+            conn.commit()
+
+    def load_job(self, job_id):
+        with self.connection() as conn:
+            cursor = conn.cursor()
+            self._execute(cursor, 'SELECT state FROM jobs WHERE id = %s', (job_id,))
+            row = cursor.fetchone()
+        return json.loads(row[0]) if row else None
+
+    # Esquema
+
+    # Uma consulta pelo pool (a conexão fica para a requisição) em vez do DDL
+    # completo; qualquer erro (banco ou tabela inexistente) conta como "não"
+    def schema_current(self):
+        try:
+            with self.connection() as conn:
+                cursor = conn.cursor()
+                self._execute(cursor, 'SELECT 1 FROM schema_migrations WHERE version = %s', (SCHEMA_MARKER,))
+                return bool(cursor.fetchall())
+        except Exception:
+            return False
+
+    def _mark_schema_current(self, cursor):
+        self._execute(cursor, f'{self.insert_ignore} INTO schema_migrations (version) VALUES (%s)', (SCHEMA_MARKER,))
+
+    @abstractmethod
+    def prune_ingest_log(self, retention_days):
+        ...
+
+    @abstractmethod
+    def init_schema(self):
+        ...
+
+
+class MySQLStorage(SQLStorage):
+    name = 'mysql'
+    label = 'MySQL'
+
+    # '%%' por causa da substituição de parâmetros do conector
+    bucket_expressions = {
+        'day': "DATE(activity_at)",
+        'week': "DATE_SUB(DATE(activity_at), INTERVAL WEEKDAY(activity_at) DAY)",
+        'month': "DATE_FORMAT(activity_at, '%%Y-%%m-01')"
+    }
+
+    rollup_upsert_sql = '''
+        INSERT INTO emission_rollups (user_id, category, scope, total_kg, total_tons, entries)
+        VALUES (%s, %s, %s, %s, %s, %s)
+        ON DUPLICATE KEY UPDATE
+            total_kg = total_kg + VALUES(total_kg),
+            total_tons = total_tons + VALUES(total_tons),
+            entries = entries + VALUES(entries)
+    '''
+
+    org_rollup_upsert_sql = '''
+        INSERT INTO org_rollups (org_id, category, scope, total_kg, total_tons, entries)
+        VALUES (%s, %s, %s, %s, %s, %s)
+        ON DUPLICATE KEY UPDATE
+            total_kg = total_kg + VALUES(total_kg),
+            total_tons = total_tons + VALUES(total_tons),
+            entries = entries + VALUES(entries)
+    '''
+
+    job_upsert_sql = '''
+        INSERT INTO jobs (id, user_id, kind, status, state)
+        VALUES (%s, %s, %s, %s, %s)
+        ON DUPLICATE KEY UPDATE status = VALUES(status), state = VALUES(state)
+    '''
+
+    def __init__(self, config, pool_options=None, insert_chunk=500, backfill_chunk=1000,
+                 replica_configs=(), replica_options=None, schema_lock_timeout=10):
+        self.config = dict(config)
+        self.backfill_chunk = backfill_chunk
+        self.schema_lock_timeout = schema_lock_timeout
+        self._ssl_ca_path = None
+        self._ssl_ca_resolved = False
+        pool = ConnectionPool(self._new_connection, **(pool_options or {}))
+        super().__init__(pool, insert_chunk)
+
+        # Réplicas herdam usuário, senha, banco e certificado do primário
+        replica_options = dict(replica_options or {})
+        for overrides in replica_configs:
+            replica_config = {**self.config, **overrides}
+            replica_pool = ConnectionPool(
+                lambda replica_config=replica_config: self._new_connection(config=replica_config),
+                **(pool_options or {})
+            )
+            self.replicas.append(Replica(
+                f"{replica_config['host']}:{replica_config.get('port', 3306)}",
+                replica_pool,
+                self.replica_lag,
+                config=replica_config,
+                **replica_options
+            ))
+
+    def _resolve_ssl_ca(self):
+        # Resolve o certificado CA uma única vez por processo. O nome do
+        # arquivo vem do conteúdo, então instâncias aquecidas que
+        # compartilham o /tmp reaproveitam o arquivo em vez de regravá-lo.
+        if self._ssl_ca_resolved:
+            return self._ssl_ca_path
+
+        ssl_ca_env = os.environ.get('AIVEN_SSL_CA') or os.environ.get('MYSQL_SSL_CA')
+        if ssl_ca_env:
+            pem_data = ssl_ca_env
+            if '-----BEGIN CERTIFICATE-----' not in pem_data:
+                try:
+                    pem_data = base64.b64decode(ssl_ca_env).decode('utf-8')
+                except Exception:
+                    pem_data = ssl_ca_env
+            pem_bytes = pem_data.encode('utf-8')
+            path = os.path.join(
+                tempfile.gettempdir(),
+                f'ecotrace-ca-{hashlib.sha256(pem_bytes).hexdigest()[:16]}.pem'
+            )
+            if not os.path.exists(path):
+                tmp_path = f'{path}.{os.getpid()}.tmp'
+                with open(tmp_path, 'wb') as f:
+                    f.write(pem_bytes)
+                os.replace(tmp_path, path)
+            self._ssl_ca_path = path
+
+        self._ssl_ca_resolved = True
+        return self._ssl_ca_path
+
+    def connection_params(self, use_database=True, config=None):
+        conn_params = dict(config or self.config)
+
+        # Remover database se não for usar
+        if not use_database:
+            conn_params.pop('database', None)
+
+        # Suporte a certificado CA
+        ssl_ca_path = self._resolve_ssl_ca()
+        if ssl_ca_path:
+            conn_params['ssl_ca'] = ssl_ca_path
+            conn_params['ssl_verify_cert'] = True
+
+        return conn_params
+
+    def _new_connection(self, use_database=True, config=None):
+        import mysql.connector
+        return mysql.connector.connect(**self.connection_params(use_database, config))
+
+    # Atraso da réplica pelo status de replicação. Sem permissão para ler o
+    # status (ou sem replicação configurada) o atraso é desconhecido (None);
+    # Seconds_Behind_Source nulo significa replicação parada.
+    @staticmethod
+    def replica_lag(conn):
+        import mysql.connector
+        cursor = conn.cursor(dictionary=True)
+        row = None
+        for statement in ('SHOW REPLICA STATUS', 'SHOW SLAVE STATUS'):
+            try:
+                cursor.execute(statement)
+                row = cursor.fetchone()
+                cursor.fetchall()
+                break
+            except mysql.connector.Error:
+                continue
+        if not row:
+            return None
+
+        lag = row.get('Seconds_Behind_Source', row.get('Seconds_Behind_Master'))
+        if lag is None:
+            raise StorageError('Replicação parada')
+        return float(lag)
+
+    def _streaming_cursor(self, conn):
+        return conn.cursor(buffered=False)
+
+    def prune_ingest_log(self, retention_days):
+        with self.connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(
+                'DELETE FROM ingest_log WHERE created_at < NOW() - INTERVAL %s DAY LIMIT 10000',
+                (retention_days,)
+            )
+            conn.commit()
+
+    # Esquema e migrações
+
+    @staticmethod
+    def table_exists(cursor, database_name, table):
+        cursor.execute('''
+            SELECT 1 FROM information_schema.tables
+            WHERE table_schema = %s AND table_name = %s
+            LIMIT 1
+        ''', (database_name, table))
+        return cursor.fetchone() is not None
+
+    # Cria um índice em tabelas já existentes (MySQL não tem ADD INDEX IF NOT
+    # EXISTS), sem bloquear gravações enquanto é construído
+    @staticmethod
+    def ensure_index(cursor, database_name, table, index_name, columns):
+        cursor.execute('''
+            SELECT 1 FROM information_schema.statistics
+            WHERE table_schema = %s AND table_name = %s AND index_name = %s
+            LIMIT 1
+        ''', (database_name, table, index_name))
+        if cursor.fetchone():
+            return False
+        cursor.execute(f"ALTER TABLE `{table}` ADD INDEX `{index_name}` {columns}, ALGORITHM=INPLACE, LOCK=NONE")
+        print(f"✅ Índice '{index_name}' criado em '{table}'")
+        return True
+
+    @staticmethod
+    def column_types(cursor, database_name, table):
+        cursor.execute('''
+            SELECT column_name, data_type FROM information_schema.columns
+            WHERE table_schema = %s AND table_name = %s
+        ''', (database_name, table))
+        return {name.lower(): data_type.lower() for name, data_type in cursor.fetchall()}
+
+    @staticmethod
+    def migration_applied(cursor, version):
+        cursor.execute('SELECT 1 FROM schema_migrations WHERE version = %s', (version,))
+        return cursor.fetchone() is not None
+
+    @staticmethod
+    def record_migration(conn, version):
+        cursor = conn.cursor()
+        cursor.execute('INSERT IGNORE INTO schema_migrations (version) VALUES (%s)', (version,))
+        conn.commit()
+
+    # Preenche activity_at em lotes curtos pela chave primária; cada lote é
+    # confirmado separadamente para não segurar locks durante a migração inteira.
+    # Pode ser interrompido e retomado.
+    def backfill_activity_at(self, conn):
+        cursor = conn.cursor()
+        last_id = 0
+        updated = 0
+        while True:
+            cursor.execute('''
+                SELECT id, timestamp, created_at FROM emissions
+                WHERE id > %s AND activity_at IS NULL
+                ORDER BY id
+                LIMIT %s
+            ''', (last_id, self.backfill_chunk))
+            rows = cursor.fetchall()
+            if not rows:
+                break
+
+            last_id = rows[-1][0]
+            cursor.executemany(
+                'UPDATE emissions SET activity_at = %s WHERE id = %s',
+                [(parse_activity_time(timestamp, created_at), emission_id) for emission_id, timestamp, created_at in rows]
+            )
+            conn.commit()
+            updated += len(rows)
+
+        return updated
+
+    def migrate_emissions_activity_at(self, conn, database_name):
+        cursor = conn.cursor()
+        columns = self.column_types(cursor, database_name, 'emissions')
+
+        if 'activity_at' not in columns:
+            cursor.execute(
+                'ALTER TABLE emissions ADD COLUMN activity_at DATETIME(6) NULL AFTER timestamp, '
+                'ALGORITHM=INPLACE, LOCK=NONE'
+            )
+
+        updated = self.backfill_activity_at(conn)
+        if updated:
+            print(f"✅ activity_at preenchido em {updated} registro(s)")
+
+        # Bases antigas têm category TEXT, que não pode ser indexado por
+        # inteiro. Converter a coluna seria um ALTER com cópia da tabela
+        # (bloqueia gravações) e exigiria truncar valores longos; o índice
+        # usa um prefixo do mesmo tamanho do VARCHAR(100) das tabelas novas
+        category = 'category(100)' if columns.get('category', '').endswith('text') else 'category'
+        self.ensure_index(cursor, database_name, 'emissions', 'idx_user_activity', '(user_id, activity_at)')
+        self.ensure_index(
+            cursor, database_name, 'emissions', 'idx_user_category_activity', f'(user_id, {category}, activity_at)')
+
+    def init_schema(self):
+        # Conectar sem especificar database
+        conn = self._new_connection(use_database=False)
+        database_name = self.config['database']
+        lock_name = f'{database_name}.schema'[:64]
+        locked = False
+        try:
+            cursor = conn.cursor()
+
+            # Vários workers podem chegar aqui ao mesmo tempo no primeiro
+            # acesso; só um aplica o DDL e os demais esperam por ele
+            cursor.execute('SELECT GET_LOCK(%s, %s)', (lock_name, self.schema_lock_timeout))
+            locked = cursor.fetchone()[0] == 1
+            if not locked:
+                raise StorageError('Outra instância está aplicando o esquema')
+
+            # Criar banco de dados se não existir
+            cursor.execute(f"CREATE DATABASE IF NOT EXISTS `{database_name}`")
+            print(f"✅ Banco de dados '{database_name}' verificado/criado")
+
+            # Usar o banco de dados
+            cursor.execute(f"USE `{database_name}`")
+
+            # Quem segurava o lock pode já ter terminado
+            if self.table_exists(cursor, database_name, 'schema_migrations') and \
+                    self.migration_applied(cursor, SCHEMA_MARKER):
+                return
+
+            # Criar tabela de usuários
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS usuarios (
+                    id INT AUTO_INCREMENT PRIMARY KEY,
+                    nome VARCHAR(100) NOT NULL,
+                    email VARCHAR(100) UNIQUE NOT NULL,
+                    senha VARCHAR(255) NOT NULL,
+                    data_cadastro TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    emissions_reset_id BIGINT NOT NULL DEFAULT 0,
+                    INDEX idx_email (email)
+                )
+            ''')
+            print("✅ Tabela 'usuarios' verificada/criada")
+
+            # Criar tabela de emissões
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS emissions (
+                    id INT AUTO_INCREMENT PRIMARY KEY,
+                    user_id INT NOT NULL,
+                    category VARCHAR(100) NOT NULL,
+                    subcategory VARCHAR(100),
+                    quantity DECIMAL(15,2) NOT NULL,
+                    unit VARCHAR(50) NOT NULL,
+                    scope VARCHAR(50) NOT NULL,
+                    emissions_kg DECIMAL(15,2) NOT NULL,
+                    emissions_tons DECIMAL(15,4) NOT NULL,
+                    timestamp VARCHAR(50) NOT NULL,
+                    activity_at DATETIME(6) NULL,
+                    factor_version VARCHAR(32) NULL,
+                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    FOREIGN KEY (user_id) REFERENCES usuarios(id) ON DELETE CASCADE,
+                    INDEX idx_user_id (user_id),
+                    INDEX idx_user_created (user_id, created_at, id),
+                    INDEX idx_user_activity (user_id, activity_at),
+                    INDEX idx_user_category_activity (user_id, category, activity_at),
+                    INDEX idx_factor_version (factor_version, id)
+                )
+            ''')
+            self.ensure_index(cursor, database_name, 'emissions', 'idx_user_created', '(user_id, created_at, id)')
+            print("✅ Tabela 'emissions' verificada/criada")
+
+            # Controle das migrações já aplicadas
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS schema_migrations (
+                    version VARCHAR(100) PRIMARY KEY,
+                    applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                )
+            ''')
+            conn.commit()
+
+            if not self.migration_applied(cursor, 'emissions_activity_at'):
+                print("🔄 Migrando 'emissions' para activity_at DATETIME(6)...")
+                self.migrate_emissions_activity_at(conn, database_name)
+                self.record_migration(conn, 'emissions_activity_at')
+                print("✅ Migração 'emissions_activity_at' concluída")
+
+            # Versão dos fatores usada em cada linha; NULL = linhas anteriores
+            # ao registro de fatores (calculadas com a versão inicial)
+            if not self.migration_applied(cursor, 'emissions_factor_version'):
+                print("🔄 Migrando 'emissions' para factor_version...")
+                if 'factor_version' not in self.column_types(cursor, database_name, 'emissions'):
+                    cursor.execute(
+                        'ALTER TABLE emissions ADD COLUMN factor_version VARCHAR(32) NULL AFTER activity_at, '
+                        'ALGORITHM=INPLACE, LOCK=NONE'
+                    )
+                self.ensure_index(cursor, database_name, 'emissions', 'idx_factor_version', '(factor_version, id)')
+                self.record_migration(conn, 'emissions_factor_version')
+                print("✅ Migração 'emissions_factor_version' concluída")
+
+            # Marca d'água do reset: emissões do usuário com id até este valor
+            # ficam ocultas até serem apagadas em segundo plano
+            if not self.migration_applied(cursor, 'usuarios_emissions_reset_id'):
+                if 'emissions_reset_id' not in self.column_types(cursor, database_name, 'usuarios'):
+                    cursor.execute(
+                        'ALTER TABLE usuarios ADD COLUMN emissions_reset_id BIGINT NOT NULL DEFAULT 0, '
+                        'ALGORITHM=INSTANT'
+                    )
+                self.record_migration(conn, 'usuarios_emissions_reset_id')
+                print("✅ Migração 'usuarios_emissions_reset_id' concluída")
+
+            # Organizações (contas de empresa) e seus membros
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS organizations (
+                    id INT AUTO_INCREMENT PRIMARY KEY,
+                    name VARCHAR(100) NOT NULL,
+                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                )
+            ''')
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS organization_members (
+                    org_id INT NOT NULL,
+                    user_id INT NOT NULL,
+                    role VARCHAR(20) NOT NULL DEFAULT 'member',
+                    joined_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    PRIMARY KEY (org_id, user_id),
+                    INDEX idx_members_user (user_id, org_id),
+                    FOREIGN KEY (org_id) REFERENCES organizations(id) ON DELETE CASCADE,
+                    FOREIGN KEY (user_id) REFERENCES usuarios(id) ON DELETE CASCADE
+                )
+            ''')
+            # Convites pendentes; só viram membros quando o convidado aceita
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS organization_invitations (
+                    org_id INT NOT NULL,
+                    user_id INT NOT NULL,
+                    role VARCHAR(20) NOT NULL DEFAULT 'member',
+                    invited_by INT NULL,
+                    invited_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    PRIMARY KEY (org_id, user_id),
+                    INDEX idx_invitations_user (user_id, org_id),
+                    FOREIGN KEY (org_id) REFERENCES organizations(id) ON DELETE CASCADE,
+                    FOREIGN KEY (user_id) REFERENCES usuarios(id) ON DELETE CASCADE,
+                    FOREIGN KEY (invited_by) REFERENCES usuarios(id) ON DELETE SET NULL
+                )
+            ''')
+            # Rollup por (organização, categoria, escopo): soma dos rollups dos
+            # membros, mantida pelas mesmas gravações
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS org_rollups (
+                    org_id INT NOT NULL,
+                    category VARCHAR(100) NOT NULL,
+                    scope VARCHAR(50) NOT NULL,
+                    total_kg DECIMAL(20,2) NOT NULL DEFAULT 0,
+                    total_tons DECIMAL(20,4) NOT NULL DEFAULT 0,
+                    entries BIGINT NOT NULL DEFAULT 0,
+                    PRIMARY KEY (org_id, category, scope),
+                    FOREIGN KEY (org_id) REFERENCES organizations(id) ON DELETE CASCADE
+                )
+            ''')
+            print("✅ Tabelas de organizações verificadas/criadas")
+
+            # Rollup por (usuário, categoria, escopo) mantido junto com as gravações
+            rollup_exists = self.table_exists(cursor, database_name, 'emission_rollups')
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS emission_rollups (
+                    user_id INT NOT NULL,
+                    category VARCHAR(100) NOT NULL,
+                    scope VARCHAR(50) NOT NULL,
+                    total_kg DECIMAL(20,2) NOT NULL DEFAULT 0,
+                    total_tons DECIMAL(20,4) NOT NULL DEFAULT 0,
+                    entries BIGINT NOT NULL DEFAULT 0,
+                    PRIMARY KEY (user_id, category, scope),
+                    FOREIGN KEY (user_id) REFERENCES usuarios(id) ON DELETE CASCADE
+                )
+            ''')
+            conn.commit()
+            if not rollup_exists:
+                print("🔄 Preenchendo 'emission_rollups' a partir de 'emissions'...")
+                self.rebuild_rollups(conn=conn)
+            print("✅ Tabela 'emission_rollups' verificada/criada")
+
+            # Ids já gravados pela fila de gravação adiada (deduplicação no replay)
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS ingest_log (
+                    ingest_id CHAR(32) PRIMARY KEY,
+                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    INDEX idx_ingest_created (created_at)
+                )
+            ''')
+            print("✅ Tabela 'ingest_log' verificada/criada")
+
+            # Estado de jobs de longa duração (importações, recálculos, resets)
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS jobs (
+                    id CHAR(32) PRIMARY KEY,
+                    user_id INT NULL,
+                    kind VARCHAR(50) NOT NULL,
+                    status VARCHAR(20) NOT NULL,
+                    state MEDIUMTEXT NOT NULL,
+                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+                    INDEX idx_jobs_user (user_id, created_at),
+                    INDEX idx_jobs_kind_status (kind, status)
+                )
+            ''')
+            print("✅ Tabela 'jobs' verificada/criada")
+
+            self._mark_schema_current(cursor)
+            conn.commit()
+        finally:
+            try:
+                if locked:
+                    conn.cursor().execute('DO RELEASE_LOCK(%s)', (lock_name,))
+            finally:
+                conn.close()
+
+
+def _convert_datetime(value):
+    return datetime.fromisoformat(value.decode('utf-8'))
+
+
+# Motor SQLite (modo WAL) para desenvolvimento, testes de carga sem Aiven
+# e instalações de um único nó
+class SQLiteStorage(SQLStorage):
+    name = 'sqlite'
+    label = 'SQLite'
+    insert_ignore = 'INSERT OR IGNORE'
+    # Sem FOR UPDATE: BEGIN IMMEDIATE já reserva a escrita do banco inteiro
+    lock_rows = ''
+
+    bucket_expressions = {
+        'day': "date(activity_at)",
+        'week': "date(activity_at, '-6 days', 'weekday 1')",
+        'month': "strftime('%Y-%m-01', activity_at)"
+    }
+
+    rollup_upsert_sql = '''
+        INSERT INTO emission_rollups (user_id, category, scope, total_kg, total_tons, entries)
+        VALUES (%s, %s, %s, %s, %s, %s)
+        ON CONFLICT (user_id, category, scope) DO UPDATE SET
+            total_kg = total_kg + excluded.total_kg,
+            total_tons = total_tons + excluded.total_tons,
+            entries = entries + excluded.entries
+    '''
+
+    org_rollup_upsert_sql = '''
+        INSERT INTO org_rollups (org_id, category, scope, total_kg, total_tons, entries)
+        VALUES (%s, %s, %s, %s, %s, %s)
+        ON CONFLICT (org_id, category, scope) DO UPDATE SET
+            total_kg = total_kg + excluded.total_kg,
+            total_tons = total_tons + excluded.total_tons,
+            entries = entries + excluded.entries
+    '''
+
+    job_upsert_sql = '''
+        INSERT INTO jobs (id, user_id, kind, status, state)
+        VALUES (%s, %s, %s, %s, %s)
+        ON CONFLICT (id) DO UPDATE SET
+            status = excluded.status,
+            state = excluded.state,
+            updated_at = CURRENT_TIMESTAMP
+    '''
+
+    def __init__(self, path, pool_options=None, insert_chunk=500, busy_timeout=5000):
+        self.path = path
+        self.busy_timeout = busy_timeout
+
+        # Importado aqui: o motor MySQL (padrão na Vercel) não paga o import
+        import sqlite3
+        sqlite3.register_adapter(datetime, lambda value: value.isoformat(' '))
+        sqlite3.register_adapter(Decimal, float)
+        sqlite3.register_converter('DATETIME', _convert_datetime)
+        sqlite3.register_converter('TIMESTAMP', _convert_datetime)
+
+        pool = ConnectionPool(self._new_connection, **(pool_options or {}))
+        super().__init__(pool, insert_chunk)
+
+    def _new_connection(self):
+        import sqlite3
+        conn = sqlite3.connect(
+            self.path,
+            timeout=self.busy_timeout / 1000,
+            detect_types=sqlite3.PARSE_DECLTYPES,
+            check_same_thread=False
+        )
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute('PRAGMA synchronous=NORMAL')
+        conn.execute('PRAGMA foreign_keys=ON')
+        conn.execute(f'PRAGMA busy_timeout={int(self.busy_timeout)}')
+        return conn
+
+    def _sql(self, query):
+        return query.replace('%s', '?')
+
+    def _begin_write(self, cursor):
+        cursor.execute('BEGIN IMMEDIATE')
+
+    def prune_ingest_log(self, retention_days):
+        with self.connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(
+                "DELETE FROM ingest_log WHERE created_at < datetime('now', ?)",
+                (f'-{int(retention_days)} days',)
+            )
+            conn.commit()
+
+    def init_schema(self):
+        directory = os.path.dirname(os.path.abspath(self.path))
+        os.makedirs(directory, exist_ok=True)
+
+        with self.connection() as conn:
+            cursor = conn.cursor()
+
+            # O emissions.db antigo do repositório tem uma tabela sem user_id
+            cursor.execute('PRAGMA table_info(emissions)')
+            columns = {row[1] for row in cursor.fetchall()}
+            if columns and 'user_id' not in columns:
+                cursor.execute('ALTER TABLE emissions RENAME TO emissions_legacy')
+                print("⚠️ Tabela 'emissions' antiga renomeada para 'emissions_legacy'")
+
+            cursor.executescript('''
+                CREATE TABLE IF NOT EXISTS usuarios (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    nome TEXT NOT NULL,
+                    email TEXT UNIQUE NOT NULL,
+                    senha TEXT NOT NULL,
+                    data_cadastro TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    emissions_reset_id INTEGER NOT NULL DEFAULT 0
+                );
+
+                CREATE TABLE IF NOT EXISTS emissions (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    user_id INTEGER NOT NULL REFERENCES usuarios(id) ON DELETE CASCADE,
+                    category TEXT NOT NULL,
+                    subcategory TEXT,
+                    quantity REAL NOT NULL,
+                    unit TEXT NOT NULL,
+                    scope TEXT NOT NULL,
+                    emissions_kg REAL NOT NULL,
+                    emissions_tons REAL NOT NULL,
+                    timestamp TEXT NOT NULL,
+                    activity_at DATETIME,
+                    factor_version TEXT,
+                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                );
+                CREATE INDEX IF NOT EXISTS idx_emissions_user_created ON emissions (user_id, created_at, id);
+                CREATE INDEX IF NOT EXISTS idx_emissions_user_activity ON emissions (user_id, activity_at);
+                CREATE INDEX IF NOT EXISTS idx_emissions_user_category_activity ON emissions (user_id, category, activity_at);
+
+                CREATE TABLE IF NOT EXISTS schema_migrations (
+                    version TEXT PRIMARY KEY,
+                    applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                );
+
+                CREATE TABLE IF NOT EXISTS emission_rollups (
+                    user_id INTEGER NOT NULL REFERENCES usuarios(id) ON DELETE CASCADE,
+                    category TEXT NOT NULL,
+                    scope TEXT NOT NULL,
+                    total_kg REAL NOT NULL DEFAULT 0,
+                    total_tons REAL NOT NULL DEFAULT 0,
+                    entries INTEGER NOT NULL DEFAULT 0,
+                    PRIMARY KEY (user_id, category, scope)
+                );
+
+                CREATE TABLE IF NOT EXISTS organizations (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    name TEXT NOT NULL,
+                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                );
+
+                CREATE TABLE IF NOT EXISTS organization_members (
+                    org_id INTEGER NOT NULL REFERENCES organizations(id) ON DELETE CASCADE,
+                    user_id INTEGER NOT NULL REFERENCES usuarios(id) ON DELETE CASCADE,
+                    role TEXT NOT NULL DEFAULT 'member',
+                    joined_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    PRIMARY KEY (org_id, user_id)
+                );
+                CREATE INDEX IF NOT EXISTS idx_members_user ON organization_members (user_id, org_id);
+
+                CREATE TABLE IF NOT EXISTS organization_invitations (
+                    org_id INTEGER NOT NULL REFERENCES organizations(id) ON DELETE CASCADE,
+                    user_id INTEGER NOT NULL REFERENCES usuarios(id) ON DELETE CASCADE,
+                    role TEXT NOT NULL DEFAULT 'member',
+                    invited_by INTEGER NULL REFERENCES usuarios(id) ON DELETE SET NULL,
+                    invited_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    PRIMARY KEY (org_id, user_id)
+                );
+                CREATE INDEX IF NOT EXISTS idx_invitations_user ON organization_invitations (user_id, org_id);
+
+                CREATE TABLE IF NOT EXISTS org_rollups (
+                    org_id INTEGER NOT NULL REFERENCES organizations(id) ON DELETE CASCADE,
+                    category TEXT NOT NULL,
+                    scope TEXT NOT NULL,
+                    total_kg REAL NOT NULL DEFAULT 0,
+                    total_tons REAL NOT NULL DEFAULT 0,
+                    entries INTEGER NOT NULL DEFAULT 0,
+                    PRIMARY KEY (org_id, category, scope)
+                );
+
+                CREATE TABLE IF NOT EXISTS ingest_log (
+                    ingest_id TEXT PRIMARY KEY,
+                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                );
+                CREATE INDEX IF NOT EXISTS idx_ingest_created ON ingest_log (created_at);
+
+                CREATE TABLE IF NOT EXISTS jobs (
+                    id TEXT PRIMARY KEY,
+                    user_id INTEGER,
+                    kind TEXT NOT NULL,
+                    status TEXT NOT NULL,
+                    state TEXT NOT NULL,
+                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                );
+                CREATE INDEX IF NOT EXISTS idx_jobs_user ON jobs (user_id, created_at);
+                CREATE INDEX IF NOT EXISTS idx_jobs_kind_status ON jobs (kind, status);
+            ''')
+            # Bancos criados antes do registro de fatores e do reset em lotes
+            cursor.execute('PRAGMA table_info(emissions)')
+            if 'factor_version' not in {row[1] for row in cursor.fetchall()}:
+                cursor.execute('ALTER TABLE emissions ADD COLUMN factor_version TEXT')
+            cursor.execute('PRAGMA table_info(usuarios)')
+            if 'emissions_reset_id' not in {row[1] for row in cursor.fetchall()}:
+                cursor.execute('ALTER TABLE usuarios ADD COLUMN emissions_reset_id INTEGER NOT NULL DEFAULT 0')
+            cursor.execute('CREATE INDEX IF NOT EXISTS idx_emissions_factor_version ON emissions (factor_version, id)')
+
+            self._mark_schema_current(cursor)
+            conn.commit()
+        print(f"✅ Banco SQLite '{self.path}' verificado/criado (WAL)")
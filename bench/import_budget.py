@@ -0,0 +1,70 @@
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+# Orçamento de cold start: importa api/app.py em processos novos (como numa
+# instância fria da Vercel), mede o tempo de import e falha se a mediana
+# passar do orçamento ou se algum módulo pesado for importado cedo demais.
+#
+#   python bench/import_budget.py --budget-ms 400
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Módulos que só devem ser importados quando usados
+LAZY_MODULES = ('mysql.connector', 'numpy', 'redis', 'sqlite3')
+
+PROBE = '''
+import json, sys, time
+sys.path.insert(0, sys.argv[1])
+started = time.perf_counter()
+import app
+elapsed = time.perf_counter() - started
+print(json.dumps({
+    'import_ms': elapsed * 1000,
+    'loaded': [name for name in sys.argv[2:] if name in sys.modules]
+}))
+'''
+
+
+def measure(runs):
+    # Ambiente de produção: motor MySQL e nenhuma variável de benchmark
+    env = {key: value for key, value in os.environ.items() if key not in ('STORAGE_BACKEND', 'SQLITE_PATH')}
+    env['STORAGE_BACKEND'] = 'mysql'
+    samples = []
+    for _ in range(runs):
+        output = subprocess.check_output(
+            [sys.executable, '-c', PROBE, os.path.join(ROOT, 'api'), *LAZY_MODULES],
+            env=env, cwd=ROOT, stderr=subprocess.DEVNULL
+        )
+        samples.append(json.loads(output.decode().strip().splitlines()[-1]))
+    return samples
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Orçamento de tempo de import do app')
+    parser.add_argument('--budget-ms', type=float, default=float(os.environ.get('IMPORT_BUDGET_MS', '400')))
+    parser.add_argument('--runs', type=int, default=5)
+    args = parser.parse_args(argv)
+
+    samples = measure(args.runs)
+    median = statistics.median(sample['import_ms'] for sample in samples)
+    eager = sorted({name for sample in samples for name in sample['loaded']})
+
+    print(f"import api/app.py: mediana {median:.1f} ms em {args.runs} execuções (orçamento {args.budget_ms:.0f} ms)")
+    failed = False
+    if median > args.budget_ms:
+        print("❌ Tempo de import acima do orçamento")
+        failed = True
+    if eager:
+        print(f"❌ Módulos importados no carregamento: {', '.join(eager)}")
+        failed = True
+    if not failed:
+        print("✅ Dentro do orçamento")
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,270 @@
+import argparse
+import json
+import math
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+# Benchmarks do EcoTrace: vazão do CarbonCalculator e latência ponta a ponta
+# das rotas pelo test client do Flask, sobre um banco SQLite local populado
+# com N linhas. Os resultados vão para JSON e podem ser comparados com uma
+# linha de base anterior.
+#
+#   python bench/run.py --rows 100000 --output bench/results/base.json
+#   python bench/run.py --rows 100000 --baseline bench/results/base.json
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+ACTIVITY_MIX = [
+    ('energy', 'grid_brazil', 'kwh', 'direct'),
+    ('energy', 'solar', 'kwh', 'indirect'),
+    ('transport', 'diesel_car', 'km', 'direct'),
+    ('transport', 'airplane', 'km', 'other'),
+    ('materials', 'steel', 'ton', 'indirect'),
+    ('materials', 'unknown', 'kg', 'direct'),
+    ('waste', 'recycling', 'kg', 'other'),
+    ('water', 'wastewater', 'liter', 'indirect'),
+]
+
+
+# Percentil pelo método nearest-rank
+def percentile(sorted_values, pct):
+    if not sorted_values:
+        return 0.0
+    rank = max(1, math.ceil(pct / 100 * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+
+# Latências em segundos -> resumo em ms; rows_per_sec usa o total de linhas
+# processadas (uma por chamada quando não informado)
+def summarize(latencies, rows=None, elapsed=None):
+    ordered = sorted(latencies)
+    elapsed = elapsed if elapsed is not None else sum(latencies)
+    rows = rows if rows is not None else len(latencies)
+    return {
+        'count': len(latencies),
+        'p50_ms': round(percentile(ordered, 50) * 1000, 4),
+        'p95_ms': round(percentile(ordered, 95) * 1000, 4),
+        'p99_ms': round(percentile(ordered, 99) * 1000, 4),
+        'mean_ms': round(elapsed / len(latencies) * 1000, 4) if latencies else 0.0,
+        'rows': rows,
+        'rows_per_sec': round(rows / elapsed, 1) if elapsed else 0.0
+    }
+
+
+def random_activity(rng):
+    category, subcategory, unit, scope = rng.choice(ACTIVITY_MIX)
+    return {
+        'category': category,
+        'subcategory': subcategory,
+        'unit': unit,
+        'scope': scope,
+        'quantity': round(rng.uniform(0.1, 5000), 2)
+    }
+
+
+def bench_calculator_scalar(app_module, iterations, rng):
+    activities = [random_activity(rng) for _ in range(iterations)]
+    calculator = app_module.calculator
+    latencies = []
+    start = time.perf_counter()
+    for activity in activities:
+        t0 = time.perf_counter()
+        calculator.calculate_emissions(**activity)
+        latencies.append(time.perf_counter() - t0)
+    return summarize(latencies, elapsed=time.perf_counter() - start)
+
+
+def bench_calculator_bulk(app_module, batch_size, repeats, rng):
+    activities = [random_activity(rng) for _ in range(batch_size)]
+    columns = [[activity[field] for activity in activities]
+               for field in ('category', 'subcategory', 'unit', 'scope', 'quantity')]
+    latencies = []
+    for _ in range(repeats):
+        t0 = time.perf_counter()
+        app_module.calculator.calculate_emissions_bulk(*columns)
+        latencies.append(time.perf_counter() - t0)
+    return summarize(latencies, rows=batch_size * repeats)
+
+
+def seed(app_module, user_id, rows, rng, chunk=10000):
+    # Atividades espalhadas pelo último ano; inseridas pelo próprio
+    # armazenamento para que o rollup também fique populado
+    now = datetime.now()
+    inserted = 0
+    started = time.perf_counter()
+    while inserted < rows:
+        size = min(chunk, rows - inserted)
+        activities = [random_activity(rng) for _ in range(size)]
+        results = app_module.calculate_activities(activities)
+        for result in results:
+            result['timestamp'] = (now - timedelta(seconds=rng.randrange(365 * 86400))).isoformat()
+        app_module.storage.insert_emissions(user_id, results)
+        inserted += size
+        print(f"   {inserted}/{rows} linhas", end='\r', flush=True)
+    elapsed = time.perf_counter() - started
+    print(f"✅ {rows} linhas inseridas em {elapsed:.1f}s ({rows / elapsed:.0f} linhas/s)")
+    return elapsed
+
+
+def bench_route(client, method, url, requests_count, rows_of=None, payload=None, warmup=5):
+    call = client.post if method == 'POST' else client.get
+    for _ in range(warmup):
+        call(url, json=payload() if payload else None)
+
+    latencies = []
+    rows = 0
+    start = time.perf_counter()
+    for _ in range(requests_count):
+        body = payload() if payload else None
+        t0 = time.perf_counter()
+        response = call(url, json=body)
+        latencies.append(time.perf_counter() - t0)
+        if response.status_code >= 400:
+            raise RuntimeError(f'{method} {url} devolveu {response.status_code}: {response.get_data(as_text=True)[:200]}')
+        rows += rows_of(response) if rows_of else 1
+    return summarize(latencies, rows=rows, elapsed=time.perf_counter() - start)
+
+
+def git_commit():
+    try:
+        return subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT,
+                                       stderr=subprocess.DEVNULL).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+# Compara p95 e rows_per_sec com a linha de base; devolve os benchmarks que
+# pioraram além da tolerância
+def compare(results, baseline, tolerance):
+    regressions = []
+    print(f"\n{'benchmark':<28}{'p95 base':>12}{'p95 atual':>12}{'Δ':>9}{'rows/s base':>14}{'rows/s atual':>14}")
+    for name, current in results['results'].items():
+        previous = baseline.get('results', {}).get(name)
+        if not previous:
+            continue
+        base_p95 = previous['p95_ms'] or 1e-9
+        change = (current['p95_ms'] - base_p95) / base_p95
+        print(f"{name:<28}{previous['p95_ms']:>12.3f}{current['p95_ms']:>12.3f}{change:>+9.1%}"
+              f"{previous['rows_per_sec']:>14.0f}{current['rows_per_sec']:>14.0f}")
+        if change > tolerance:
+            regressions.append(name)
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmarks do EcoTrace')
+    parser.add_argument('--rows', type=int, default=10000, help='Linhas de emissões no banco (10k a 10M)')
+    parser.add_argument('--requests', type=int, default=200, help='Requisições por rota')
+    parser.add_argument('--calc-iterations', type=int, default=100000, help='Chamadas a calculate_emissions')
+    parser.add_argument('--bulk-size', type=int, default=10000, help='Linhas por chamada de calculate_emissions_bulk')
+    parser.add_argument('--page-size', type=int, default=500, help='limit usado em /api/emissions/user')
+    parser.add_argument('--db', default=None, help='Arquivo SQLite (padrão: temporário)')
+    parser.add_argument('--reuse-db', action='store_true', help='Não popular de novo se o banco já tiver as linhas')
+    parser.add_argument('--cache', action='store_true', help='Mantém o cache de respostas ligado')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--output', default=None, help='Arquivo JSON com os resultados')
+    parser.add_argument('--baseline', default=None, help='JSON de uma execução anterior para comparar')
+    parser.add_argument('--tolerance', type=float, default=0.15, help='Piora aceitável de p95 (0.15 = 15%%)')
+    parser.add_argument('--only', default=None, help='Lista de benchmarks separados por vírgula')
+    args = parser.parse_args(argv)
+
+    db_path = args.db or os.path.join(tempfile.mkdtemp(prefix='ecotrace-bench-'), 'bench.sqlite3')
+    reuse = args.reuse_db and os.path.exists(db_path)
+    if os.path.exists(db_path) and not reuse:
+        for suffix in ('', '-wal', '-shm'):
+            if os.path.exists(db_path + suffix):
+                os.remove(db_path + suffix)
+
+    # Configuração antes de importar o app: SQLite local, sem cache por padrão
+    # (senão as leituras repetidas medem só o cache) e gravação síncrona
+    os.environ['STORAGE_BACKEND'] = 'sqlite'
+    os.environ['SQLITE_PATH'] = db_path
+    os.environ['WRITE_BEHIND'] = '0'
+    os.environ.setdefault('CACHE_ENABLED', '1' if args.cache else '0')
+    sys.path.insert(0, os.path.join(ROOT, 'api'))
+
+    import_start = time.perf_counter()
+    import app as app_module
+    import_seconds = time.perf_counter() - import_start
+
+    if not app_module.init_db():
+        print("❌ Não foi possível inicializar o banco de benchmark")
+        return 2
+
+    selected = set(args.only.split(',')) if args.only else None
+    rng = random.Random(args.seed)
+    results = {
+        'meta': {
+            'created_at': datetime.now().isoformat(timespec='seconds'),
+            'commit': git_commit(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'storage': app_module.storage.name,
+            'rows': args.rows,
+            'requests': args.requests,
+            'cache': app_module.response_cache.enabled,
+            'import_ms': round(import_seconds * 1000, 2)
+        },
+        'results': {}
+    }
+
+    def wanted(name):
+        return selected is None or name in selected
+
+    if wanted('calculator_scalar'):
+        results['results']['calculator_scalar'] = bench_calculator_scalar(app_module, args.calc_iterations, rng)
+    if wanted('calculator_bulk'):
+        results['results']['calculator_bulk'] = bench_calculator_bulk(
+            app_module, args.bulk_size, max(1, args.calc_iterations // args.bulk_size), rng)
+
+    client = app_module.app.test_client()
+    account = {'nome': 'Benchmark', 'email': 'bench@ecotrace.local', 'senha': 'bench'}
+    response = client.post('/api/login', json={'email': account['email'], 'senha': account['senha']})
+    if response.status_code != 200:
+        response = client.post('/api/register', json=account)
+    user_id = response.get_json()['user']['id']
+
+    if not reuse:
+        results['meta']['seed_seconds'] = round(seed(app_module, user_id, args.rows, rng), 2)
+
+    if wanted('api_calculate'):
+        results['results']['api_calculate'] = bench_route(
+            client, 'POST', '/api/calculate', args.requests, payload=lambda: random_activity(rng))
+    if wanted('api_emissions_user'):
+        results['results']['api_emissions_user'] = bench_route(
+            client, 'GET', f'/api/emissions/user?limit={args.page_size}', args.requests,
+            rows_of=lambda response: response.get_json()['total'])
+    if wanted('api_emissions_summary'):
+        results['results']['api_emissions_summary'] = bench_route(
+            client, 'GET', '/api/emissions/summary', args.requests)
+
+    print(f"\n{'benchmark':<28}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'rows/s':>14}")
+    for name, item in results['results'].items():
+        print(f"{name:<28}{item['p50_ms']:>10.3f}{item['p95_ms']:>10.3f}{item['p99_ms']:>10.3f}{item['rows_per_sec']:>14.0f}")
+
+    if args.output:
+        os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f"\n✅ Resultados gravados em {args.output}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.tolerance)
+        if regressions:
+            print(f"\n❌ Regressão acima de {args.tolerance:.0%} em: {', '.join(regressions)}")
+            return 1
+        print("\n✅ Sem regressões em relação à linha de base")
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
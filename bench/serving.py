@@ -0,0 +1,262 @@
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import signal
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.request
+from datetime import datetime
+
+from run import ROOT, compare, git_commit, random_activity, summarize
+
+# Vazão por servidor: sobe o app com gunicorn (WSGI, workers síncronos) e com
+# uvicorn (modo ASGI, api/asgi.py), gera carga HTTP concorrente nas rotas
+# quentes e mede requisições/s e requisições por segundo de CPU dos
+# processos do servidor (a medida "por núcleo"). Usa o banco configurado no
+# ambiente (AIVEN_*): o modo ASGI só tem driver assíncrono para MySQL.
+#
+#   python bench/serving.py --workers 2 --concurrency 64 --duration 20
+#   python bench/serving.py --servers uvicorn --baseline bench/results/serving.json
+
+SERVERS = {
+    'gunicorn': lambda port, workers: [
+        sys.executable, '-m', 'gunicorn', 'api.app:app', '--bind', f'127.0.0.1:{port}',
+        '--workers', str(workers), '--log-level', 'warning'
+    ],
+    'uvicorn': lambda port, workers: [
+        sys.executable, '-m', 'uvicorn', 'api.asgi:app', '--host', '127.0.0.1', '--port', str(port),
+        '--workers', str(workers), '--log-level', 'warning', '--no-access-log'
+    ],
+}
+
+ROUTES = {
+    'calculate': ('POST', '/api/calculate'),
+    'summary': ('GET', '/api/emissions/summary'),
+    'user': ('GET', '/api/emissions/user?limit=50'),
+}
+
+ACCOUNT = {'nome': 'Benchmark', 'email': 'bench-serving@ecotrace.local', 'senha': 'bench'}
+
+
+def wait_ready(port, timeout=60):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            urllib.request.urlopen(f'http://127.0.0.1:{port}/api/health/live', timeout=1).read()
+            return True
+        except (urllib.error.URLError, OSError):
+            time.sleep(0.2)
+    return False
+
+
+def login(port):
+    def post(path, payload):
+        request = urllib.request.Request(
+            f'http://127.0.0.1:{port}{path}', data=json.dumps(payload).encode('utf-8'),
+            headers={'Content-Type': 'application/json'}, method='POST'
+        )
+        try:
+            return urllib.request.urlopen(request, timeout=30)
+        except urllib.error.HTTPError as e:
+            return e
+
+    response = post('/api/login', {'email': ACCOUNT['email'], 'senha': ACCOUNT['senha']})
+    if response.status != 200:
+        post('/api/register', ACCOUNT)
+        response = post('/api/login', {'email': ACCOUNT['email'], 'senha': ACCOUNT['senha']})
+    if response.status != 200:
+        raise RuntimeError(f'Login do benchmark falhou: {response.status}')
+    return response.headers['Set-Cookie'].split(';', 1)[0]
+
+
+# Tempo de CPU (s) do processo e de todos os descendentes, via /proc
+def cpu_seconds(root_pid):
+    children = {}
+    stats = {}
+    for entry in os.listdir('/proc'):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f'/proc/{entry}/stat') as f:
+                fields = f.read().rsplit(')', 1)[1].split()
+        except OSError:
+            continue
+        pid = int(entry)
+        children.setdefault(int(fields[1]), []).append(pid)
+        stats[pid] = int(fields[11]) + int(fields[12])
+
+    total = 0
+    pending = [root_pid]
+    while pending:
+        pid = pending.pop()
+        total += stats.get(pid, 0)
+        pending.extend(children.get(pid, []))
+    return total / os.sysconf('SC_CLK_TCK')
+
+
+# Cliente HTTP/1.1 mínimo com keep-alive (reabre se o servidor fechar)
+class Connection:
+    def __init__(self, port):
+        self.port = port
+        self.reader = None
+        self.writer = None
+
+    async def request(self, method, path, cookie, body=None):
+        if self.writer is None:
+            self.reader, self.writer = await asyncio.open_connection('127.0.0.1', self.port)
+        payload = body or b''
+        head = (
+            f'{method} {path} HTTP/1.1\r\nHost: 127.0.0.1\r\nCookie: {cookie}\r\n'
+            f'Content-Type: application/json\r\nContent-Length: {len(payload)}\r\n\r\n'
+        )
+        self.writer.write(head.encode('latin-1') + payload)
+        await self.writer.drain()
+
+        status = int((await self.reader.readline()).split()[1])
+        length = 0
+        close = False
+        while True:
+            line = (await self.reader.readline()).decode('latin-1').strip()
+            if not line:
+                break
+            name, _, value = line.partition(':')
+            name = name.lower()
+            if name == 'content-length':
+                length = int(value)
+            elif name == 'connection' and value.strip().lower() == 'close':
+                close = True
+        await self.reader.readexactly(length)
+        if close:
+            self.close()
+        return status
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+            self.writer = None
+
+
+async def load(port, cookie, method, path, concurrency, duration, rng):
+    latencies = []
+    errors = 0
+    deadline = time.perf_counter() + duration
+
+    async def client():
+        nonlocal errors
+        connection = Connection(port)
+        while time.perf_counter() < deadline:
+            body = json.dumps(random_activity(rng)).encode('utf-8') if method == 'POST' else None
+            started = time.perf_counter()
+            try:
+                status = await connection.request(method, path, cookie, body)
+            except (OSError, asyncio.IncompleteReadError, ValueError, IndexError):
+                connection.close()
+                errors += 1
+                continue
+            latencies.append(time.perf_counter() - started)
+            if status >= 400:
+                errors += 1
+        connection.close()
+
+    started = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(concurrency)))
+    return latencies, errors, time.perf_counter() - started
+
+
+def bench_server(name, args, rng):
+    env = dict(os.environ)
+    env.setdefault('WRITE_BEHIND', '0')
+    env.setdefault('CACHE_ENABLED', '1' if args.cache else '0')
+    process = subprocess.Popen(SERVERS[name](args.port, args.workers), cwd=ROOT, env=env, start_new_session=True)
+    results = {}
+    try:
+        if not wait_ready(args.port):
+            raise RuntimeError(f'{name} não respondeu em /api/health/live')
+        cookie = login(args.port)
+
+        for route in args.routes.split(','):
+            method, path = ROUTES[route]
+            # Aquecimento: conexões dos pools e caminhos quentes
+            asyncio.run(load(args.port, cookie, method, path, args.concurrency, min(2.0, args.duration), rng))
+
+            cpu_before = cpu_seconds(process.pid)
+            latencies, errors, elapsed = asyncio.run(
+                load(args.port, cookie, method, path, args.concurrency, args.duration, rng))
+            cpu = cpu_seconds(process.pid) - cpu_before
+
+            item = summarize(latencies, elapsed=elapsed)
+            item['errors'] = errors
+            item['cpu_seconds'] = round(cpu, 2)
+            item['requests_per_cpu_sec'] = round(len(latencies) / cpu, 1) if cpu else 0.0
+            results[f'{name}_{route}'] = item
+            print(f"   {name:<10}{route:<10}{item['rows_per_sec']:>10.0f} req/s"
+                  f"{item['requests_per_cpu_sec']:>10.0f} req/s·CPU{item['p95_ms']:>10.1f} ms p95  erros {errors}")
+    finally:
+        os.killpg(process.pid, signal.SIGTERM)
+        try:
+            process.wait(timeout=15)
+        except subprocess.TimeoutExpired:
+            os.killpg(process.pid, signal.SIGKILL)
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Vazão do app em gunicorn (WSGI) e uvicorn (ASGI)')
+    parser.add_argument('--servers', default='gunicorn,uvicorn')
+    parser.add_argument('--routes', default='summary,user,calculate')
+    parser.add_argument('--workers', type=int, default=2, help='Workers por servidor')
+    parser.add_argument('--concurrency', type=int, default=64, help='Conexões simultâneas')
+    parser.add_argument('--duration', type=float, default=20.0, help='Segundos por rota')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--cache', action='store_true', help='Mantém o cache de respostas ligado')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--output', default=None, help='Arquivo JSON com os resultados')
+    parser.add_argument('--baseline', default=None, help='JSON de uma execução anterior para comparar')
+    parser.add_argument('--tolerance', type=float, default=0.15, help='Piora aceitável de p95 (0.15 = 15%%)')
+    args = parser.parse_args(argv)
+
+    rng = random.Random(args.seed)
+    results = {
+        'meta': {
+            'created_at': datetime.now().isoformat(timespec='seconds'),
+            'commit': git_commit(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'cpus': os.cpu_count(),
+            'workers': args.workers,
+            'concurrency': args.concurrency,
+            'duration': args.duration,
+            'cache': args.cache
+        },
+        'results': {}
+    }
+
+    for name in args.servers.split(','):
+        print(f"🚀 {name}: {args.workers} workers, {args.concurrency} conexões")
+        results['results'].update(bench_server(name, args, rng))
+
+    if args.output:
+        os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f"\n✅ Resultados gravados em {args.output}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.tolerance)
+        if regressions:
+            print(f"\n❌ Regressão acima de {args.tolerance:.0%} em: {', '.join(regressions)}")
+            return 1
+        print("\n✅ Sem regressões em relação à linha de base")
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,533 @@
+const translations = {
+    pt: {
+        back: "← Voltar",
+        title: "📊 Relatórios de Carbono",
+        subtitle: "Monitoramento e análise das suas emissões de carbono",
+        periodLabel: "Período de análise:",
+        loading: "Carregando dados de emissões...",
+        errorTitle: "Erro ao carregar dados",
+        errorDesc: "Não foi possível carregar os dados. Tente novamente.",
+        noDataTitle: "Nenhum dado encontrado",
+        noDataDesc: "Os registros de carbono aparecerão aqui conforme você adiciona atividades.",
+        impactTitle: "🌍 Impacto Ambiental Equivalente",
+        impactTrees: "árvores necessárias para compensar",
+        impactDesc: "Equivalente a",
+        statTotal: "Emissões Totais de CO₂",
+        statRegistros: "registros no período",
+        statAvg: "Média Diária",
+        statUnitDay: "kg/dia",
+        statBase: "Baseado no período selecionado",
+        statSource: "Maior Fonte",
+        statSourceDesc: "Categoria com mais emissões",
+        statReduction: "Redução Necessária",
+        statMeta: "Para meta sustentável (2kg/dia)",
+        chartTimeline: "📈 Evolução das Emissões",
+        chartDist: "🥧 Distribuição por Categoria",
+        tableTitle: "📋 Registros Detalhados",
+        exportBtn: "📊 Exportar para CSV",
+        colDate: "Data",
+        colCat: "Categoria",
+        colSub: "Subcategoria",
+        colQtd: "Quantidade",
+        colScope: "Escopo",
+        colEmission: "Emissões",
+        // Periodos
+        periodDay: "Último Dia",
+        periodWeek: "Última Semana",
+        periodMonth: "Último Mês",
+        periodQuarter: "Último Trimestre",
+        periodSemester: "Último Semestre",
+        periodYear: "Último Ano",
+        periodAll: "Todos os Registros",
+        // Categorias e Escopos
+        cat_energy: "Energia",
+        cat_transport: "Transporte",
+        cat_materials: "Materiais",
+        cat_waste: "Resíduos",
+        cat_water: "Água",
+        scope_direct: "Direto (Escopo 1)",
+        scope_indirect: "Indireto (Escopo 2)",
+        scope_other: "Outro (Escopo 3)",
+        others: "Outros"
+    },
+    en: {
+        back: "← Back",
+        title: "📊 Carbon Reports",
+        subtitle: "Monitoring and analysis of your carbon emissions",
+        periodLabel: "Analysis period:",
+        loading: "Loading emissions data...",
+        errorTitle: "Error loading data",
+        errorDesc: "Could not load data. Please try again.",
+        noDataTitle: "No data found",
+        noDataDesc: "Carbon records will appear here as you add activities.",
+        impactTitle: "🌍 Equivalent Environmental Impact",
+        impactTrees: "trees needed to offset",
+        impactDesc: "Equivalent to",
+        statTotal: "Total CO₂ Emissions",
+        statRegistros: "records in period",
+        statAvg: "Daily Average",
+        statUnitDay: "kg/day",
+        statBase: "Based on selected period",
+        statSource: "Largest Source",
+        statSourceDesc: "Category with most emissions",
+        statReduction: "Reduction Needed",
+        statMeta: "For sustainable goal (2kg/day)",
+        chartTimeline: "📈 Emissions Evolution",
+        chartDist: "🥧 Category Distribution",
+        tableTitle: "📋 Detailed Records",
+        exportBtn: "📊 Export to CSV",
+        colDate: "Date",
+        colCat: "Category",
+        colSub: "Subcategory",
+        colQtd: "Quantity",
+        colScope: "Scope",
+        colEmission: "Emissions",
+        // Periods
+        periodDay: "Last Day",
+        periodWeek: "Last Week",
+        periodMonth: "Last Month",
+        periodQuarter: "Last Quarter",
+        periodSemester: "Last Semester",
+        periodYear: "Last Year",
+        periodAll: "All Records",
+        // Categories
+        cat_energy: "Energy",
+        cat_transport: "Transport",
+        cat_materials: "Materials",
+        cat_waste: "Waste",
+        cat_water: "Water",
+        scope_direct: "Direct (Scope 1)",
+        scope_indirect: "Indirect (Scope 2)",
+        scope_other: "Other (Scope 3)",
+        others: "Others"
+    },
+    es: {
+        back: "← Volver",
+        title: "📊 Informes de Carbono",
+        subtitle: "Monitoreo y análisis de sus emisiones de carbono",
+        periodLabel: "Período de análisis:",
+        loading: "Cargando datos de emisiones...",
+        errorTitle: "Error al cargar datos",
+        errorDesc: "No se pudieron cargar los datos. Intente nuevamente.",
+        noDataTitle: "No se encontraron datos",
+        noDataDesc: "Los registros de carbono aparecerán aquí a medida que agregue actividades.",
+        impactTitle: "🌍 Impacto Ambiental Equivalente",
+        impactTrees: "árboles necesarios para compensar",
+        impactDesc: "Equivalente a",
+        statTotal: "Emisiones Totales de CO₂",
+        statRegistros: "registros en el período",
+        statAvg: "Promedio Diario",
+        statUnitDay: "kg/día",
+        statBase: "Basado en el período seleccionado",
+        statSource: "Mayor Fuente",
+        statSourceDesc: "Categoría con más emisiones",
+        statReduction: "Reducción Necesaria",
+        statMeta: "Para meta sostenible (2kg/día)",
+        chartTimeline: "📈 Evolución de Emisiones",
+        chartDist: "🥧 Distribución por Categoría",
+        tableTitle: "📋 Registros Detallados",
+        exportBtn: "📊 Exportar a CSV",
+        colDate: "Fecha",
+        colCat: "Categoría",
+        colSub: "Subcategoría",
+        colQtd: "Cantidad",
+        colScope: "Alcance",
+        colEmission: "Emisiones",
+        // Periods
+        periodDay: "Último Día",
+        periodWeek: "Última Semana",
+        periodMonth: "Último Mes",
+        periodQuarter: "Último Trimestre",
+        periodSemester: "Último Semestre",
+        periodYear: "Último Año",
+        periodAll: "Todos los Registros",
+        // Categories
+        cat_energy: "Energía",
+        cat_transport: "Transporte",
+        cat_materials: "Materiales",
+        cat_waste: "Residuos",
+        cat_water: "Agua",
+        scope_direct: "Directo (Alcance 1)",
+        scope_indirect: "Indirecto (Alcance 2)",
+        scope_other: "Otro (Alcance 3)",
+        others: "Otros"
+    }
+};
+
+let currentPeriod = 30;
+let allEmissions = [];
+let seriesData = [];
+let timelineChart = null;
+let distributionChart = null;
+
+// Inicialização
+document.addEventListener('DOMContentLoaded', function() {
+    loadPreferences();
+    initializeDropdown();
+    loadEmissionsData();
+});
+
+// Carrega tema e idioma salvos
+function loadPreferences() {
+    // Tema
+    const savedTheme = localStorage.getItem('theme') || 'light';
+    document.documentElement.setAttribute('data-theme', savedTheme);
+
+    // Idioma
+    const savedLang = localStorage.getItem('language') || 'pt';
+    const t = translations[savedLang];
+
+    // Aplicar textos estáticos
+    if(document.getElementById('btn-back')) document.getElementById('btn-back').innerText = t.back;
+    if(document.getElementById('page-title')) document.getElementById('page-title').innerText = t.title;
+    if(document.getElementById('page-subtitle')) document.getElementById('page-subtitle').innerText = t.subtitle;
+    if(document.getElementById('period-label')) document.getElementById('period-label').innerText = t.periodLabel;
+    if(document.getElementById('loading-text')) document.getElementById('loading-text').innerText = t.loading;
+
+    // Atualizar dropdown com idioma
+    const periodKey = getPeriodKey(currentPeriod);
+    if(t[periodKey]) {
+        document.getElementById('current-period-text').innerText = t[periodKey];
+    }
+
+    // Atualizar itens do dropdown
+    document.querySelectorAll('.dropdown-item').forEach(item => {
+        const key = item.getAttribute('data-i18n');
+        if(t[key]) item.innerText = t[key];
+    });
+}
+
+function getPeriodKey(period) {
+    const map = {
+        '1': 'periodDay', '7': 'periodWeek', '30': 'periodMonth',
+        '90': 'periodQuarter', '180': 'periodSemester', '365': 'periodYear',
+        'all': 'periodAll'
+    };
+    return map[period];
+}
+
+function initializeDropdown() {
+    const dropdownBtn = document.getElementById('periodDropdown');
+    const dropdownContent = document.getElementById('dropdownContent');
+
+    dropdownBtn.addEventListener('click', function(e) {
+        e.stopPropagation();
+        dropdownContent.classList.toggle('show');
+    });
+
+    window.addEventListener('click', function(e) {
+        if (!e.target.closest('.dropdown')) {
+            dropdownContent.classList.remove('show');
+        }
+    });
+
+    const periodItems = document.querySelectorAll('.dropdown-item');
+    periodItems.forEach(item => {
+        item.addEventListener('click', function() {
+            currentPeriod = this.getAttribute('data-period');
+            document.getElementById('current-period-text').innerText = this.innerText;
+            dropdownContent.classList.remove('show');
+            loadEmissionsData();
+        });
+    });
+}
+
+function periodParams() {
+    const params = new URLSearchParams();
+    if (currentPeriod !== 'all') {
+        // Início do dia: o mesmo período gera a mesma URL o dia todo e
+        // aproveita o cache de respostas do servidor
+        const startDate = new Date(Date.now() - (parseInt(currentPeriod) * 24 * 60 * 60 * 1000));
+        startDate.setHours(0, 0, 0, 0);
+        params.set('from', startDate.toISOString());
+    }
+    return params;
+}
+
+async function loadEmissionsData() {
+    const savedLang = localStorage.getItem('language') || 'pt';
+    const t = translations[savedLang];
+
+    try {
+        // Estatísticas e gráficos vêm agregados do servidor; a tabela
+        // mostra só os registros mais recentes do período
+        const seriesParams = periodParams();
+        seriesParams.set('bucket', 'day');
+        const rowsParams = periodParams();
+        rowsParams.set('limit', '100');
+
+        const [seriesResponse, rowsResponse] = await Promise.all([
+            fetch('/api/emissions/timeseries?' + seriesParams.toString()),
+            fetch('/api/emissions/user?' + rowsParams.toString())
+        ]);
+        if (!seriesResponse.ok || !rowsResponse.ok) throw new Error('Erro na API');
+
+        const series = await seriesResponse.json();
+        const rows = await rowsResponse.json();
+        seriesData = series.series || [];
+        allEmissions = rows.emissions || [];
+        displayReport();
+    } catch (error) {
+        console.error(error);
+        document.getElementById('reportsContent').innerHTML = `
+            <div class="no-data">
+                <div class="no-data-icon">⚠️</div>
+                <h3>${t.errorTitle}</h3>
+                <p>${t.errorDesc}</p>
+            </div>
+        `;
+    }
+}
+
+function displayReport() {
+    const savedLang = localStorage.getItem('language') || 'pt';
+    const t = translations[savedLang];
+
+    if (seriesData.length === 0) {
+        document.getElementById('reportsContent').innerHTML = `
+            <div class="no-data">
+                <div class="no-data-icon">🌿</div>
+                <h3>${t.noDataTitle}</h3>
+                <p>${t.noDataDesc}</p>
+            </div>
+        `;
+        return;
+    }
+
+    const stats = calculateStatistics(seriesData, t);
+    const html = generateReportHTML(stats, allEmissions, t);
+    document.getElementById('reportsContent').innerHTML = html;
+
+    setTimeout(() => {
+        createTimelineChart(seriesData, t);
+        createDistributionChart(seriesData, t);
+    }, 50);
+}
+
+function calculateStatistics(series, t) {
+    const totalEmissions = series.reduce((sum, item) => sum + item.emissions_kg, 0);
+    const totalTons = totalEmissions / 1000;
+    const registros = series.reduce((sum, item) => sum + item.entries, 0);
+
+    // Os buckets chegam em ordem crescente de data
+    const daysInPeriod = currentPeriod === 'all' 
+        ? Math.max(1, Math.ceil((new Date() - new Date(series[0].bucket)) / (1000 * 60 * 60 * 24)))
+        : parseInt(currentPeriod);
+
+    const dailyAverage = totalEmissions / Math.max(1, daysInPeriod);
+
+    const byCategory = {};
+    series.forEach(item => {
+        const cat = item.category || 'others';
+        byCategory[cat] = (byCategory[cat] || 0) + item.emissions_kg;
+    });
+
+    let largestSourceKey = Object.keys(byCategory).length > 0
+        ? Object.keys(byCategory).reduce((a, b) => byCategory[a] > byCategory[b] ? a : b)
+        : 'others';
+
+    const largestSource = t['cat_' + largestSourceKey] || largestSourceKey;
+    const treesNeeded = Math.ceil(totalEmissions / 21.77);
+    const reductionNeeded = dailyAverage > 2 ? Math.round(((dailyAverage - 2) / dailyAverage) * 100) : 0;
+
+    return { totalEmissions, totalTons, dailyAverage, largestSource, treesNeeded, reductionNeeded, registros };
+}
+
+function generateReportHTML(stats, data, t) {
+    return `
+        <div class="carbon-impact">
+            <h3>${t.impactTitle}</h3>
+            <div class="impact-value">${stats.treesNeeded} ${t.impactTrees}</div>
+            <div class="impact-description">${t.impactDesc} ${stats.totalTons.toFixed(2)} tCO₂e</div>
+        </div>
+
+        <div class="stats-grid">
+            <div class="stat-card">
+                <h3>${t.statTotal}</h3>
+                <div class="stat-value">${stats.totalEmissions.toFixed(1)}<span class="stat-unit">kg CO₂e</span></div>
+                <div class="stat-change">${stats.registros} ${t.statRegistros}</div>
+            </div>
+            <div class="stat-card">
+                <h3>${t.statAvg}</h3>
+                <div class="stat-value">${stats.dailyAverage.toFixed(2)}<span class="stat-unit">${t.statUnitDay}</span></div>
+                <div class="stat-change">${t.statBase}</div>
+            </div>
+            <div class="stat-card">
+                <h3>${t.statSource}</h3>
+                <div class="stat-value" style="font-size: 1.5em;">${stats.largestSource}</div>
+                <div class="stat-change">${t.statSourceDesc}</div>
+            </div>
+            <div class="stat-card">
+                <h3>${t.statReduction}</h3>
+                <div class="stat-value">${stats.reductionNeeded}<span class="stat-unit">%</span></div>
+                <div class="stat-change">${t.statMeta}</div>
+            </div>
+        </div>
+
+        <div class="charts-container">
+            <div class="chart-card">
+                <h2>${t.chartTimeline}</h2>
+                <div class="chart-container"><canvas id="timelineChart"></canvas></div>
+            </div>
+            <div class="chart-card">
+                <h2>${t.chartDist}</h2>
+                <div class="chart-container"><canvas id="distributionChart"></canvas></div>
+            </div>
+        </div>
+
+        <div class="data-table">
+            <div class="table-header"><h2>${t.tableTitle}</h2></div>
+            ${generateTableHTML(data, t)}
+        </div>
+
+        <div class="export-options">
+            <button class="export-btn" onclick="exportToCSV()">${t.exportBtn}</button>
+        </div>
+    `;
+}
+
+function generateTableHTML(data, t) {
+    let html = `
+        <div class="table-responsive">
+        <table>
+            <thead>
+                <tr>
+                    <th>${t.colDate}</th>
+                    <th>${t.colCat}</th>
+                    <th>${t.colSub}</th>
+                    <th>${t.colQtd}</th>
+                    <th>${t.colScope}</th>
+                    <th>${t.colEmission}</th>
+                </tr>
+            </thead>
+            <tbody>`;
+
+    const sorted = [...data].sort((a, b) => new Date(b.timestamp) - new Date(a.timestamp));
+
+    sorted.forEach(item => {
+        const date = new Date(item.timestamp).toLocaleDateString();
+        const catName = t['cat_' + item.category] || item.category;
+        const scopeName = t['scope_' + item.scope] || item.scope;
+
+        html += `<tr>
+            <td>${date}</td>
+            <td><span class="category-badge badge-${item.category}">${catName}</span></td>
+            <td>${item.subcategory || '-'}</td>
+            <td>${parseFloat(item.quantity).toFixed(2)} ${item.unit}</td>
+            <td>${scopeName}</td>
+            <td><strong>${parseFloat(item.emissions_kg).toFixed(2)} kg</strong></td>
+        </tr>`;
+    });
+    html += `</tbody></table></div>`;
+    return html;
+}
+
+function getChartColors() {
+    const isDark = document.documentElement.getAttribute('data-theme') === 'dark';
+    return {
+        text: isDark ? '#b0b0b0' : '#666666',
+        grid: isDark ? '#505050' : '#e0e0e0',
+        card: isDark ? '#2d2d2d' : '#ffffff'
+    };
+}
+
+function createTimelineChart(series, t) {
+    if(timelineChart) timelineChart.destroy();
+    const ctx = document.getElementById('timelineChart').getContext('2d');
+    const colors = getChartColors();
+
+    const emissionsByDate = {};
+    series.forEach(item => {
+        const d = item.bucket; // YYYY-MM-DD
+        emissionsByDate[d] = (emissionsByDate[d] || 0) + item.emissions_kg;
+    });
+
+    const sortedDates = Object.keys(emissionsByDate).sort();
+    const values = sortedDates.map(d => emissionsByDate[d]);
+
+    // Labels de data formatadas
+    const labels = sortedDates.map(d => {
+        const date = new Date(d);
+        date.setMinutes(date.getMinutes() + date.getTimezoneOffset());
+        return date.toLocaleDateString();
+    });
+
+    timelineChart = new Chart(ctx, {
+        type: 'line',
+        data: {
+            labels: labels,
+            datasets: [{
+                label: t.colEmission + ' (kg)',
+                data: values,
+                borderColor: '#4caf50',
+                backgroundColor: 'rgba(76, 175, 80, 0.1)',
+                fill: true,
+                tension: 0.4
+            }]
+        },
+        options: {
+            responsive: true,
+            maintainAspectRatio: false,
+            scales: {
+                x: { ticks: { color: colors.text }, grid: { color: colors.grid } },
+                y: { ticks: { color: colors.text }, grid: { color: colors.grid } }
+            },
+            plugins: {
+                legend: { labels: { color: colors.text } }
+            }
+        }
+    });
+}
+
+function createDistributionChart(series, t) {
+    if(distributionChart) distributionChart.destroy();
+    const ctx = document.getElementById('distributionChart').getContext('2d');
+    const colors = getChartColors();
+
+    const byCategory = {};
+    series.forEach(item => {
+        const cat = item.category || 'others';
+        byCategory[cat] = (byCategory[cat] || 0) + item.emissions_kg;
+    });
+
+    const keys = Object.keys(byCategory);
+    const labels = keys.map(k => t['cat_' + k] || k);
+    const values = Object.values(byCategory);
+
+    const bgColors = keys.map(k => {
+        const map = { 'energy': '#ff9800', 'transport': '#2196f3', 'materials': '#9c27b0', 'waste': '#009688', 'water': '#03a9f4' };
+        return map[k] || '#757575';
+    });
+
+    distributionChart = new Chart(ctx, {
+        type: 'doughnut',
+        data: {
+            labels: labels,
+            datasets: [{
+                data: values,
+                backgroundColor: bgColors,
+                borderColor: colors.card,
+                borderWidth: 2
+            }]
+        },
+        options: {
+            responsive: true,
+            maintainAspectRatio: false,
+            plugins: {
+                legend: { 
+                    position: 'bottom',
+                    labels: { color: colors.text }
+                }
+            }
+        }
+    });
+}
+
+function exportToCSV() {
+    if(seriesData.length === 0) return alert('Sem dados');
+
+    // O arquivo completo do período é gerado em streaming pelo servidor
+    const params = periodParams();
+    params.set('format', 'csv');
+    window.location.href = '/api/emissions/export?' + params.toString();
+}
@@ -0,0 +1,241 @@
+// Dicionário de traduções
+const translations = {
+    pt: {
+        "nav.about": "Quem somos",
+        "nav.services": "O que oferecemos",
+        "nav.settings": "Configurações",
+        "nav.login": "Entrar",
+        "settings.theme": "Tema",
+        "settings.light": "Claro",
+        "settings.dark": "Escuro",
+        "settings.language": "Idioma",
+        "settings.portuguese": "Português",
+        "settings.english": "English",
+        "settings.spanish": "Español",
+        "hero.title": "TRANSFORMANDO SUSTENTABILIDADE INDUSTRIAL EM RESULTADOS REAIS",
+        "hero.description": "Você sabia que pequenas decisões na produção industrial podem fazer uma grande diferença para o meio ambiente? No nosso jogo interativo, você vai enfrentar desafios reais e aprender como tornar processos industriais mais sustentáveis. Clique e veja se consegue equilibrar crescimento e responsabilidade ambiental!",
+        "hero.learnMore": "Saiba mais",
+        "about.title": "QUEM SOMOS",
+        "about.text1": "Somos a Ecotrace, uma plataforma que une tecnologia avançada e sustentabilidade para trazer precisão, transparência e rastreabilidade à gestão ambiental industrial.",
+        "about.text2": "Nascemos da necessidade de trazer mais transparência, precisão e rastreabilidade aos processos que impactam diretamente o consumo energético e o desempenho operacional.",
+        "about.text3": "Nosso compromisso é oferecer informações confiáveis e suporte estratégico, permitindo decisões mais assertivas, conformidade ambiental e resultados sustentáveis de verdade.",
+        "services.title": "O QUE OFERECEMOS",
+        "services.item1.title": "Compliance Ambiental Automatizado",
+        "services.item1.description": "Garanta conformidade com regulamentações ambientais de forma automatizada e sem complicações.",
+        "services.item2.title": "Monitoramento Energético em Tempo Real",
+        "services.item2.description": "Acompanhe o consumo de energia em tempo real e identifique oportunidades de otimização.",
+        "services.item3.title": "Painéis ESG Confiáveis e Transparentes",
+        "services.item3.description": "Relatórios ESG precisos para demonstrar seu compromisso com a sustentabilidade.",
+        "services.item4.title": "Dados Claros para Decisões Estratégicas",
+        "services.item4.description": "Baseie suas decisões em dados claros e insights acionáveis para melhor desempenho.",
+        "services.item5.title": "Identificação Automática de Desperdícios",
+        "services.item5.description": "Detecte automaticamente fontes de desperdício e implemente correções proativas.",
+        "footer.copyright": "&copy; 2025 Ecotrace. Todos os direitos reservados."
+    },
+    en: {
+        "nav.about": "About Us",
+        "nav.services": "Our Services",
+        "nav.settings": "Settings",
+        "nav.login": "Login",
+        "settings.theme": "Theme",
+        "settings.light": "Light",
+        "settings.dark": "Dark",
+        "settings.language": "Language",
+        "settings.portuguese": "Portuguese",
+        "settings.english": "English",
+        "settings.spanish": "Spanish",
+        "hero.title": "TRANSFORMING INDUSTRIAL SUSTAINABILITY INTO REAL RESULTS",
+        "hero.description": "Did you know that small decisions in industrial production can make a big difference for the environment? In our interactive game, you'll face real-world challenges and learn how to make industrial processes more sustainable. Click and see if you can balance growth with environmental responsibility!",
+        "hero.learnMore": "Learn More",
+        "about.title": "ABOUT US",
+        "about.text1": "We are Ecotrace, a platform that combines advanced technology and sustainability to bring precision, transparency and traceability to industrial environmental management.",
+        "about.text2": "We were born from the need to bring more transparency, precision and traceability to processes that directly impact energy consumption and operational performance.",
+        "about.text3": "Our commitment is to provide reliable information and strategic support, enabling more assertive decisions, environmental compliance and truly sustainable results.",
+        "services.title": "OUR SERVICES",
+        "services.item1.title": "Automated Environmental Compliance",
+        "services.item1.description": "Ensure compliance with environmental regulations in an automated and hassle-free way.",
+        "services.item2.title": "Real-Time Energy Monitoring",
+        "services.item2.description": "Track energy consumption in real time and identify optimization opportunities.",
+        "services.item3.title": "Reliable and Transparent ESG Dashboards",
+        "services.item3.description": "Accurate ESG reports to demonstrate your commitment to sustainability.",
+        "services.item4.title": "Clear Data for Strategic Decisions",
+        "services.item4.description": "Base your decisions on clear data and actionable insights for better performance.",
+        "services.item5.title": "Automatic Waste Identification",
+        "services.item5.description": "Automatically detect sources of waste and implement proactive corrections.",
+        "footer.copyright": "&copy; 2025 Ecotrace. All rights reserved."
+    },
+    es: {
+        "nav.about": "Quiénes Somos",
+        "nav.services": "Nuestros Servicios",
+        "nav.settings": "Configuraciones",
+        "nav.login": "Iniciar Sesión",
+        "settings.theme": "Tema",
+        "settings.light": "Claro",
+        "settings.dark": "Oscuro",
+        "settings.language": "Idioma",
+        "settings.portuguese": "Portugués",
+        "settings.english": "Inglés",
+        "settings.spanish": "Español",
+        "hero.title": "TRANSFORMANDO LA SOSTENIBILIDAD INDUSTRIAL EN RESULTADOS REALES",
+        "hero.description": "¿Sabías que pequeñas decisiones en la producción industrial pueden marcar una gran diferencia para el medio ambiente? En nuestro juego interactivo, enfrentarás desafíos del mundo real y aprenderás cómo hacer los procesos industriales más sostenibles. ¡Haz clic y comprueba si puedes equilibrar el crecimiento con la responsabilidad ambiental!",
+        "hero.learnMore": "Saber Más",
+        "about.title": "QUIÉNES SOMOS",
+        "about.text1": "Somos Ecotrace, una plataforma que une tecnología avanzada y sostenibilidad para aportar precisión, transparencia y trazabilidad a la gestión ambiental industrial.",
+        "about.text2": "Nacimos de la necesidad de aportar más transparencia, precisión y trazabilidad a los procesos que impactan directamente el consumo energético e el desempeño operativo.",
+        "about.text3": "Nuestro compromiso es ofrecer información confiable y soporte estratégico, permitiendo decisiones más asertivas, cumplimiento ambiental y resultados verdaderamente sostenibles.",
+        "services.title": "NUESTROS SERVICIOS",
+        "services.item1.title": "Cumplimiento Ambiental Automatizado",
+        "services.item1.description": "Garantice el cumplimiento de las regulaciones ambientales de forma automatizada y sin complicaciones.",
+        "services.item2.title": "Monitoreo Energético en Tiempo Real",
+        "services.item2.description": "Realice un seguimiento del consumo de energia en tiempo real e identifique oportunidades de optimización.",
+        "services.item3.title": "Paneles ESG Confiables y Transparentes",
+        "services.item3.description": "Informes ESG precisos para demostrar su compromiso con la sostenibilidad.",
+        "services.item4.title": "Datos Claros para Decisiones Estratégicas",
+        "services.item4.description": "Base sus decisiones en datos claros e información procesable para un mejor desempeño.",
+        "services.item5.title": "Identificación Automática de Desperdicios",
+        "services.item5.description": "Detecte automáticamente fuentes de desperdicio e implemente correcciones proactivas.",
+        "footer.copyright": "&copy; 2025 Ecotrace. Todos los derechos reservados."
+    }
+};
+
+// Smooth scrolling
+document.querySelectorAll('a[href^="#"]').forEach(anchor => {
+    anchor.addEventListener('click', function (e) {
+        e.preventDefault();
+        const targetId = this.getAttribute('href');
+        if (targetId === '#') return;
+        const targetElement = document.querySelector(targetId);
+        if (targetElement) {
+            window.scrollTo({
+                top: targetElement.offsetTop - 100,
+                behavior: 'smooth'
+            });
+        }
+    });
+});
+
+// TEMA - IDÊNTICO ao onepage.html
+function initializeTheme() {
+    const savedTheme = localStorage.getItem('theme') || 'light';
+    setTheme(savedTheme);
+}
+
+function setTheme(theme) {
+    document.documentElement.setAttribute('data-theme', theme);
+    localStorage.setItem('theme', theme);
+    updateThemeButton(theme);
+}
+
+function toggleTheme() {
+    const currentTheme = document.documentElement.getAttribute('data-theme') || 'light';
+    const newTheme = currentTheme === 'light' ? 'dark' : 'light';
+    setTheme(newTheme);
+}
+
+function updateThemeButton(theme) {
+    const themeButtons = document.querySelectorAll('.theme-btn');
+    themeButtons.forEach(btn => {
+        if (btn.getAttribute('data-theme') === theme) {
+            btn.classList.add('active');
+
+            // Trocar a logo conforme o tema
+            const logoImage = document.getElementById('logo-image');
+            if (theme === 'dark') {
+                logoImage.src = logoImage.dataset.logoDark;
+            } else {
+                logoImage.src = logoImage.dataset.logoLight;
+            }
+        } else {
+            btn.classList.remove('active');
+        }
+    });
+}
+
+// IDIOMA
+const langButtons = document.querySelectorAll('.lang-btn');
+langButtons.forEach(button => {
+    button.addEventListener('click', function() {
+        const lang = this.getAttribute('data-lang');
+        setLanguage(lang);
+    });
+});
+
+function setLanguage(language) {
+    document.documentElement.setAttribute('lang', language);
+    localStorage.setItem('language', language);
+    updateLanguageButton(language);
+    translateContent(language);
+}
+
+function updateLanguageButton(language) {
+    langButtons.forEach(btn => {
+        if (btn.getAttribute('data-lang') === language) btn.classList.add('active');
+        else btn.classList.remove('active');
+    });
+}
+
+function translateContent(lang) {
+    const elements = document.querySelectorAll('[data-key]');
+    elements.forEach(element => {
+        const key = element.getAttribute('data-key');
+        if (translations[lang] && translations[lang][key]) {
+            if (element.tagName === 'INPUT' || element.tagName === 'TEXTAREA') {
+                element.placeholder = translations[lang][key];
+            } else {
+                element.innerHTML = translations[lang][key];
+            }
+        }
+    });
+}
+
+// Inicializar
+document.addEventListener('DOMContentLoaded', function() {
+    // Carregar tema salvo
+    initializeTheme();
+
+    // Carregar idioma salvo
+    const savedLang = localStorage.getItem('language') || 'pt';
+    setLanguage(savedLang);
+
+    // Configurar botões de tema
+    document.querySelectorAll('.theme-btn').forEach(btn => {
+        btn.addEventListener('click', function() {
+            const theme = this.getAttribute('data-theme');
+            setTheme(theme);
+        });
+    });
+
+    // Botão Entrar
+    const entrarBtn = document.querySelector('.btn-entrar');
+    if (entrarBtn) {
+        entrarBtn.addEventListener('click', function(e) {
+            if(this.getAttribute('href') === '#' || !this.getAttribute('href')) {
+                e.preventDefault();
+                window.location.href = '/login';
+            }
+        });
+    }
+
+    // Suporte para mobile touch no dropdown
+    const configBtn = document.querySelector('.btn-config');
+    if(window.innerWidth <= 900) {
+        configBtn.addEventListener('click', function(e) {
+            e.preventDefault();
+            e.stopPropagation();
+            const dropdown = this.nextElementSibling;
+            if(dropdown.style.display === 'block') {
+                dropdown.style.display = 'none';
+            } else {
+                dropdown.style.display = 'block';
+            }
+        });
+    }
+});
+
+// Fechar dropdown ao clicar fora
+document.addEventListener('click', function(event) {
+    const configContainer = document.querySelector('.config-container');
+    if (!configContainer.contains(event.target)) {
+        document.querySelector('.config-dropdown').style.display = 'none';
+    }
+});